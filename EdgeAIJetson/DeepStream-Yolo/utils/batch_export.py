@@ -0,0 +1,17 @@
+"""
+Parallel DeepStream ONNX export of a job matrix, resumable
+
+    python3 batch_export.py jobs.json -j 3 --memory-gb 6
+    python3 batch_export.py jobs.json --status
+
+See exporters/batch.py for the matrix format.
+"""
+
+import sys
+
+from exporters.batch import main
+
+
+if __name__ == "__main__":
+    results = main()
+    sys.exit(0 if all(r["status"] == "done" for r in results) else 1)
@@ -0,0 +1,13 @@
+"""
+CPU ONNX Runtime latency / throughput benchmark of exported models
+
+    python3 benchmark_onnx.py yolov8s.onnx yolo11s.onnx -b 1 4 -t 1 4 8 --mode sequential parallel --json cpu.json
+
+Requires onnxruntime (pip3 install onnxruntime), no GPU. See exporters/benchmark.py.
+"""
+
+from exporters.benchmark import main
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+"""
+DeepStream ONNX export for every supported model family
+
+Run it from the folder of the model repository (or copy it there together
+with the exporters folder):
+
+    python3 export.py --list
+    python3 export.py yolov8 -w yolov8s.pt --dynamic
+    python3 export.py yolov8 -h
+"""
+
+from exporters.cli import main
+
+
+if __name__ == "__main__":
+    main()
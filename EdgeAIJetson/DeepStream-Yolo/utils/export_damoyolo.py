@@ -1,125 +1,9 @@
-import os
-import onnx
-import torch
-import torch.nn as nn
+"""
+Same as: python3 export.py damoyolo ...
+"""
 
-from damo.config.base import parse_config
-from damo.utils.model_utils import replace_module
-from damo.base_models.core.ops import RepConv, SiLU
-from damo.detectors.detector import build_local_model
-
-
-class DeepStreamOutput(nn.Module):
-    def __init__(self):
-        super().__init__()
-
-    def forward(self, x):
-        boxes = x[1]
-        scores, labels = torch.max(x[0], dim=-1, keepdim=True)
-        return torch.cat([boxes, scores, labels.to(boxes.dtype)], dim=-1)
-
-
-def suppress_warnings():
-    import warnings
-    warnings.filterwarnings("ignore", category=torch.jit.TracerWarning)
-    warnings.filterwarnings("ignore", category=UserWarning)
-    warnings.filterwarnings("ignore", category=DeprecationWarning)
-    warnings.filterwarnings("ignore", category=FutureWarning)
-    warnings.filterwarnings("ignore", category=ResourceWarning)
-
-
-def damoyolo_export(weights, config_file, device):
-    config = parse_config(config_file)
-    config.model.head.export_with_post = True
-    model = build_local_model(config, device)
-    ckpt = torch.load(weights, map_location=device, weights_only=False)
-    model.eval()
-    if "model" in ckpt:
-        ckpt = ckpt["model"]
-    model.load_state_dict(ckpt, strict=True)
-    model = replace_module(model, nn.SiLU, SiLU)
-    for layer in model.modules():
-        if isinstance(layer, RepConv):
-            layer.switch_to_deploy()
-    model.head.nms = False
-    return config, model
-
-
-def main(args):
-    suppress_warnings()
-
-    print(f"\nStarting: {args.weights}")
-
-    print("Opening DAMO-YOLO model")
-
-    device = torch.device("cpu")
-    cfg, model = damoyolo_export(args.weights, args.config, device)
-
-    if len(cfg.dataset["class_names"]) > 0:
-        print("Creating labels.txt file")
-        with open("labels.txt", "w", encoding="utf-8") as f:
-            for name in cfg.dataset["class_names"]:
-                f.write(f"{name}\n")
-
-    model = nn.Sequential(model, DeepStreamOutput())
-
-    img_size = args.size * 2 if len(args.size) == 1 else args.size
-
-    onnx_input_im = torch.zeros(args.batch, 3, *img_size).to(device)
-    onnx_output_file = args.weights.rsplit(".", 1)[0] + ".onnx"
-
-    dynamic_axes = {
-        "input": {
-            0: "batch"
-        },
-        "output": {
-            0: "batch"
-        }
-    }
-
-    print("Exporting the model to ONNX")
-    torch.onnx.export(
-        model,
-        onnx_input_im,
-        onnx_output_file,
-        verbose=False,
-        opset_version=args.opset,
-        do_constant_folding=True,
-        input_names=["input"],
-        output_names=["output"],
-        dynamic_axes=dynamic_axes if args.dynamic else None
-    )
-
-    if args.simplify:
-        print("Simplifying the ONNX model")
-        import onnxslim
-        model_onnx = onnx.load(onnx_output_file)
-        model_onnx = onnxslim.slim(model_onnx)
-        onnx.save(model_onnx, onnx_output_file)
-
-    print(f"Done: {onnx_output_file}\n")
-
-
-def parse_args():
-    import argparse
-    parser = argparse.ArgumentParser(description="DeepStream DAMO-YOLO conversion")
-    parser.add_argument("-w", "--weights", required=True, type=str, help="Input weights (.pth) file path (required)")
-    parser.add_argument("-c", "--config", required=True, type=str, help="Input config (.py) file path (required)")
-    parser.add_argument("-s", "--size", nargs="+", type=int, default=[640], help="Inference size [H,W] (default [640])")
-    parser.add_argument("--opset", type=int, default=17, help="ONNX opset version")
-    parser.add_argument("--simplify", action="store_true", help="ONNX simplify model")
-    parser.add_argument("--dynamic", action="store_true", help="Dynamic batch-size")
-    parser.add_argument("--batch", type=int, default=1, help="Static batch-size")
-    args = parser.parse_args()
-    if not os.path.isfile(args.weights):
-        raise RuntimeError("Invalid weights file")
-    if not os.path.isfile(args.config):
-        raise RuntimeError("Invalid config file")
-    if args.dynamic and args.batch > 1:
-        raise RuntimeError("Cannot set dynamic batch-size and static batch-size at same time")
-    return args
+from exporters.cli import main
 
 
 if __name__ == "__main__":
-    args = parse_args()
-    main(args)
+    main(family="damoyolo")
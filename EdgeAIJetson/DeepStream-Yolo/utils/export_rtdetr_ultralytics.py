@@ -1,124 +1,9 @@
-import os
-import torch
-import torch.nn as nn
-from copy import deepcopy
+"""
+Same as: python3 export.py rtdetr_ultralytics ...
+"""
 
-from ultralytics import RTDETR
-from ultralytics.nn.modules import C2f, RTDETRDecoder
-
-
-class DeepStreamOutput(nn.Module):
-    def __init__(self, img_size):
-        super().__init__()
-        self.img_size = img_size
-
-    def forward(self, x):
-        boxes = x[:, :, :4]
-        convert_matrix = torch.tensor(
-            [[1, 0, 1, 0], [0, 1, 0, 1], [-0.5, 0, 0.5, 0], [0, -0.5, 0, 0.5]], dtype=boxes.dtype, device=boxes.device
-        )
-        boxes @= convert_matrix
-        boxes *= torch.as_tensor([[*self.img_size]]).flip(1).tile([1, 2]).unsqueeze(1)
-        scores, labels = torch.max(x[:, :, 4:], dim=-1, keepdim=True)
-        return torch.cat([boxes, scores, labels.to(boxes.dtype)], dim=-1)
-
-
-def rtdetr_ultralytics_export(weights, device, fuse=True):
-    model = RTDETR(weights)
-    model = deepcopy(model.model).to(device)
-    for p in model.parameters():
-        p.requires_grad = False
-    model.eval()
-    model.float()
-    if fuse:
-        model = model.fuse()
-    for k, m in model.named_modules():
-        if isinstance(m, RTDETRDecoder):
-            m.dynamic = False
-            m.export = True
-            m.format = "onnx"
-        elif isinstance(m, C2f):
-            m.forward = m.forward_split
-    return model
-
-
-def suppress_warnings():
-    import warnings
-    warnings.filterwarnings("ignore", category=torch.jit.TracerWarning)
-    warnings.filterwarnings("ignore", category=UserWarning)
-    warnings.filterwarnings("ignore", category=DeprecationWarning)
-    warnings.filterwarnings("ignore", category=FutureWarning)
-    warnings.filterwarnings("ignore", category=ResourceWarning)
-
-
-def main(args):
-    suppress_warnings()
-
-    print(f"\nStarting: {args.weights}")
-
-    print("Opening RT-DETR Ultralytics model")
-
-    device = torch.device("cpu")
-    model = rtdetr_ultralytics_export(args.weights, device)
-
-    if len(model.names.keys()) > 0:
-        print("Creating labels.txt file")
-        with open("labels.txt", "w", encoding="utf-8") as f:
-            for name in model.names.values():
-                f.write(f"{name}\n")
-
-    img_size = args.size * 2 if len(args.size) == 1 else args.size
-
-    model = nn.Sequential(model, DeepStreamOutput(img_size))
-
-    onnx_input_im = torch.zeros(args.batch, 3, *img_size).to(device)
-    onnx_output_file = args.weights.rsplit(".", 1)[0] + ".onnx"
-
-    dynamic_axes = {
-        "input": {
-            0: "batch"
-        },
-        "output": {
-            0: "batch"
-        }
-    }
-
-    print("Exporting the model to ONNX")
-    torch.onnx.export(
-        model,
-        onnx_input_im,
-        onnx_output_file,
-        verbose=False,
-        opset_version=args.opset,
-        do_constant_folding=True,
-        input_names=["input"],
-        output_names=["output"],
-        dynamic_axes=dynamic_axes if args.dynamic else None
-    )
-
-    if args.simplify:
-        print("Simplifying is not available for this model")
-
-    print(f"Done: {onnx_output_file}\n")
-
-
-def parse_args():
-    import argparse
-    parser = argparse.ArgumentParser(description="DeepStream RT-DETR Ultralytics conversion")
-    parser.add_argument("-w", "--weights", required=True, type=str, help="Input weights (.pt) file path (required)")
-    parser.add_argument("-s", "--size", nargs="+", type=int, default=[640], help="Inference size [H,W] (default [640])")
-    parser.add_argument("--opset", type=int, default=17, help="ONNX opset version")
-    parser.add_argument("--simplify", action="store_true", help="ONNX simplify model")
-    parser.add_argument("--dynamic", action="store_true", help="Dynamic batch-size")
-    parser.add_argument("--batch", type=int, default=1, help="Static batch-size")
-    args = parser.parse_args()
-    if not os.path.isfile(args.weights):
-        raise RuntimeError("Invalid weights file")
-    if args.dynamic and args.batch > 1:
-        raise RuntimeError("Cannot set dynamic batch-size and static batch-size at same time")
-    return args
+from exporters.cli import main
 
 
 if __name__ == "__main__":
-    args = parse_args()
-    main(args)
+    main(family="rtdetr_ultralytics")
@@ -1,156 +1,9 @@
-import os
-import sys
-import types
-import onnx
-import torch
-import torch.nn as nn
-from copy import deepcopy
+"""
+Same as: python3 export.py yolov10 ...
+"""
 
-from ultralytics import YOLO
-from ultralytics.nn.modules import C2f, Detect, v10Detect
-import ultralytics.utils
-import ultralytics.models.yolo
-import ultralytics.utils.tal as _m
-
-sys.modules["ultralytics.yolo"] = ultralytics.models.yolo
-sys.modules["ultralytics.yolo.utils"] = ultralytics.utils
-
-
-def _dist2bbox(distance, anchor_points, xywh=False, dim=-1):
-    lt, rb = distance.chunk(2, dim)
-    x1y1 = anchor_points - lt
-    x2y2 = anchor_points + rb
-    return torch.cat((x1y1, x2y2), dim)
-
-
-_m.dist2bbox.__code__ = _dist2bbox.__code__
-
-
-class DeepStreamOutput(nn.Module):
-    def __init__(self):
-        super().__init__()
-
-    def forward(self, x):
-        x = x.transpose(1, 2)
-        boxes = x[:, :, :4]
-        scores, labels = torch.max(x[:, :, 4:], dim=-1, keepdim=True)
-        return torch.cat([boxes, scores, labels.to(boxes.dtype)], dim=-1)
-
-
-def forward_deepstream(self, x):
-    x_detach = [xi.detach() for xi in x]
-    one2one = [
-        torch.cat((self.one2one_cv2[i](x_detach[i]), self.one2one_cv3[i](x_detach[i])), 1) for i in range(self.nl)
-    ]
-    if hasattr(self, "inference"):
-        y = self.inference(one2one)
-    else:
-        y = self._inference(one2one)
-    return y
-
-
-def yolov10_export(weights, device, fuse=True):
-    model = YOLO(weights)
-    model = deepcopy(model.model).to(device)
-    for p in model.parameters():
-        p.requires_grad = False
-    model.eval()
-    model.float()
-    if fuse:
-        model = model.fuse()
-    for k, m in model.named_modules():
-        if isinstance(m, (Detect, v10Detect)):
-            m.dynamic = False
-            m.export = True
-            m.format = "onnx"
-            if m.__class__.__name__ == "v10Detect":
-                m.forward = types.MethodType(forward_deepstream, m)
-        elif isinstance(m, C2f):
-            m.forward = m.forward_split
-    return model
-
-
-def suppress_warnings():
-    import warnings
-    warnings.filterwarnings("ignore", category=torch.jit.TracerWarning)
-    warnings.filterwarnings("ignore", category=UserWarning)
-    warnings.filterwarnings("ignore", category=DeprecationWarning)
-    warnings.filterwarnings("ignore", category=FutureWarning)
-    warnings.filterwarnings("ignore", category=ResourceWarning)
-
-
-def main(args):
-    suppress_warnings()
-
-    print(f"\nStarting: {args.weights}")
-
-    print("Opening YOLOv10 model")
-
-    device = torch.device("cpu")
-    model = yolov10_export(args.weights, device)
-
-    if len(model.names.keys()) > 0:
-        print("Creating labels.txt file")
-        with open("labels.txt", "w", encoding="utf-8") as f:
-            for name in model.names.values():
-                f.write(f"{name}\n")
-
-    model = nn.Sequential(model, DeepStreamOutput())
-
-    img_size = args.size * 2 if len(args.size) == 1 else args.size
-
-    onnx_input_im = torch.zeros(args.batch, 3, *img_size).to(device)
-    onnx_output_file = args.weights.rsplit(".", 1)[0] + ".onnx"
-
-    dynamic_axes = {
-        "input": {
-            0: "batch"
-        },
-        "output": {
-            0: "batch"
-        }
-    }
-
-    print("Exporting the model to ONNX")
-    torch.onnx.export(
-        model,
-        onnx_input_im,
-        onnx_output_file,
-        verbose=False,
-        opset_version=args.opset,
-        do_constant_folding=True,
-        input_names=["input"],
-        output_names=["output"],
-        dynamic_axes=dynamic_axes if args.dynamic else None
-    )
-
-    if args.simplify:
-        print("Simplifying the ONNX model")
-        import onnxslim
-        model_onnx = onnx.load(onnx_output_file)
-        model_onnx = onnxslim.slim(model_onnx)
-        onnx.save(model_onnx, onnx_output_file)
-
-    print(f"Done: {onnx_output_file}\n")
-
-
-def parse_args():
-    import argparse
-    parser = argparse.ArgumentParser(description="DeepStream YOLOv10 conversion")
-    parser.add_argument("-w", "--weights", required=True, type=str, help="Input weights (.pt) file path (required)")
-    parser.add_argument("-s", "--size", nargs="+", type=int, default=[640], help="Inference size [H,W] (default [640])")
-    parser.add_argument("--opset", type=int, default=17, help="ONNX opset version")
-    parser.add_argument("--simplify", action="store_true", help="ONNX simplify model")
-    parser.add_argument("--dynamic", action="store_true", help="Dynamic batch-size")
-    parser.add_argument("--batch", type=int, default=1, help="Static batch-size")
-    args = parser.parse_args()
-    if not os.path.isfile(args.weights):
-        raise RuntimeError("Invalid weights file")
-    if args.dynamic and args.batch > 1:
-        raise RuntimeError("Cannot set dynamic batch-size and static batch-size at same time")
-    return args
+from exporters.cli import main
 
 
 if __name__ == "__main__":
-    args = parse_args()
-    main(args)
+    main(family="yolov10")
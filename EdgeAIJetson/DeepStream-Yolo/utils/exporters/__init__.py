@@ -0,0 +1,61 @@
+"""
+Model family plugins for export.py
+
+Each family maps to a plugin module and the model name used in messages.
+Plugin modules only import their framework (ultralytics, mmdet, paddle,
+super_gradients, rfdetr, ...) inside load(), so importing this package,
+listing the families and printing help stay cheap.
+
+A plugin module defines:
+    load(args, device)      -> (model with DeepStream output head, img_size, labels)
+    add_arguments(parser)   optional, family specific arguments
+    check_args(args)        optional, extra validation
+    WEIGHTS                 weights file extension shown in the help (default ".pt")
+    SIZE                    default --size, None if the size comes from the model config (default [640])
+    P6                      adds --p6 (default False)
+    SIMPLIFY                onnxslim works on the exported model (default True)
+    FRAMEWORK               "torch" or "paddle" (default "torch")
+    PACKAGES                pip distributions whose versions go into the export cache key (default [])
+"""
+
+import importlib
+
+# family -> (plugin module, model name)
+FAMILIES = {
+    "yolov5": ("exporters.yolov5", "YOLOv5"),
+    "yolov5u": ("exporters.ultralytics_yolo", "YOLOv5u"),
+    "yolov6": ("exporters.yolov6", "YOLOv6"),
+    "yolov7": ("exporters.yolov7", "YOLOv7"),
+    "yolov7_u6": ("exporters.yolov7_u6", "YOLOv7-u6"),
+    "yolov8": ("exporters.ultralytics_yolo", "YOLOv8"),
+    "yolov9": ("exporters.yolov9", "YOLOv9"),
+    "yolov10": ("exporters.ultralytics_yolo", "YOLOv10"),
+    "yolo11": ("exporters.ultralytics_yolo", "YOLO11"),
+    "yolov12": ("exporters.ultralytics_yolo", "YOLOv12"),
+    "yolov13": ("exporters.ultralytics_yolo", "YOLOv13"),
+    "yolor": ("exporters.yolor", "YOLOR"),
+    "yolox": ("exporters.yolox", "YOLOX"),
+    "yolonas": ("exporters.yolonas", "YOLO-NAS"),
+    "goldyolo": ("exporters.goldyolo", "Gold-YOLO"),
+    "damoyolo": ("exporters.damoyolo", "DAMO-YOLO"),
+    "ppyoloe": ("exporters.ppyoloe", "PPYOLOE"),
+    "rtmdet": ("exporters.rtmdet", "RTMDet"),
+    "codetr": ("exporters.codetr", "CO-DETR"),
+    "rtdetr_ultralytics": ("exporters.rtdetr_ultralytics", "RT-DETR Ultralytics"),
+    "rtdetr_pytorch": ("exporters.rtdetr_pytorch", "RT-DETR PyTorch"),
+    "rtdetr_paddle": ("exporters.rtdetr_paddle", "RT-DETR Paddle"),
+    "dfine": ("exporters.rtdetr_pytorch", "D-FINE"),
+    "rfdetr": ("exporters.rfdetr", "RF-DETR"),
+}
+
+
+def register(family, module, name):
+    """Add (or replace) a model family, e.g. register("mymodel", "my_package.my_exporter", "MyModel")"""
+    FAMILIES[family] = (module, name)
+
+
+def load_plugin(family):
+    """Import the plugin module of a family; its framework is still not imported"""
+    if family not in FAMILIES:
+        raise RuntimeError(f"Unknown model family: {family} (see --list)")
+    return importlib.import_module(FAMILIES[family][0])
@@ -0,0 +1,379 @@
+"""
+Batch export of a job matrix (families x sizes x batch settings)
+
+Each job runs export.py in its own process, so the backend patches and
+the `models` / `utils` packages of different model repositories never
+share an interpreter. A pool of workers keeps `workers` exports running.
+Every job writes its .onnx, labels.txt and log into its own folder under
+the output folder (--output / --labels), so parallel jobs don't overwrite
+each other's labels.txt.
+
+Outcomes are appended to <output>/state.jsonl. A new run skips the jobs
+that are already done, so an interrupted matrix resumes where it stopped.
+
+Matrix file (JSON):
+    {
+        "output": "exports",
+        "workers": 2,
+        "memory_gb": 6,
+        "timeout": 3600,
+        "jobs": [
+            {
+                "family": "yolov8",
+                "repo": "~/ultralytics",
+                "weights": "yolov8s.pt",
+                "size": [640, [736, 1280]],
+                "batch": [1, 4, "dynamic"],
+                "args": ["--simplify"]
+            }
+        ]
+    }
+
+repo is the folder of the model repository the export runs in (relative
+weights and -c files are relative to it); size entries are a side or
+[H, W], batch entries a static batch-size or "dynamic". Families whose
+input size comes from their config (yolox, ppyoloe, rtdetr_paddle) leave
+size out.
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import hashlib
+import itertools
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+EXPORT_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "export.py")
+STATE_FILE = "state.jsonl"
+MEMORY_POLL_INTERVAL = 0.2  # seconds
+
+
+def expand_jobs(matrix):
+    """
+    One job per combination of size and batch setting of each matrix entry
+
+    Returns:
+        list: Jobs as dicts with name, family, repo, weights, size, batch, dynamic, args and id
+    """
+    jobs = []
+    for spec in matrix["jobs"]:
+        repo = os.path.abspath(os.path.expanduser(spec.get("repo", ".")))
+        weights = os.path.join(repo, os.path.expanduser(spec["weights"]))
+        stem = os.path.splitext(os.path.basename(weights))[0]
+        sizes = spec.get("size", [None])
+        batches = spec.get("batch", [1])
+        for size, batch in itertools.product(sizes if isinstance(sizes, list) else [sizes],
+                                             batches if isinstance(batches, list) else [batches]):
+            if isinstance(size, int):
+                size = [size, size]
+            dynamic = batch == "dynamic"
+            job = {
+                "family": spec["family"],
+                "repo": repo,
+                "weights": weights,
+                "size": size,
+                "batch": 1 if dynamic else int(batch),
+                "dynamic": dynamic,
+                "opset": spec.get("opset", 17),
+                "args": [str(arg) for arg in spec.get("args", [])],
+            }
+            # Stable across runs, it is how state.jsonl matches jobs on resume
+            job["id"] = hashlib.sha256(json.dumps(job, sort_keys=True).encode()).hexdigest()[:16]
+            # The id part keeps jobs that differ only in opset or args out of each other's folder
+            size_name = f"{size[0]}x{size[1]}" if size else "cfg"
+            batch_name = "dynamic" if dynamic else f"b{job['batch']}"
+            job["name"] = f"{spec['family']}_{stem}_{size_name}_{batch_name}_{job['id'][:8]}"
+            jobs.append(job)
+    return jobs
+
+
+def export_command(job, onnx_file, labels_file, cache_args=()):
+    command = [sys.executable, EXPORT_SCRIPT, job["family"], "-w", job["weights"]]
+    if job["size"]:
+        command += ["-s", *[str(s) for s in job["size"]]]
+    command += ["--dynamic"] if job["dynamic"] else ["--batch", str(job["batch"])]
+    command += ["--opset", str(job["opset"]), "--output", onnx_file, "--labels", labels_file]
+    return command + job["args"] + list(cache_args)
+
+
+def read_state(output_dir):
+    """Last recorded outcome of every job id"""
+    state = {}
+    path = os.path.join(output_dir, STATE_FILE)
+    if os.path.isfile(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:  # Line cut short by a crash
+                    continue
+                state[record["id"]] = record
+    return state
+
+
+def process_memory(pid):
+    """
+    Current and peak resident memory of a process, from /proc
+
+    Returns:
+        tuple: (rss bytes, peak rss bytes), (0, 0) once the process is gone
+    """
+    rss = peak = 0
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1]) * 1024
+                elif line.startswith("VmHWM:"):
+                    peak = int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return rss, peak
+
+
+def group_memory(pgid):
+    """
+    Resident memory of all processes in a process group, so workers a framework starts count too
+
+    Returns:
+        int: Sum of their rss bytes
+    """
+    total = 0
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", encoding="ascii", errors="replace") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[2]) == pgid:  # state, ppid, pgrp after the command name
+            total += process_memory(int(name))[0]
+    return total
+
+
+class BatchExporter:
+    """
+    Runs export jobs `workers` at a time with a per-job memory limit and timeout
+
+    A job whose process group goes over `memory_bytes` of resident memory is
+    killed and recorded as "memory". On Ctrl-C the running exports are killed
+    and recorded as "interrupted"; torch / OpenMP threads are split between the workers unless
+    OMP_NUM_THREADS is already set.
+
+    Example:
+        runner = BatchExporter("exports", workers=2, memory_bytes=6e9)
+        results = runner.run(expand_jobs(matrix))
+    """
+
+    def __init__(self, output_dir, workers=2, memory_bytes=None, timeout=None, cache_args=()):
+        self.output_dir = os.path.abspath(output_dir)
+        self.workers = workers
+        self.memory_bytes = memory_bytes
+        self.timeout = timeout
+        self.cache_args = list(cache_args)
+        self._state_lock = threading.Lock()
+        self._print_lock = threading.Lock()
+        self._running = {}  # job id -> export process
+        self._running_lock = threading.Lock()
+        self._interrupted = threading.Event()
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def pending(self, jobs, force=False):
+        """Jobs without a "done" record whose outputs still exist"""
+        if force:
+            return list(jobs)
+        state = read_state(self.output_dir)
+        pending = []
+        for job in jobs:
+            record = state.get(job["id"])
+            if record and record["status"] == "done" and os.path.isfile(record["onnx"]):
+                continue
+            pending.append(job)
+        return pending
+
+    def _record(self, record):
+        with self._state_lock:
+            with open(os.path.join(self.output_dir, STATE_FILE), "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, sort_keys=True) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _print(self, message):
+        with self._print_lock:
+            print(message, flush=True)
+
+    def _environment(self):
+        env = dict(os.environ, PYTHONUNBUFFERED="1")
+        if "OMP_NUM_THREADS" not in env:
+            env["OMP_NUM_THREADS"] = str(max(1, (os.cpu_count() or 1) // self.workers))
+        return env
+
+    def job_files(self, job):
+        """
+        Returns:
+            tuple: (ONNX, labels, log) paths in the job folder
+        """
+        job_dir = os.path.join(self.output_dir, job["name"])
+        onnx_file = os.path.join(job_dir, os.path.splitext(os.path.basename(job["weights"]))[0] + ".onnx")
+        return onnx_file, os.path.join(job_dir, "labels.txt"), os.path.join(job_dir, "export.log")
+
+    def run_job(self, job):
+        """Run one export and record its outcome"""
+        onnx_file, labels_file, log_file = self.job_files(job)
+        os.makedirs(os.path.dirname(onnx_file), exist_ok=True)
+        for path in (onnx_file, labels_file):
+            if os.path.isfile(path):
+                os.remove(path)
+
+        command = export_command(job, onnx_file, labels_file, self.cache_args)
+        record = {"id": job["id"], "name": job["name"], "family": job["family"], "onnx": onnx_file,
+                  "log": log_file, "command": command}
+        self._print(f"Start: {job['name']}")
+        start = time.monotonic()
+        peak = 0
+        status = None
+        with open(log_file, "w", encoding="utf-8") as log:
+            # New session: a kill reaches the workers a framework may have started
+            proc = subprocess.Popen(command, cwd=job["repo"], stdout=log, stderr=subprocess.STDOUT,
+                                    env=self._environment(), start_new_session=True)
+            with self._running_lock:
+                self._running[job["id"]] = proc
+            try:
+                while proc.poll() is None:
+                    rss = group_memory(proc.pid)
+                    peak = max(peak, rss, process_memory(proc.pid)[1])
+                    if self._interrupted.is_set():
+                        status = "interrupted"
+                    elif self.memory_bytes and rss > self.memory_bytes:
+                        status = "memory"
+                    elif self.timeout and time.monotonic() - start > self.timeout:
+                        status = "timeout"
+                    if status is not None:
+                        self._kill(proc)
+                        break
+                    time.sleep(MEMORY_POLL_INTERVAL)
+            finally:
+                with self._running_lock:
+                    self._running.pop(job["id"], None)
+            if status is None and self._interrupted.is_set():  # Killed by run()
+                status = "interrupted"
+
+        record["seconds"] = round(time.monotonic() - start, 3)
+        record["peak_rss_mb"] = round(peak / 1e6, 1)
+        record["returncode"] = proc.returncode
+        if status is None:
+            status = "done" if proc.returncode == 0 and os.path.isfile(onnx_file) else "failed"
+        record["status"] = status
+        record["labels"] = labels_file if os.path.isfile(labels_file) else None
+        record["finished"] = time.time()
+        if status != "done":
+            record["error"] = self._last_line(log_file)
+        self._record(record)
+        self._print(f"{status.capitalize()}: {job['name']} in {record['seconds']:.1f} s, "
+                    f"peak {record['peak_rss_mb']:.0f} MB")
+        return record
+
+    @staticmethod
+    def _kill(proc):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        proc.wait()
+
+    @staticmethod
+    def _last_line(path):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            lines = [line.strip() for line in f if line.strip()]
+        return lines[-1] if lines else ""
+
+    def run(self, jobs, force=False):
+        """
+        Run the jobs not done yet
+
+        Returns:
+            list: Outcome records of the jobs run, up to a Ctrl-C
+        """
+        jobs = self.pending(jobs, force)
+        if not jobs:
+            return []
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        futures = [pool.submit(self.run_job, job) for job in jobs]
+        try:
+            results = [future.result() for future in futures]
+        except KeyboardInterrupt:
+            # The exports run in their own sessions, Ctrl-C does not reach them
+            self._interrupted.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+            with self._running_lock:
+                running = list(self._running.values())
+            for proc in running:
+                self._kill(proc)
+            self._print("Interrupted: running exports killed")
+        pool.shutdown(wait=True)
+        if self._interrupted.is_set():
+            results = [future.result() for future in futures if future.done() and not future.cancelled()]
+        return results
+
+
+def print_status(jobs, output_dir):
+    state = read_state(output_dir)
+    width = max([len(job["name"]) for job in jobs] + [4])
+    print(f"{'job':<{width}}  {'status':<8}  {'seconds':>8}  {'peak MB':>8}")
+    for job in jobs:
+        record = state.get(job["id"], {})
+        seconds = f"{record['seconds']:.1f}" if "seconds" in record else "-"
+        peak = f"{record['peak_rss_mb']:.0f}" if "peak_rss_mb" in record else "-"
+        print(f"{job['name']:<{width}}  {record.get('status', 'pending'):<8}  {seconds:>8}  {peak:>8}")
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="DeepStream batch model conversion")
+    parser.add_argument("matrix", type=str, help="Job matrix (.json) file path")
+    parser.add_argument("-o", "--output", type=str, default=None, help="Output folder (default: matrix output)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Parallel exports (default: matrix workers or 2)")
+    parser.add_argument("--memory-gb", type=float, default=None, help="Resident memory limit per export in GB")
+    parser.add_argument("--timeout", type=float, default=None, help="Time limit per export in seconds")
+    parser.add_argument("--force", action="store_true", help="Run the jobs already done again")
+    parser.add_argument("--status", action="store_true", help="Print the state of the jobs and exit")
+    parser.add_argument("--dry-run", action="store_true", help="Print the export commands and exit")
+    parser.add_argument("--no-cache", action="store_true", help="Don't use the export cache")
+    args = parser.parse_args(argv)
+
+    with open(args.matrix, encoding="utf-8") as f:
+        matrix = json.load(f)
+    output = os.path.abspath(args.output) if args.output else None
+    # Relative paths in the matrix are relative to its file
+    os.chdir(os.path.dirname(os.path.abspath(args.matrix)))
+    output_dir = output or os.path.abspath(matrix.get("output", "exports"))
+    workers = args.workers or matrix.get("workers", 2)
+    memory_gb = args.memory_gb or matrix.get("memory_gb")
+    timeout = args.timeout or matrix.get("timeout")
+    jobs = expand_jobs(matrix)
+
+    if args.status:
+        print_status(jobs, output_dir)
+        return []
+    runner = BatchExporter(output_dir, workers, memory_gb * 1e9 if memory_gb else None, timeout,
+                           ["--no-cache"] if args.no_cache else [])
+    if args.dry_run:
+        for job in runner.pending(jobs, args.force):
+            onnx_file, labels_file, _ = runner.job_files(job)
+            print(f"{job['name']}: (cd {job['repo']} && {' '.join(export_command(job, onnx_file, labels_file))})")
+        return []
+
+    pending = runner.pending(jobs, args.force)
+    print(f"{len(jobs)} jobs, {len(jobs) - len(pending)} already done, {workers} workers\n")
+    start = time.monotonic()
+    results = runner.run(pending, force=True)
+    done = sum(1 for r in results if r["status"] == "done")
+    print(f"\n{done}/{len(results)} exports done in {time.monotonic() - start:.1f} s "
+          f"(serial time {sum(r['seconds'] for r in results):.1f} s), state in {output_dir}/{STATE_FILE}\n")
+    print_status(jobs, output_dir)
+    return results
@@ -0,0 +1,327 @@
+"""
+CPU ONNX Runtime benchmark of exported models
+
+Every combination of model, batch-size, intra-op thread count and execution
+mode runs in a fresh process, so its peak resident memory is its own and
+thread pools of one configuration don't warm up the next. A configuration
+reports the session creation time, the first run and warm-up time,
+p50/p95/p99 latency, images/sec and peak RSS.
+
+A model exported with --dynamic runs at every batch-size; a static model
+only at the batch-size it was exported with, the other ones are reported as
+"skipped". Inputs are random images of the model input size (--size for
+models without a fixed one).
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import multiprocessing
+
+EXECUTION_MODES = ("sequential", "parallel")
+OPTIMIZATION_LEVELS = ("disable", "basic", "extended", "all")
+PERCENTILES = (50, 95, 99)
+
+# ONNX tensor element types of the model inputs -> numpy dtypes
+INPUT_TYPES = {
+    "tensor(float)": "float32",
+    "tensor(float16)": "float16",
+    "tensor(double)": "float64",
+    "tensor(int64)": "int64",
+    "tensor(int32)": "int32",
+    "tensor(uint8)": "uint8",
+}
+
+
+def session_options(threads, mode="sequential", optimization="all"):
+    import onnxruntime as ort
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads
+    if mode == "parallel":
+        options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+        options.inter_op_num_threads = threads
+    else:
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.graph_optimization_level = {
+        "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+        "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+    }[optimization]
+    return options
+
+
+def model_inputs(model_file):
+    """
+    Returns:
+        list: (name, shape, type) of the model inputs, symbolic dims as None
+    """
+    import onnxruntime as ort
+    session = ort.InferenceSession(model_file, providers=["CPUExecutionProvider"])
+    return [(i.name, [d if isinstance(d, int) else None for d in i.shape], i.type) for i in session.get_inputs()]
+
+
+def input_shape(shape, batch_size, size=None):
+    """Input shape at `batch_size`, symbolic spatial dims from `size` ([H, W])"""
+    if shape[0] is not None and shape[0] != batch_size:
+        raise RuntimeError(f"Static batch-size {shape[0]}, export with --dynamic to run batch-size {batch_size}")
+    shape = [batch_size] + list(shape[1:])
+    missing = [i for i, d in enumerate(shape) if d is None]
+    if missing:
+        if size is None or len(missing) != len(size):
+            raise RuntimeError(f"Input shape {shape} is not fixed, set --size")
+        for i, d in zip(missing, size):
+            shape[i] = d
+    return shape
+
+
+def random_inputs(inputs, batch_size, size=None, seed=0):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    feed = {}
+    for name, shape, tensor_type in inputs:
+        if tensor_type not in INPUT_TYPES:
+            raise RuntimeError(f"Unsupported input type {tensor_type} of {name}")
+        dtype = np.dtype(INPUT_TYPES[tensor_type])
+        shape = input_shape(shape, batch_size, size)
+        if dtype.kind == "f":
+            feed[name] = rng.random(shape, dtype=np.float32).astype(dtype)
+        else:
+            feed[name] = rng.integers(0, 255, shape).astype(dtype)
+    return feed
+
+
+def peak_memory():
+    """Peak resident memory of this process in bytes"""
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # KiB on Linux
+
+
+def run_config(config):
+    """
+    Benchmark one configuration in the current process
+
+    Returns:
+        dict: Measurements of the configuration
+    """
+    import numpy as np
+    import onnxruntime as ort
+
+    base_memory = peak_memory()
+    options = session_options(config["threads"], config["mode"], config["optimization"])
+    start = time.perf_counter()
+    session = ort.InferenceSession(config["model"], options, providers=["CPUExecutionProvider"])
+    session_s = time.perf_counter() - start
+
+    inputs = [(i.name, [d if isinstance(d, int) else None for d in i.shape], i.type) for i in session.get_inputs()]
+    feed = random_inputs(inputs, config["batch"], config["size"])
+
+    start = time.perf_counter()
+    session.run(None, feed)
+    first_run_s = time.perf_counter() - start
+    for _ in range(config["warmup"]):
+        session.run(None, feed)
+    warmup_s = time.perf_counter() - start
+
+    latencies = []
+    start = time.perf_counter()
+    while len(latencies) < config["runs"] or time.perf_counter() - start < config["min_time"]:
+        t = time.perf_counter()
+        session.run(None, feed)
+        latencies.append(time.perf_counter() - t)
+    total_s = time.perf_counter() - start
+
+    latencies = np.array(latencies) * 1e3
+    result = {
+        "session_s": round(session_s, 4),
+        "first_run_ms": round(first_run_s * 1e3, 3),
+        "warmup_s": round(warmup_s, 4),
+        "runs": len(latencies),
+        "latency_ms": {
+            "mean": round(float(latencies.mean()), 3),
+            "min": round(float(latencies.min()), 3),
+            "max": round(float(latencies.max()), 3),
+        },
+        "images_per_s": round(config["batch"] * len(latencies) / total_s, 2),
+        "base_rss_mb": round(base_memory / 1e6, 1),
+        "peak_rss_mb": round(peak_memory() / 1e6, 1),
+    }
+    for p, value in zip(PERCENTILES, np.percentile(latencies, PERCENTILES)):
+        result["latency_ms"][f"p{p}"] = round(float(value), 3)
+    return result
+
+
+def _child(config, connection):
+    try:
+        connection.send({"status": "done", **run_config(config)})
+    except Exception as e:
+        connection.send({"status": "failed", "error": f"{type(e).__name__}: {e}"})
+    finally:
+        connection.close()
+
+
+def run_isolated(config, timeout=None):
+    """Benchmark one configuration in a new process (spawned, no state shared with this one)"""
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    proc = context.Process(target=_child, args=(config, sender), daemon=True)
+    proc.start()
+    sender.close()
+    result = None
+    if receiver.poll(timeout):
+        try:
+            result = receiver.recv()
+        except EOFError:
+            pass
+    if result is None:
+        if proc.is_alive():
+            proc.kill()
+            result = {"status": "timeout", "error": f"No result in {timeout} s"}
+        else:
+            proc.join()
+            result = {"status": "failed", "error": f"Benchmark process exited with code {proc.exitcode}"}
+    proc.join()
+    return result
+
+
+def configurations(args):
+    """
+    Returns:
+        list: (config, skip reason or None) for each model, batch-size, thread count and execution mode
+    """
+    configs = []
+    for model in args.models:
+        inputs = model_inputs(model)
+        for batch in args.batch:
+            try:
+                for _, shape, _ in inputs:
+                    input_shape(shape, batch, args.size)
+                reason = None
+            except RuntimeError as e:
+                reason = str(e)
+            for threads in args.threads:
+                for mode in args.mode:
+                    config = {
+                        "model": model,
+                        "batch": batch,
+                        "threads": threads,
+                        "mode": mode,
+                        "optimization": args.optimization,
+                        "size": args.size,
+                        "warmup": args.warmup,
+                        "runs": args.runs,
+                        "min_time": args.min_time,
+                    }
+                    configs.append((config, reason))
+    return configs
+
+
+def host_info():
+    import onnxruntime as ort
+    cpu = platform.processor()
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    cpu = line.split(":", 1)[1].strip()
+                    break
+    except OSError:
+        pass
+    return {
+        "cpu": cpu,
+        "cpu_count": os.cpu_count(),
+        "platform": platform.platform(),
+        "python": sys.version.split()[0],
+        "onnxruntime": ort.__version__,
+    }
+
+
+def print_ranking(results, file=sys.stderr):
+    done = sorted((r for r in results if r["status"] == "done"), key=lambda r: -r["images_per_s"])
+    print(f"\n{'model':<32} {'batch':>5} {'threads':>7} {'mode':<10} {'img/s':>9} {'p50 ms':>9} "
+          f"{'p99 ms':>9} {'peak MB':>8}", file=file)
+    for r in done:
+        name = os.path.basename(r["model"])
+        print(f"{name:<32} {r['batch']:>5} {r['threads']:>7} {r['mode']:<10} {r['images_per_s']:>9.2f} "
+              f"{r['latency_ms']['p50']:>9.2f} {r['latency_ms']['p99']:>9.2f} {r['peak_rss_mb']:>8.0f}", file=file)
+    for r in results:
+        if r["status"] != "done":
+            print(f"{r['status'].capitalize()}: {os.path.basename(r['model'])} batch {r['batch']} threads "
+                  f"{r['threads']} {r['mode']}: {r['error']}", file=file)
+
+
+def parse_args(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="CPU ONNX Runtime benchmark of DeepStream ONNX models")
+    parser.add_argument("models", nargs="+", help="ONNX model file paths")
+    parser.add_argument("-b", "--batch", nargs="+", type=int, default=[1], help="Batch-sizes (default 1)")
+    parser.add_argument(
+        "-t", "--threads", nargs="+", type=int, default=None, help="Intra-op thread counts (default 1 and all CPUs)"
+    )
+    parser.add_argument(
+        "--mode", nargs="+", choices=EXECUTION_MODES, default=["sequential"], help="Execution modes (default sequential)"
+    )
+    parser.add_argument(
+        "--optimization", choices=OPTIMIZATION_LEVELS, default="all", help="Graph optimization level (default all)"
+    )
+    parser.add_argument("-s", "--size", nargs="+", type=int, default=None, help="Input size for models without a fixed one")
+    parser.add_argument("--warmup", type=int, default=5, help="Warm-up runs after the first one (default 5)")
+    parser.add_argument("--runs", type=int, default=50, help="Timed runs (default 50)")
+    parser.add_argument("--min-time", type=float, default=0.0, help="Keep timing runs for at least these seconds")
+    parser.add_argument("--timeout", type=float, default=None, help="Time limit per configuration in seconds")
+    parser.add_argument("--json", type=str, default=None, help="Write the results to this file instead of stdout")
+    args = parser.parse_args(argv)
+    for model in args.models:
+        if not os.path.isfile(model):
+            raise RuntimeError(f"Invalid model file path: {model}")
+    if args.size and len(args.size) == 1:
+        args.size = args.size * 2
+    if args.threads is None:
+        args.threads = sorted({1, os.cpu_count() or 1})
+    if min(args.batch) < 1 or min(args.threads) < 1:
+        raise RuntimeError("Batch-sizes and thread counts must be at least 1")
+    if args.runs < 1:
+        raise RuntimeError("--runs must be at least 1")
+    return args
+
+
+def main(argv=None):
+    """
+    Returns:
+        dict: Host information, settings and one result per configuration
+    """
+    args = parse_args(argv)
+    configs = configurations(args)
+    results = []
+    for i, (config, reason) in enumerate(configs):
+        name = (f"{os.path.basename(config['model'])} batch {config['batch']} threads {config['threads']} "
+                f"{config['mode']}")
+        if reason:
+            result = {"status": "skipped", "error": reason}
+        else:
+            print(f"[{i + 1}/{len(configs)}] {name}", file=sys.stderr, flush=True)
+            result = run_isolated(config, args.timeout)
+        results.append({**{key: config[key] for key in ("model", "batch", "threads", "mode")}, **result})
+
+    report = {
+        "host": host_info(),
+        "settings": {
+            "optimization": args.optimization,
+            "size": args.size,
+            "warmup": args.warmup,
+            "runs": args.runs,
+            "min_time": args.min_time,
+        },
+        "results": results,
+    }
+    print_ranking(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nDone: {args.json}\n", file=sys.stderr)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return report
@@ -0,0 +1,349 @@
+"""
+Content-addressed cache of exported models
+
+An export is keyed by the SHA-256 of the weights, the family, every
+conversion option (files given as options, like -c configs, by their
+content and the content of every base config they include), the exporter
+code and the installed framework versions. A hit
+copies the cached .onnx and labels.txt into place without loading the
+model. Entries live in <cache dir>/<key>/ and manifest.json records them;
+the least recently used ones are removed once the cache is over its size.
+
+Model code from a git clone (yolov5, YOLOv6, ...) is keyed by the checked
+out commit only; use --no-cache when exporting with local changes to it.
+"""
+
+import os
+import ast
+import sys
+import json
+import time
+import shutil
+import fcntl
+import hashlib
+import contextlib
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "deepstream_yolo", "exports")
+CACHE_SIZE_GB = 10.0
+MANIFEST_VERSION = 1
+
+# Options that do not change the exported model
+IGNORED_OPTIONS = ("weights", "output", "labels", "no_cache", "cache_dir", "cache_size")
+
+# Distributions whose version goes into the key, per plugin FRAMEWORK
+FRAMEWORK_PACKAGES = {
+    "torch": ["torch", "onnx", "onnxslim"],
+    "paddle": ["paddlepaddle", "paddle2onnx", "onnx", "onnxslim"],
+}
+
+_code_version = None
+
+
+def add_arguments(parser):
+    parser.add_argument("--no-cache", action="store_true", help="Always export, don't use the export cache")
+    parser.add_argument("--cache-dir", type=str, default=CACHE_DIR, help=f"Export cache folder (default {CACHE_DIR})")
+    parser.add_argument(
+        "--cache-size", type=float, default=CACHE_SIZE_GB, help=f"Export cache size limit in GB (default {CACHE_SIZE_GB})"
+    )
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def code_version():
+    """SHA-256 of the exporters package sources, so editing a plugin or head invalidates its entries"""
+    global _code_version
+    if _code_version is None:
+        h = hashlib.sha256()
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        for name in sorted(os.listdir(package_dir)):
+            if name.endswith(".py"):
+                h.update(name.encode())
+                with open(os.path.join(package_dir, name), "rb") as f:
+                    h.update(f.read())
+        _code_version = h.hexdigest()
+    return _code_version
+
+
+def repository_version(path):
+    """Commit checked out in the model repository at `path` (read from .git, no git call), None if not a clone"""
+    git_dir = os.path.join(path, ".git")
+    try:
+        with open(os.path.join(git_dir, "HEAD"), encoding="utf-8") as f:
+            head = f.read().strip()
+        if not head.startswith("ref: "):
+            return head
+        ref = head[5:]
+        if os.path.isfile(os.path.join(git_dir, ref)):
+            with open(os.path.join(git_dir, ref), encoding="utf-8") as f:
+                return f.read().strip()
+        with open(os.path.join(git_dir, "packed-refs"), encoding="utf-8") as f:
+            for line in f:
+                if line.rstrip().endswith(" " + ref):
+                    return line.split()[0]
+    except OSError:
+        pass
+    return None
+
+
+def _python_bases(path):
+    """_base_ files of an mmdet / mmengine config, and relative imports under read_base()"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    bases = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "_base_" for t in node.targets):
+            try:
+                value = ast.literal_eval(node.value)
+            except ValueError:
+                continue
+            bases += [value] if isinstance(value, str) else list(value)
+        elif isinstance(node, ast.With) and any(
+                getattr(item.context_expr.func, "id", None) == "read_base"
+                for item in node.items if isinstance(item.context_expr, ast.Call)):
+            for imported in node.body:
+                if isinstance(imported, ast.ImportFrom) and imported.level:
+                    module = os.path.join(*(([".."] * (imported.level - 1)) + (imported.module or "").split(".")))
+                    bases.append(module + ".py")
+    return bases
+
+
+def _yaml_bases(path):
+    """_BASE_ (PaddleDetection) and __include__ (RT-DETR / D-FINE) files of a yaml config"""
+    import yaml
+    with open(path, encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    if not isinstance(config, dict):
+        return []
+    bases = []
+    for key in ("_BASE_", "__include__"):
+        value = config.get(key) or []
+        bases += [value] if isinstance(value, str) else list(value)
+    return bases
+
+
+def config_files(path):
+    """
+    A config file and every base config it includes, recursively
+
+    Bases in an installed package ("mmdet::...") are left out, they are
+    covered by the package version.
+
+    Returns:
+        list: Absolute paths, the config first
+    """
+    files = []
+    pending = [os.path.abspath(path)]
+    while pending:
+        current = pending.pop(0)
+        if current in files or not os.path.isfile(current):
+            continue
+        files.append(current)
+        try:
+            if current.endswith(".py"):
+                bases = _python_bases(current)
+            elif current.endswith((".yml", ".yaml")):
+                bases = _yaml_bases(current)
+            else:
+                bases = []
+        except Exception:  # Not a parseable config, its own content still counts
+            bases = []
+        for base in bases:
+            if isinstance(base, str) and "::" not in base:
+                pending.append(os.path.normpath(os.path.join(os.path.dirname(current), os.path.expanduser(base))))
+    return files
+
+
+def package_versions(names):
+    from importlib import metadata
+    versions = {}
+    for name in names:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+class ExportCache:
+    """
+    Export cache in `directory`, limited to `max_bytes`
+
+    Example:
+        cache = ExportCache(args.cache_dir, int(args.cache_size * 1e9))
+        description = cache.describe(args, plugin)
+        key = cache.key(description)
+        if not cache.restore(key, onnx_file):
+            onnx_file, labels_file = export(...)
+            cache.store(key, onnx_file, labels_file, description)
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=int(CACHE_SIZE_GB * 1e9)):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.manifest_file = os.path.join(directory, "manifest.json")
+        os.makedirs(directory, exist_ok=True)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Exclusive lock on the manifest, exports may run in parallel processes"""
+        with open(os.path.join(self.directory, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _load(self):
+        try:
+            with open(self.manifest_file, encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") == MANIFEST_VERSION:
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {"version": MANIFEST_VERSION, "entries": {}, "hashes": {}}
+
+    def _save(self, manifest):
+        tmp = f"{self.manifest_file}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.manifest_file)
+
+    def weights_hash(self, path):
+        """
+        SHA-256 of a file, reused from the manifest while its size and mtime are unchanged
+
+        Hashing a large checkpoint takes longer than the rest of a cache hit.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._locked():
+            known = self._load()["hashes"].get(path)
+        if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+            return known["sha256"]
+        digest = file_sha256(path)
+        with self._locked():
+            manifest = self._load()
+            manifest["hashes"][path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+            self._save(manifest)
+        return digest
+
+    def describe(self, args, plugin):
+        """Everything the exported model depends on, stored with its entry"""
+        options = {}
+        for name, value in sorted(vars(args).items()):
+            if name in IGNORED_OPTIONS:
+                continue
+            if isinstance(value, str) and os.path.isfile(value):
+                files = config_files(value)
+                value = {"file_sha256": self.weights_hash(value)}
+                if len(files) > 1:
+                    value["bases_sha256"] = {
+                        os.path.relpath(path, os.path.dirname(files[0])): self.weights_hash(path) for path in files[1:]
+                    }
+            options[name] = value
+        framework = getattr(plugin, "FRAMEWORK", "torch")
+        return {
+            "weights_sha256": self.weights_hash(args.weights),
+            "options": options,
+            "code": code_version(),
+            "packages": package_versions(FRAMEWORK_PACKAGES[framework] + getattr(plugin, "PACKAGES", [])),
+            "repository": repository_version(os.getcwd()),
+            "python": sys.version.split()[0],
+        }
+
+    @staticmethod
+    def key(description):
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+    def restore(self, key, onnx_output_file, labels_file="labels.txt"):
+        """
+        Copy a cached export to `onnx_output_file` (and its labels to `labels_file`)
+
+        Returns:
+            dict: Manifest entry on a hit, None on a miss
+        """
+        with self._locked():
+            manifest = self._load()
+            entry = manifest["entries"].get(key)
+            if entry is None:
+                return None
+            entry_dir = os.path.join(self.directory, key)
+            if not os.path.isfile(os.path.join(entry_dir, "model.onnx")):  # Removed by hand
+                del manifest["entries"][key]
+                self._save(manifest)
+                return None
+            entry["last_used"] = time.time()
+            entry["hits"] = entry.get("hits", 0) + 1
+            self._save(manifest)
+
+            # Copies rather than links: a later export writes over the output file in place
+            shutil.copyfile(os.path.join(entry_dir, "model.onnx"), onnx_output_file)
+            if entry["labels"]:
+                shutil.copyfile(os.path.join(entry_dir, "labels.txt"), labels_file)
+        return entry
+
+    def store(self, key, onnx_output_file, labels_file=None, info=None):
+        """Add an export; evicts least recently used entries over the size limit"""
+        size = os.path.getsize(onnx_output_file) + (os.path.getsize(labels_file) if labels_file else 0)
+        if size > self.max_bytes:
+            print(f"Not cached: {size / 1e6:.1f} MB is over the cache size limit")
+            return False
+
+        # Filled outside the lock under a private name, then renamed into place
+        entry_dir = os.path.join(self.directory, key)
+        tmp_dir = f"{entry_dir}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        shutil.copyfile(onnx_output_file, os.path.join(tmp_dir, "model.onnx"))
+        if labels_file:
+            shutil.copyfile(labels_file, os.path.join(tmp_dir, "labels.txt"))
+
+        with self._locked():
+            manifest = self._load()
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.rename(tmp_dir, entry_dir)
+            now = time.time()
+            manifest["entries"][key] = {
+                "onnx": os.path.basename(onnx_output_file),
+                "labels": bool(labels_file),
+                "size": size,
+                "created": now,
+                "last_used": now,
+                "hits": 0,
+                "info": info,
+            }
+            self._evict(manifest, keep=key)
+            self._save(manifest)
+        return True
+
+    def _evict(self, manifest, keep=None):
+        entries = manifest["entries"]
+        total = sum(entry["size"] for entry in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= entries[key]["size"]
+            shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+            del entries[key]
+            print(f"Removed least recently used cache entry {key[:12]}")
+        for path in [p for p in manifest["hashes"] if not os.path.exists(p)]:
+            del manifest["hashes"][path]
+
+    def stats(self):
+        with self._locked():
+            entries = self._load()["entries"]
+        return {
+            "entries": len(entries),
+            "bytes": sum(entry["size"] for entry in entries.values()),
+            "max_bytes": self.max_bytes,
+            "hits": sum(entry.get("hits", 0) for entry in entries.values()),
+        }
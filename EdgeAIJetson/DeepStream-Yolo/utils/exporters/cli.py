@@ -0,0 +1,99 @@
+"""
+Command line of export.py and the export_*.py scripts
+
+The family is parsed first, then only its plugin module is imported to add
+its arguments; the framework is imported when the export starts.
+"""
+
+import os
+import sys
+import argparse
+
+from exporters import FAMILIES, load_plugin, common, cache
+
+
+def list_families():
+    width = max(len(family) for family in FAMILIES)
+    for family, (module, name) in FAMILIES.items():
+        print(f"{family:<{width}}  {name:<20}  {module}")
+
+
+def parse_args(argv=None, family=None):
+    """
+    Args:
+        argv: Command line arguments, sys.argv[1:] by default
+        family: Fixed model family (export_*.py scripts), otherwise the first argument
+
+    Returns:
+        tuple: (args, plugin module), args is None after --list
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+
+    if family is None:
+        families = "\n".join(f"  {f:<20}{name}" for f, (module, name) in FAMILIES.items())
+        parser = argparse.ArgumentParser(
+            description="DeepStream model conversion",
+            usage="%(prog)s [-h] [--list] family -w WEIGHTS [family options]",
+            epilog=f"families:\n{families}\n\nUse '%(prog)s family -h' for the options of a family",
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+            add_help=False
+        )
+        parser.add_argument("family", nargs="?", help="Model family")
+        parser.add_argument("--list", action="store_true", help="List the model families")
+        parser.add_argument("-h", "--help", action="store_true", help="Show this help message and exit")
+        known, rest = parser.parse_known_args(argv)
+        if known.list:
+            list_families()
+            return None, None
+        if known.family is None:
+            parser.print_help()
+            parser.exit(0 if known.help else 2)
+        if known.family not in FAMILIES:
+            parser.error(f"unknown family '{known.family}' (choose from {', '.join(FAMILIES)})")
+        family = known.family
+        argv = rest + (["-h"] if known.help else [])
+        prog = f"{os.path.basename(sys.argv[0])} {family}"
+    else:
+        prog = None
+
+    plugin = load_plugin(family)
+    parser = argparse.ArgumentParser(prog=prog, description=f"DeepStream {FAMILIES[family][1]} conversion")
+    common.add_arguments(parser, plugin)
+    cache.add_arguments(parser)
+    args = parser.parse_args(argv)
+    args.family = family
+    common.check_args(args, plugin)
+    return args, plugin
+
+
+def main(argv=None, family=None):
+    """
+    Returns:
+        str: ONNX file path, None after --list
+    """
+    # Model code is imported from the framework repository the command runs in
+    if os.getcwd() not in sys.path:
+        sys.path.insert(1, os.getcwd())
+
+    args, plugin = parse_args(argv, family)
+    if args is None:
+        return None
+    name = FAMILIES[args.family][1]
+    if args.no_cache:
+        return common.export(name, plugin, args)[0]
+
+    export_cache = cache.ExportCache(args.cache_dir, int(args.cache_size * 1e9))
+    description = export_cache.describe(args, plugin)
+    key = export_cache.key(description)
+    onnx_output_file = common.onnx_file(args, plugin)
+    entry = export_cache.restore(key, onnx_output_file, args.labels)
+    if entry:
+        print(f"\nCached: {args.weights} ({name} export {key[:12]})")
+        if entry["labels"]:
+            print(f"Creating {args.labels} file")
+        print(f"Done: {onnx_output_file}\n")
+        return onnx_output_file
+
+    onnx_output_file, labels_file = common.export(name, plugin, args)
+    export_cache.store(key, onnx_output_file, labels_file, description)
+    return onnx_output_file
@@ -0,0 +1,70 @@
+"""
+CO-DETR (Sense-X/Co-DETR in open-mmlab/mmdetection projects)
+"""
+
+import types
+
+from exporters import common
+
+WEIGHTS = ".pth"
+PACKAGES = ["mmdet", "mmengine", "mmdeploy"]
+
+
+def add_arguments(parser):
+    parser.add_argument("-c", "--config", required=True, type=str, help="Input config (.py) file path (required)")
+
+
+check_args = common.check_config
+
+
+def forward_deepstream(self, batch_inputs, batch_data_samples):
+    b, _, h, w = batch_inputs.shape
+    batch_data_samples = [{"batch_input_shape": (h, w), "img_shape": (h, w)} for _ in range(b)]
+    img_feats = self.extract_feat(batch_inputs)
+    return self.predict_query_head(img_feats, batch_data_samples, rescale=False)
+
+
+def query_head_predict_deepstream(self, feats, batch_data_samples, rescale=False):
+    import torch
+    with torch.no_grad():
+        outs = self.forward(feats, batch_data_samples)
+        predictions = self.predict_by_feat(*outs, batch_img_metas=batch_data_samples, rescale=rescale)
+    return predictions
+
+
+def load(args, device):
+    import torch.nn as nn
+    from copy import deepcopy
+    import projects  # noqa: F401 - imported only to register the Co-DETR modules with mmdet
+    from mmengine.registry import MODELS
+    from mmdeploy.utils import load_config
+    from mmdet.utils import register_all_modules
+    from mmengine.model import revert_sync_batchnorm
+    from mmengine.runner.checkpoint import load_checkpoint
+    from exporters.heads import InstanceDataOutput
+
+    register_all_modules()
+    model_cfg = load_config(args.config)[0]
+    model = deepcopy(model_cfg.model)
+    model.pop("pretrained", None)
+    for key in model["train_cfg"]:
+        if "rpn_proposal" in key:
+            key["rpn_proposal"] = {}
+    model["test_cfg"] = [{}, {"rpn": {}, "rcnn": {}}, {}]
+    preprocess_cfg = deepcopy(model_cfg.get("preprocess_cfg", {}))
+    preprocess_cfg.update(deepcopy(model_cfg.get("data_preprocessor", {})))
+    model.setdefault("data_preprocessor", preprocess_cfg)
+    model = MODELS.build(model)
+    load_checkpoint(model, args.weights, map_location=device)
+    model = revert_sync_batchnorm(model)
+    if hasattr(model, "backbone") and hasattr(model.backbone, "switch_to_deploy"):
+        model.backbone.switch_to_deploy()
+    if hasattr(model, "switch_to_deploy") and callable(model.switch_to_deploy):
+        model.switch_to_deploy()
+    model = model.to(device)
+    model.eval()
+    del model.data_preprocessor
+    model._forward = types.MethodType(forward_deepstream, model)
+    model.query_head.predict = types.MethodType(query_head_predict_deepstream, model.query_head)
+
+    return nn.Sequential(model, InstanceDataOutput()), common.image_size(args), []
@@ -0,0 +1,191 @@
+"""
+Steps shared by every model family: arguments, labels and ONNX export
+
+Framework imports (torch, onnx, paddle) stay inside the functions that need
+them, so the CLI can build its help without loading any of them.
+"""
+
+import os
+
+DYNAMIC_AXES = {
+    "input": {
+        0: "batch"
+    },
+    "output": {
+        0: "batch"
+    }
+}
+
+
+def add_arguments(parser, plugin):
+    """Common conversion arguments, with the family specific ones after --weights"""
+    weights = getattr(plugin, "WEIGHTS", ".pt")
+    size = getattr(plugin, "SIZE", [640])
+    parser.add_argument(
+        "-w", "--weights", required=True, type=str, help=f"Input weights ({weights}) file path (required)"
+    )
+    if hasattr(plugin, "add_arguments"):
+        plugin.add_arguments(parser)
+    if size is not None:
+        parser.add_argument(
+            "-s", "--size", nargs="+", type=int, default=size, help=f"Inference size [H,W] (default {size})"
+        )
+    if getattr(plugin, "P6", False):
+        parser.add_argument("--p6", action="store_true", help="P6 model")
+    parser.add_argument("--opset", type=int, default=17, help="ONNX opset version")
+    parser.add_argument("--simplify", action="store_true", help="ONNX simplify model")
+    parser.add_argument("--dynamic", action="store_true", help="Dynamic batch-size")
+    parser.add_argument("--batch", type=int, default=1, help="Static batch-size")
+    parser.add_argument("--output", type=str, default=None, help="Output ONNX file path (default: next to the weights)")
+    parser.add_argument("--labels", type=str, default="labels.txt", help="Output labels file path (default labels.txt)")
+
+
+def check_args(args, plugin):
+    if not os.path.isfile(args.weights):
+        raise RuntimeError("Invalid weights file")
+    if hasattr(plugin, "check_args"):
+        plugin.check_args(args)
+    if args.dynamic and args.batch > 1:
+        raise RuntimeError("Cannot set dynamic batch-size and static batch-size at same time")
+
+
+def check_config(args):
+    """check_args() for the families that take a -c/--config file"""
+    if not os.path.isfile(args.config):
+        raise RuntimeError("Invalid config file")
+
+
+def image_size(args):
+    img_size = args.size * 2 if len(args.size) == 1 else args.size
+    if img_size == [640, 640] and getattr(args, "p6", False):
+        img_size = [1280] * 2
+    return img_size
+
+
+def class_names(model):
+    """Labels from a model `names` attribute (dict or list); empty if it has none"""
+    names = getattr(model, "names", None)
+    if not names:
+        return []
+    return list(names.values()) if isinstance(names, dict) else list(names)
+
+
+def write_labels(labels, path="labels.txt"):
+    """Returns the path written, None for a model without labels"""
+    if not labels:
+        return None
+    print(f"Creating {path} file")
+    with open(path, "w", encoding="utf-8") as f:
+        for name in labels:
+            f.write(f"{name}\n")
+    return path
+
+
+def onnx_file(args, plugin):
+    """Output path of the export: --output or the weights path with .onnx (paddle appends it)"""
+    if args.output:
+        return args.output if args.output.endswith(".onnx") else f"{args.output}.onnx"
+    if getattr(plugin, "FRAMEWORK", "torch") == "paddle":
+        return f"{args.weights}.onnx"
+    return args.weights.rsplit(".", 1)[0] + ".onnx"
+
+
+def suppress_warnings():
+    import warnings
+    import torch
+    warnings.filterwarnings("ignore", category=torch.jit.TracerWarning)
+    warnings.filterwarnings("ignore", category=UserWarning)
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+    warnings.filterwarnings("ignore", category=FutureWarning)
+    warnings.filterwarnings("ignore", category=ResourceWarning)
+
+
+def simplify(onnx_output_file):
+    print("Simplifying the ONNX model")
+    import onnx
+    import onnxslim
+    model_onnx = onnx.load(onnx_output_file)
+    model_onnx = onnxslim.slim(model_onnx)
+    onnx.save(model_onnx, onnx_output_file)
+
+
+def export_torch(name, plugin, args):
+    import torch
+
+    suppress_warnings()
+
+    print(f"\nStarting: {args.weights}")
+
+    print(f"Opening {name} model")
+
+    device = torch.device("cpu")
+    model, img_size, labels = plugin.load(args, device)
+
+    labels_file = write_labels(labels, args.labels)
+
+    onnx_input_im = torch.zeros(args.batch, 3, *img_size).to(device)
+    onnx_output_file = onnx_file(args, plugin)
+
+    print("Exporting the model to ONNX")
+    torch.onnx.export(
+        model,
+        onnx_input_im,
+        onnx_output_file,
+        verbose=False,
+        opset_version=args.opset,
+        do_constant_folding=True,
+        input_names=["input"],
+        output_names=["output"],
+        dynamic_axes=DYNAMIC_AXES if args.dynamic else None
+    )
+
+    if args.simplify:
+        if getattr(plugin, "SIMPLIFY", True):
+            simplify(onnx_output_file)
+        else:
+            print("Simplifying is not available for this model")
+
+    print(f"Done: {onnx_output_file}\n")
+    return onnx_output_file, labels_file
+
+
+def export_paddle(name, plugin, args):
+    import warnings
+    import paddle
+
+    warnings.filterwarnings("ignore")
+
+    print(f"\nStarting: {args.weights}")
+
+    print(f"Opening {name} model")
+
+    paddle.set_device("cpu")
+    model, img_size, labels = plugin.load(args, None)
+
+    labels_file = write_labels(labels, args.labels)
+
+    batch = None if args.dynamic else args.batch
+    onnx_input_im = {}
+    onnx_input_im["image"] = paddle.static.InputSpec(shape=[batch, 3, *img_size], dtype="float32")
+    onnx_output_file = onnx_file(args, plugin)
+
+    print("Exporting the model to ONNX")
+    paddle.onnx.export(model, onnx_output_file[:-5], input_spec=[onnx_input_im], opset_version=args.opset)
+
+    if args.simplify:
+        simplify(onnx_output_file)
+
+    print(f"Done: {onnx_output_file}\n")
+    return onnx_output_file, labels_file
+
+
+def export(name, plugin, args):
+    """
+    Load the model with its plugin, write labels.txt and export the ONNX file
+
+    Returns:
+        tuple: (ONNX file path, labels file path or None)
+    """
+    if getattr(plugin, "FRAMEWORK", "torch") == "paddle":
+        return export_paddle(name, plugin, args)
+    return export_torch(name, plugin, args)
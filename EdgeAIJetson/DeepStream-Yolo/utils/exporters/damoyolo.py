@@ -0,0 +1,41 @@
+"""
+DAMO-YOLO (tinyvision/DAMO-YOLO repository)
+"""
+
+from exporters import common
+
+WEIGHTS = ".pth"
+
+
+def add_arguments(parser):
+    parser.add_argument("-c", "--config", required=True, type=str, help="Input config (.py) file path (required)")
+
+
+check_args = common.check_config
+
+
+def load(args, device):
+    import torch
+    import torch.nn as nn
+    from damo.config.base import parse_config
+    from damo.utils.model_utils import replace_module
+    from damo.base_models.core.ops import RepConv, SiLU
+    from damo.detectors.detector import build_local_model
+    from exporters.heads import BoxesScoresOutput
+
+    config = parse_config(args.config)
+    config.model.head.export_with_post = True
+    model = build_local_model(config, device)
+    ckpt = torch.load(args.weights, map_location=device, weights_only=False)
+    model.eval()
+    if "model" in ckpt:
+        ckpt = ckpt["model"]
+    model.load_state_dict(ckpt, strict=True)
+    model = replace_module(model, nn.SiLU, SiLU)
+    for layer in model.modules():
+        if isinstance(layer, RepConv):
+            layer.switch_to_deploy()
+    model.head.nms = False
+
+    labels = list(config.dataset["class_names"])
+    return nn.Sequential(model, BoxesScoresOutput(boxes_index=1, scores_index=0)), common.image_size(args), labels
@@ -0,0 +1,40 @@
+"""
+Gold-YOLO (huawei-noah/Efficient-Computing repository, built on YOLOv6)
+"""
+
+from exporters import common
+from exporters.yolov6 import _dist2bbox
+
+
+def load(args, device, fuse=True):
+    import torch
+    import torch.nn as nn
+    from yolov6.utils.torch_utils import fuse_model
+    from yolov6.models.effidehead import Detect
+    from yolov6.layers.common import RepVGGBlock, Conv, SiLU
+    from gold_yolo.switch_tool import switch_to_deploy
+    import yolov6.utils.general as _m
+    from exporters.heads import ObjectnessOutput
+
+    _m.dist2bbox.__code__ = _dist2bbox.__code__
+
+    ckpt = torch.load(args.weights, map_location="cpu", weights_only=False)
+    model = ckpt["ema" if ckpt.get("ema") else "model"].float()
+    if fuse:
+        model = fuse_model(model).eval()
+    else:
+        model = model.eval()
+    model = switch_to_deploy(model)
+    for layer in model.modules():
+        if isinstance(layer, RepVGGBlock):
+            layer.switch_to_deploy()
+    model.eval()
+    model = model.to(device)
+    for k, m in model.named_modules():
+        if isinstance(m, Conv):
+            if hasattr(m, "act") and isinstance(m.act, nn.SiLU):
+                m.act = SiLU()
+        elif isinstance(m, Detect):
+            m.inplace = False
+
+    return nn.Sequential(model, ObjectnessOutput(xywh=False)), common.image_size(args), []
@@ -0,0 +1,127 @@
+"""
+DeepStream output heads for the PyTorch families
+
+Every head turns the raw model output into one [batch, boxes, 6] tensor of
+x1, y1, x2, y2, score, label that the nvdsinfer_custom_impl_Yolo parsers read.
+"""
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+XYWH_TO_XYXY = [[1, 0, 1, 0], [0, 1, 0, 1], [-0.5, 0, 0.5, 0], [0, -0.5, 0, 0.5]]
+
+
+def xywh_to_xyxy(boxes):
+    convert_matrix = torch.tensor(XYWH_TO_XYXY, dtype=boxes.dtype, device=boxes.device)
+    return boxes @ convert_matrix
+
+
+def detections(boxes, scores):
+    scores, labels = torch.max(scores, dim=-1, keepdim=True)
+    return torch.cat([boxes, scores, labels.to(boxes.dtype)], dim=-1)
+
+
+class TransposedOutput(nn.Module):
+    """
+    [batch, 4 + classes, anchors] xyxy boxes and class scores (YOLOv5u, YOLOv7-u6, YOLOv8 and later)
+
+    index selects one output of a multi-output head, e.g. 1 for the YOLOv9 dual heads.
+    """
+
+    def __init__(self, index=None):
+        super().__init__()
+        self.index = index
+
+    def forward(self, x):
+        if self.index is not None:
+            x = x[self.index]
+        x = x.transpose(1, 2)
+        return detections(x[:, :, :4], x[:, :, 4:])
+
+
+class ObjectnessOutput(nn.Module):
+    """
+    [batch, anchors, 4 + 1 + classes] boxes, objectness and class scores (YOLOv5, YOLOv6, YOLOv7, YOLOR and YOLOX)
+
+    xywh converts center / size boxes to corners; index selects one output of a tuple.
+    """
+
+    def __init__(self, xywh=True, index=None):
+        super().__init__()
+        self.xywh = xywh
+        self.index = index
+
+    def forward(self, x):
+        if self.index is not None:
+            x = x[self.index]
+        boxes = x[:, :, :4]
+        if self.xywh:
+            boxes = xywh_to_xyxy(boxes)
+        objectness = x[:, :, 4:5]
+        scores, labels = torch.max(x[:, :, 5:], dim=-1, keepdim=True)
+        scores *= objectness
+        return torch.cat([boxes, scores, labels.to(boxes.dtype)], dim=-1)
+
+
+class BoxesScoresOutput(nn.Module):
+    """Separate xyxy boxes and class scores outputs (YOLO-NAS, RTMDet and DAMO-YOLO)"""
+
+    def __init__(self, boxes_index=0, scores_index=1):
+        super().__init__()
+        self.boxes_index = boxes_index
+        self.scores_index = scores_index
+
+    def forward(self, x):
+        return detections(x[self.boxes_index], x[self.scores_index])
+
+
+class NormalizedOutput(nn.Module):
+    """
+    DETR style normalized cxcywh boxes scaled to the input size (RT-DETR, D-FINE and RF-DETR)
+
+    The model output is a [batch, queries, 4 + classes] tensor, a (boxes, logits)
+    tuple or a pred_boxes / pred_logits dict. activation is None for scores,
+    "sigmoid" for focal loss logits or "softmax" for logits with a trailing
+    no-object class.
+    """
+
+    def __init__(self, img_size, activation=None):
+        super().__init__()
+        self.img_size = img_size
+        self.activation = activation
+
+    def forward(self, x):
+        if isinstance(x, dict):
+            boxes, scores = x["pred_boxes"], x["pred_logits"]
+        elif isinstance(x, (list, tuple)):
+            boxes, scores = x[0], x[1]
+        else:
+            boxes, scores = x[:, :, :4], x[:, :, 4:]
+        boxes = xywh_to_xyxy(boxes)
+        boxes *= torch.as_tensor([[*self.img_size]]).flip(1).tile([1, 2]).unsqueeze(1)
+        if self.activation == "sigmoid":
+            scores = F.sigmoid(scores)
+        elif self.activation == "softmax":
+            scores = F.softmax(scores, dim=-1)[:, :, :-1]
+        return detections(boxes, scores)
+
+
+class InstanceDataOutput(nn.Module):
+    """Per image mmdet InstanceData predictions with bboxes, scores and labels (CO-DETR)"""
+
+    def __init__(self):
+        super().__init__()
+
+    def forward(self, x):
+        boxes = []
+        scores = []
+        labels = []
+        for det in x:
+            boxes.append(det.bboxes)
+            scores.append(det.scores.unsqueeze(-1))
+            labels.append(det.labels.unsqueeze(-1))
+        boxes = torch.stack(boxes, dim=0)
+        scores = torch.stack(scores, dim=0)
+        labels = torch.stack(labels, dim=0)
+        return torch.cat([boxes, scores, labels.to(boxes.dtype)], dim=-1)
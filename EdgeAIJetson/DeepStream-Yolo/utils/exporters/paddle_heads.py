@@ -0,0 +1,55 @@
+"""
+DeepStream input / output layers for the PaddleDetection families
+"""
+
+import paddle
+import paddle.nn as nn
+import paddle.nn.functional as F
+
+
+class DeepStreamOutput(nn.Layer):
+    """PPYOLOE bbox / class scores output without NMS"""
+
+    def __init__(self):
+        super().__init__()
+
+    def forward(self, x):
+        boxes = x["bbox"]
+        x["bbox_num"] = x["bbox_num"].transpose([0, 2, 1])
+        scores = paddle.max(x["bbox_num"], axis=-1, keepdim=True)
+        labels = paddle.argmax(x["bbox_num"], axis=-1, keepdim=True)
+        return paddle.concat((boxes, scores, paddle.cast(labels, dtype=boxes.dtype)), axis=-1)
+
+
+class DeepStreamOutputNormalized(nn.Layer):
+    """RT-DETR normalized cxcywh boxes and logits without post-processing"""
+
+    def __init__(self, img_size, use_focal_loss):
+        super().__init__()
+        self.img_size = img_size
+        self.use_focal_loss = use_focal_loss
+
+    def forward(self, x):
+        boxes = x["bbox"]
+        convert_matrix = paddle.to_tensor(
+            [[1, 0, 1, 0], [0, 1, 0, 1], [-0.5, 0, 0.5, 0], [0, -0.5, 0, 0.5]], dtype=boxes.dtype
+        )
+        boxes @= convert_matrix
+        boxes *= paddle.to_tensor([[*self.img_size]]).flip(1).tile([1, 2]).unsqueeze(1)
+        bbox_num = F.sigmoid(x["bbox_num"]) if self.use_focal_loss else F.softmax(x["bbox_num"])[:, :, :-1]
+        scores = paddle.max(bbox_num, axis=-1, keepdim=True)
+        labels = paddle.argmax(bbox_num, axis=-1, keepdim=True)
+        return paddle.concat((boxes, scores, paddle.cast(labels, dtype=boxes.dtype)), axis=-1)
+
+
+class DeepStreamInput(nn.Layer):
+    """Single image input, scale_factor fixed to 1"""
+
+    def __init__(self):
+        super().__init__()
+
+    def forward(self, x):
+        y = {}
+        y["image"] = x["image"]
+        y["scale_factor"] = paddle.to_tensor([1.0, 1.0], dtype=x["image"].dtype)
+        return y
@@ -0,0 +1,52 @@
+"""
+PaddleDetection config and trainer loading shared by PPYOLOE and RT-DETR Paddle
+"""
+
+import shutil
+import tempfile
+
+
+def add_arguments(parser):
+    """Arguments of ppdet.utils.cli.ArgsParser plus --slim_config"""
+    parser.add_argument("-c", "--config", required=True, type=str, help="Configuration file to use (required)")
+    parser.add_argument("-o", "--opt", nargs="*", help="Set configuration options")
+    parser.add_argument("--slim_config", default=None, type=str, help="Slim configuration file of slim method")
+
+
+def load_trainer(args, **opt):
+    """
+    Build the PaddleDetection trainer of args.config with the args.weights loaded
+
+    Args:
+        opt: Extra config options, merged like -o
+
+    Returns:
+        tuple: (config, static model)
+    """
+    from ppdet.engine import Trainer
+    from ppdet.utils.cli import ArgsParser
+    from ppdet.slim import build_slim_model
+    from ppdet.utils.check import check_version, check_config
+    from ppdet.core.workspace import load_config, merge_config
+
+    options = ArgsParser()._parse_opt(args.opt)
+    options["weights"] = args.weights
+    options.update(opt)
+
+    cfg = load_config(args.config)
+    merge_config(options)
+    if args.slim_config:
+        cfg = build_slim_model(cfg, args.slim_config, mode="test")
+    merge_config(options)
+    check_config(cfg)
+    check_version()
+    trainer = Trainer(cfg, mode="test")
+    trainer.load_weights(cfg.weights)
+    trainer.model.eval()
+    # Private folder instead of ./.tmp, so exports running in parallel don't remove each other's
+    tmp_dir = tempfile.mkdtemp(prefix="ppdet_export_")
+    try:
+        static_model, _ = trainer._get_infer_cfg_and_input_spec(tmp_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return trainer.cfg, static_model
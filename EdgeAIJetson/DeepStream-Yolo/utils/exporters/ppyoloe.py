@@ -0,0 +1,31 @@
+"""
+PP-YOLOE and PP-YOLOE+ (PaddlePaddle/PaddleDetection)
+"""
+
+import os
+
+from exporters import paddledet
+
+WEIGHTS = ".pdparams"
+SIZE = None  # From the config
+FRAMEWORK = "paddle"
+PACKAGES = ["paddledet"]
+
+add_arguments = paddledet.add_arguments
+
+
+def load(args, device):
+    import paddle.nn as nn
+    from ppdet.data.source.category import get_categories
+    from exporters.paddle_heads import DeepStreamInput, DeepStreamOutput
+
+    cfg, model = paddledet.load_trainer(args, exclude_nms=True)
+
+    labels = []
+    anno_file = cfg["TestDataset"].get_anno()
+    if os.path.isfile(anno_file):
+        _, catid2name = get_categories(cfg["metric"], anno_file, "detection_arch")
+        labels = list(catid2name.values())
+
+    img_size = [cfg.eval_height, cfg.eval_width]
+    return nn.Sequential(DeepStreamInput(), model, DeepStreamOutput()), img_size, labels
@@ -0,0 +1,134 @@
+"""
+RF-DETR (roboflow/rf-detr)
+"""
+
+from exporters import common
+
+MODELS = ["rfdetr-base", "rfdetr-large", "rfdetr-nano", "rfdetr-small", "rfdetr-medium"]
+SIZE = [560]
+PACKAGES = ["rfdetr"]
+
+
+def add_arguments(parser):
+    parser.add_argument("-m", "--model", required=True, type=str, help="Model name (required)")
+
+
+def check_args(args):
+    if args.model not in MODELS:
+        raise NotImplementedError("Model not supported")
+    if len(args.size) > 1 and args.size[0] != args.size[1]:
+        raise RuntimeError("RF-DETR model requires square resolution (width = height)")
+
+
+# The code of the next two functions is swapped into rfdetr's LayerNorm and MSDeformAttn in load(),
+# they run with the globals of those modules (torch, F, ms_deform_attn_core_pytorch)
+def LayerNorm_forward(self, x):
+    x = x.permute(0, 2, 3, 1)
+    x = F.layer_norm(x, (int(x.size(3)),), self.weight, self.bias, self.eps)
+    x = x.permute(0, 3, 1, 2)
+    return x
+
+
+def MSDeformAttn_forward(
+    self,
+    query,
+    reference_points,
+    input_flatten,
+    input_spatial_shapes,
+    input_level_start_index,
+    input_padding_mask=None
+):
+    class MultiscaleDeformableAttnPlugin(torch.autograd.Function):
+        @staticmethod
+        def forward(self, value, spatial_shapes, level_start_index, sampling_locations, attention_weights):
+            value = value.permute(0, 2, 3, 1)
+            N, Lq, M, L, P, n = sampling_locations.shape
+            attention_weights = attention_weights.view(N, Lq, M, L * P)
+            return ms_deform_attn_core_pytorch(value, spatial_shapes, sampling_locations, attention_weights)
+
+        @staticmethod
+        def symbolic(g, value, spatial_shapes, level_start_index, sampling_locations, attention_weights):
+            return g.op(
+                "TRT::MultiscaleDeformableAttnPlugin_TRT",
+                value,
+                spatial_shapes,
+                level_start_index,
+                sampling_locations,
+                attention_weights
+            )
+
+    N, Len_q, _ = query.shape
+    N, Len_in, _ = input_flatten.shape
+    assert (input_spatial_shapes[:, 0] * input_spatial_shapes[:, 1]).sum() == Len_in
+
+    value = self.value_proj(input_flatten)
+    if input_padding_mask is not None:
+        value = value.masked_fill(input_padding_mask[..., None], float(0))
+
+    sampling_offsets = self.sampling_offsets(query).view(N, Len_q, self.n_heads, self.n_levels, self.n_points, 2)
+    attention_weights = self.attention_weights(query).view(N, Len_q, self.n_heads, self.n_levels * self.n_points)
+
+    if reference_points.shape[-1] == 2:
+        offset_normalizer = torch.stack([input_spatial_shapes[..., 1], input_spatial_shapes[..., 0]], -1)
+        sampling_locations = reference_points[:, :, None, :, None, :] \
+                                + sampling_offsets / offset_normalizer[None, None, None, :, None, :]
+    elif reference_points.shape[-1] == 4:
+        sampling_locations = reference_points[:, :, None, :, None, :2] \
+                                + sampling_offsets / self.n_points * reference_points[:, :, None, :, None, 2:] * 0.5
+    else:
+        raise ValueError(f"Last dim of reference_points must be 2 or 4, but get {reference_points.shape[-1]} instead.")
+
+    attention_weights = F.softmax(attention_weights, -1)
+
+    value = value.transpose(1, 2).contiguous().view(N, self.n_heads, self.d_model // self.n_heads, Len_in)
+
+    value = value.permute(0, 3, 1, 2)
+
+    L, P = sampling_locations.shape[3:5]
+
+    attention_weights = attention_weights.view(N, Len_q, self.n_heads, L, P)
+
+    output = MultiscaleDeformableAttnPlugin.apply(
+        value, input_spatial_shapes, input_level_start_index, sampling_locations, attention_weights
+    )
+
+    output = output.view(N, Len_q, self.d_model)
+
+    output = self.output_proj(output)
+    return output
+
+
+def load(args, device):
+    import torch.nn as nn
+    from copy import deepcopy
+    from rfdetr import RFDETRBase, RFDETRLarge, RFDETRNano, RFDETRSmall, RFDETRMedium
+    import rfdetr.models.backbone.projector as _m1
+    import rfdetr.models.ops.modules.ms_deform_attn as _m2
+    from exporters.heads import NormalizedOutput
+
+    _m1.LayerNorm.forward.__code__ = LayerNorm_forward.__code__
+    _m2.MSDeformAttn.forward.__code__ = MSDeformAttn_forward.__code__
+
+    builders = {
+        "rfdetr-base": RFDETRBase,
+        "rfdetr-large": RFDETRLarge,
+        "rfdetr-nano": RFDETRNano,
+        "rfdetr-small": RFDETRSmall,
+        "rfdetr-medium": RFDETRMedium,
+    }
+    model = builders[args.model](pretrain_weights=args.weights, resolution=args.size[0], device=device.type)
+    nc = model.model_config.num_classes
+    class_names = model.class_names
+    model = deepcopy(model.model.model)
+    model.to(device)
+    model.eval()
+    if hasattr(model, "export"):
+        model.export()
+
+    # Class ids start at 1, 0 is background
+    labels = []
+    if len(class_names.keys()) > 0:
+        labels = ["background"] + [class_names.get(i, "empty") for i in range(1, nc + 1)]
+
+    img_size = common.image_size(args)
+    return nn.Sequential(model, NormalizedOutput(img_size, "sigmoid")), img_size, labels
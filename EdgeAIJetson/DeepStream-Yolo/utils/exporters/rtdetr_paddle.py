@@ -0,0 +1,22 @@
+"""
+RT-DETR Paddle (lyuwenyu/RT-DETR rtdetr_paddle)
+"""
+
+from exporters import paddledet
+
+WEIGHTS = ".pdparams"
+SIZE = None  # From the config
+FRAMEWORK = "paddle"
+PACKAGES = ["paddledet"]
+
+add_arguments = paddledet.add_arguments
+
+
+def load(args, device):
+    import paddle.nn as nn
+    from exporters.paddle_heads import DeepStreamOutputNormalized
+
+    cfg, model = paddledet.load_trainer(args, exclude_nms=True, exclude_post_process=True)
+
+    img_size = [cfg.eval_size[1], cfg.eval_size[0]]
+    return nn.Sequential(model, DeepStreamOutputNormalized(img_size, cfg.use_focal_loss)), img_size, []
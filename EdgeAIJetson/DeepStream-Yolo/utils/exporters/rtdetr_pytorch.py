@@ -0,0 +1,36 @@
+"""
+RT-DETR PyTorch (lyuwenyu/RT-DETR rtdetr_pytorch) and D-FINE (Peterande/D-FINE), both built on src.core
+"""
+
+from exporters import common
+
+WEIGHTS = ".pth"
+
+
+def add_arguments(parser):
+    parser.add_argument("-c", "--config", required=True, type=str, help="Input YAML (.yml) file path (required)")
+
+
+check_args = common.check_config
+
+
+def load(args, device):
+    import torch
+    import torch.nn as nn
+    from src.core import YAMLConfig
+    from exporters.heads import NormalizedOutput
+
+    cfg = YAMLConfig(args.config, resume=args.weights)
+    if "HGNetv2" in cfg.yaml_cfg:  # D-FINE backbone, weights come from the checkpoint
+        cfg.yaml_cfg["HGNetv2"]["pretrained"] = False
+    checkpoint = torch.load(args.weights, map_location="cpu", weights_only=False)
+    if "ema" in checkpoint:
+        state = checkpoint["ema"]["module"]
+    else:
+        state = checkpoint["model"]
+    cfg.model.load_state_dict(state)
+    model = cfg.model.deploy().to(device)
+
+    img_size = common.image_size(args)
+    activation = "sigmoid" if cfg.postprocessor.use_focal_loss else "softmax"
+    return nn.Sequential(model, NormalizedOutput(img_size, activation)), img_size, []
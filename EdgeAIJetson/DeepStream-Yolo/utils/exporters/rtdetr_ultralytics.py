@@ -0,0 +1,36 @@
+"""
+RT-DETR models trained with Ultralytics
+"""
+
+from exporters import common
+
+SIMPLIFY = False
+PACKAGES = ["ultralytics"]
+
+
+def load(args, device, fuse=True):
+    import torch.nn as nn
+    from copy import deepcopy
+    from ultralytics import RTDETR
+    from ultralytics.nn.modules import C2f, RTDETRDecoder
+    from exporters.heads import NormalizedOutput
+
+    model = RTDETR(args.weights)
+    model = deepcopy(model.model).to(device)
+    for p in model.parameters():
+        p.requires_grad = False
+    model.eval()
+    model.float()
+    if fuse:
+        model = model.fuse()
+    for k, m in model.named_modules():
+        if isinstance(m, RTDETRDecoder):
+            m.dynamic = False
+            m.export = True
+            m.format = "onnx"
+        elif isinstance(m, C2f):
+            m.forward = m.forward_split
+
+    labels = common.class_names(model)
+    img_size = common.image_size(args)
+    return nn.Sequential(model, NormalizedOutput(img_size)), img_size, labels
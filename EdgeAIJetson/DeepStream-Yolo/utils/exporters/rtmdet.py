@@ -0,0 +1,80 @@
+"""
+RTMDet (open-mmlab/mmyolo repository)
+"""
+
+import types
+
+from exporters import common
+
+PACKAGES = ["mmdet", "mmengine", "mmyolo"]
+
+
+def add_arguments(parser):
+    parser.add_argument("-c", "--config", required=True, type=str, help="Input config (.py) file path (required)")
+
+
+check_args = common.check_config
+
+
+def pred_by_feat_deepstream(self, cls_scores, bbox_preds, objectnesses=None, **kwargs):
+    import torch
+    from projects.easydeploy.bbox_code import rtmdet_bbox_decoder as bbox_decoder
+
+    assert len(cls_scores) == len(bbox_preds)
+    dtype = cls_scores[0].dtype
+    device = cls_scores[0].device
+
+    num_imgs = cls_scores[0].shape[0]
+    featmap_sizes = [cls_score.shape[2:] for cls_score in cls_scores]
+
+    mlvl_priors = self.prior_generate(featmap_sizes, dtype=dtype, device=device)
+
+    flatten_priors = torch.cat(mlvl_priors)
+
+    mlvl_strides = [
+        flatten_priors.new_full(
+            (featmap_size[0] * featmap_size[1] * self.num_base_priors,), stride
+        ) for featmap_size, stride in zip(
+            featmap_sizes, self.featmap_strides
+        )
+    ]
+    flatten_stride = torch.cat(mlvl_strides)
+
+    flatten_cls_scores = [
+        cls_score.permute(0, 2, 3, 1).reshape(num_imgs, -1, self.num_classes) for cls_score in cls_scores
+    ]
+    cls_scores = torch.cat(flatten_cls_scores, dim=1).sigmoid()
+
+    flatten_bbox_preds = [bbox_pred.permute(0, 2, 3, 1).reshape(num_imgs, -1, 4) for bbox_pred in bbox_preds]
+    flatten_bbox_preds = torch.cat(flatten_bbox_preds, dim=1)
+
+    if objectnesses is not None:
+        flatten_objectness = [objectness.permute(0, 2, 3, 1).reshape(num_imgs, -1) for objectness in objectnesses]
+        flatten_objectness = torch.cat(flatten_objectness, dim=1).sigmoid()
+        cls_scores = cls_scores * (flatten_objectness.unsqueeze(-1))
+
+    scores = cls_scores
+
+    bboxes = bbox_decoder(flatten_priors[None], flatten_bbox_preds, flatten_stride)
+
+    return bboxes, scores
+
+
+def load(args, device):
+    import torch.nn as nn
+    from mmdet.apis import init_detector
+    from projects.easydeploy.model import DeployModel, MMYOLOBackend
+    from exporters.heads import BoxesScoresOutput
+
+    model = init_detector(args.config, args.weights, device=device)
+    model.eval()
+    deploy_model = DeployModel(baseModel=model, backend=MMYOLOBackend.ONNXRUNTIME, postprocess_cfg=None)
+    deploy_model.eval()
+    deploy_model.with_postprocess = True
+    deploy_model.prior_generate = model.bbox_head.prior_generator.grid_priors
+    deploy_model.num_base_priors = model.bbox_head.num_base_priors
+    deploy_model.featmap_strides = model.bbox_head.featmap_strides
+    deploy_model.num_classes = model.bbox_head.num_classes
+    deploy_model.pred_by_feat = types.MethodType(pred_by_feat_deepstream, deploy_model)
+
+    return nn.Sequential(deploy_model, BoxesScoresOutput()), common.image_size(args), []
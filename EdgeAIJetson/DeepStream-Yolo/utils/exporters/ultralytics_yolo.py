@@ -0,0 +1,67 @@
+"""
+Ultralytics YOLO families: YOLOv5u, YOLOv8, YOLOv10, YOLO11, YOLOv12 and YOLOv13
+"""
+
+import sys
+import types
+
+from exporters import common
+
+PACKAGES = ["ultralytics"]
+
+
+# Code swapped into ultralytics.utils.tal.dist2bbox in load(), it runs with that module's globals
+def _dist2bbox(distance, anchor_points, xywh=False, dim=-1):
+    lt, rb = distance.chunk(2, dim)
+    x1y1 = anchor_points - lt
+    x2y2 = anchor_points + rb
+    return torch.cat((x1y1, x2y2), dim)
+
+
+def forward_deepstream(self, x):
+    import torch
+    x_detach = [xi.detach() for xi in x]
+    one2one = [
+        torch.cat((self.one2one_cv2[i](x_detach[i]), self.one2one_cv3[i](x_detach[i])), 1) for i in range(self.nl)
+    ]
+    if hasattr(self, "inference"):
+        y = self.inference(one2one)
+    else:
+        y = self._inference(one2one)
+    return y
+
+
+def load(args, device, fuse=True):
+    import torch.nn as nn
+    from copy import deepcopy
+    from ultralytics import YOLO
+    from ultralytics.nn.modules import C2f, Detect, v10Detect
+    import ultralytics.utils
+    import ultralytics.models.yolo
+    import ultralytics.utils.tal as _m
+    from exporters.heads import TransposedOutput
+
+    sys.modules["ultralytics.yolo"] = ultralytics.models.yolo
+    sys.modules["ultralytics.yolo.utils"] = ultralytics.utils
+    _m.dist2bbox.__code__ = _dist2bbox.__code__
+
+    model = YOLO(args.weights)
+    model = deepcopy(model.model).to(device)
+    for p in model.parameters():
+        p.requires_grad = False
+    model.eval()
+    model.float()
+    if fuse:
+        model = model.fuse()
+    for k, m in model.named_modules():
+        if isinstance(m, (Detect, v10Detect)):
+            m.dynamic = False
+            m.export = True
+            m.format = "onnx"
+            if m.__class__.__name__ == "v10Detect":
+                m.forward = types.MethodType(forward_deepstream, m)
+        elif isinstance(m, C2f):
+            m.forward = m.forward_split
+
+    labels = common.class_names(model)
+    return nn.Sequential(model, TransposedOutput()), common.image_size(args), labels
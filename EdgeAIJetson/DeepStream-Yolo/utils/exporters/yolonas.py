@@ -0,0 +1,26 @@
+"""
+YOLO-NAS (Deci-AI/super-gradients)
+"""
+
+from exporters import common
+
+WEIGHTS = ".pth"
+PACKAGES = ["super-gradients"]
+
+
+def add_arguments(parser):
+    parser.add_argument("-m", "--model", required=True, type=str, help="Model name (required)")
+    parser.add_argument("-n", "--classes", type=int, default=80, help="Number of trained classes (default 80)")
+
+
+def load(args, device):
+    import torch.nn as nn
+    from super_gradients.training import models
+    from exporters.heads import BoxesScoresOutput
+
+    img_size = common.image_size(args)
+    model = models.get(args.model, num_classes=args.classes, checkpoint_path=args.weights)
+    model.eval()
+    model.prep_model_for_conversion(input_size=[1, 3, *img_size])
+
+    return nn.Sequential(model, BoxesScoresOutput()), img_size, []
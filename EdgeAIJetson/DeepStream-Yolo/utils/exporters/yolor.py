@@ -0,0 +1,55 @@
+"""
+YOLOR (WongKinYiu/yolor repository, main and paper branches)
+"""
+
+import os
+
+from exporters import common
+
+P6 = True
+
+
+def add_arguments(parser):
+    parser.add_argument("-c", "--cfg", type=str, default="", help="Input cfg (.cfg) file path")
+
+
+def load(args, device, inplace=True, fuse=True):
+    import torch
+    import torch.nn as nn
+    from exporters.heads import ObjectnessOutput
+
+    if os.path.isfile("models/experimental.py"):
+        from models.common import Conv
+        from utils.activations import Hardswish
+        ckpt = torch.load(args.weights, map_location="cpu", weights_only=False)["model"].float()
+        model = ckpt.fuse().eval() if fuse and hasattr(ckpt, "fuse") else ckpt.eval()
+        for m in model.modules():
+            if isinstance(m, (nn.Hardswish, nn.LeakyReLU, nn.ReLU, nn.ReLU6)):
+                m.inplace = inplace
+            elif isinstance(m, Conv):
+                m._non_persistent_buffers_set = set()
+        for k, m in model.named_modules():
+            m._non_persistent_buffers_set = set()
+            if isinstance(m, Conv) and isinstance(m.act, nn.Hardswish):
+                m.act = Hardswish()
+            elif isinstance(m, nn.Upsample) and not hasattr(m, "recompute_scale_factor"):
+                m.recompute_scale_factor = None
+        model.model[-1].training = False
+        model.model[-1].export = False
+    else:
+        from models.models import Darknet
+        cfg = args.cfg
+        model_name = os.path.basename(args.weights).split(".pt")[0]
+        if cfg == "":
+            cfg = "cfg/" + model_name + ".cfg"
+            if not os.path.isfile(cfg):
+                raise RuntimeError("CFG file not found")
+        model = Darknet(cfg, img_size=args.size[::-1]).to(device)
+        model.load_state_dict(torch.load(args.weights, map_location=device, weights_only=False)["model"])
+        model.float()
+        model.fuse()
+        model.eval()
+        model.module_list[-1].training = False
+
+    labels = common.class_names(model)
+    return nn.Sequential(model, ObjectnessOutput(index=0)), common.image_size(args), labels
@@ -0,0 +1,25 @@
+"""
+YOLOv5 (ultralytics/yolov5 repository)
+"""
+
+from exporters import common
+
+P6 = True
+
+
+def load(args, device, inplace=True, fuse=True):
+    import torch.nn as nn
+    from models.experimental import attempt_load
+    from models.yolo import Detect
+    from exporters.heads import ObjectnessOutput
+
+    model = attempt_load(args.weights, device=device, inplace=inplace, fuse=fuse)
+    model.eval()
+    for k, m in model.named_modules():
+        if isinstance(m, Detect):
+            m.inplace = False
+            m.dynamic = False
+            m.export = True
+
+    labels = common.class_names(model)
+    return nn.Sequential(model, ObjectnessOutput(index=0)), common.image_size(args), labels
@@ -0,0 +1,55 @@
+"""
+YOLOv6 (meituan/YOLOv6 repository)
+"""
+
+from exporters import common
+
+P6 = True
+
+
+# Code swapped into yolov6.utils.general.dist2bbox in load(), it runs with that module's globals
+def _dist2bbox(distance, anchor_points, box_format="xyxy"):
+    lt, rb = torch.split(distance, 2, -1)
+    x1y1 = anchor_points - lt
+    x2y2 = anchor_points + rb
+    bbox = torch.cat([x1y1, x2y2], -1)
+    return bbox
+
+
+def load(args, device, fuse=True):
+    import torch
+    import torch.nn as nn
+    from yolov6.utils.torch_utils import fuse_model
+    from yolov6.models.effidehead import Detect
+    from yolov6.layers.common import RepVGGBlock, SiLU
+    import yolov6.utils.general as _m
+    from exporters.heads import ObjectnessOutput
+
+    try:
+        from yolov6.layers.common import ConvModule
+    except ImportError:
+        from yolov6.layers.common import Conv as ConvModule
+
+    _m.dist2bbox.__code__ = _dist2bbox.__code__
+
+    ckpt = torch.load(args.weights, map_location="cpu", weights_only=False)
+    model = ckpt["ema" if ckpt.get("ema") else "model"].float()
+    if fuse:
+        model = fuse_model(model).eval()
+    else:
+        model = model.eval()
+    for layer in model.modules():
+        if isinstance(layer, RepVGGBlock):
+            layer.switch_to_deploy()
+        elif isinstance(layer, nn.Upsample) and not hasattr(layer, "recompute_scale_factor"):
+            layer.recompute_scale_factor = None
+    model.eval()
+    model = model.to(device)
+    for k, m in model.named_modules():
+        if isinstance(m, ConvModule):
+            if hasattr(m, "act") and isinstance(m.act, nn.SiLU):
+                m.act = SiLU()
+        elif isinstance(m, Detect):
+            m.inplace = False
+
+    return nn.Sequential(model, ObjectnessOutput(xywh=False)), common.image_size(args), []
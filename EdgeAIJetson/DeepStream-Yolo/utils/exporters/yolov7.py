@@ -0,0 +1,39 @@
+"""
+YOLOv7 (WongKinYiu/yolov7 repository)
+"""
+
+from exporters import common
+
+P6 = True
+
+
+def load(args, device, inplace=True, fuse=True):
+    import torch
+    import torch.nn as nn
+    from models.common import Conv
+    from utils.activations import Hardswish, SiLU
+    from exporters.heads import ObjectnessOutput
+
+    ckpt = torch.load(args.weights, map_location="cpu", weights_only=False)
+    model = ckpt["ema" if ckpt.get("ema") else "model"].to(device).float()
+    model = model.fuse().eval() if fuse and hasattr(model, "fuse") else model.eval()
+    for m in model.modules():
+        if isinstance(m, (nn.Hardswish, nn.LeakyReLU, nn.ReLU, nn.ReLU6, nn.SiLU)):
+            m.inplace = inplace
+        elif isinstance(m, nn.Upsample):
+            m.recompute_scale_factor = None
+        elif isinstance(m, Conv):
+            m._non_persistent_buffers_set = set()
+    for k, m in model.named_modules():
+        m._non_persistent_buffers_set = set()
+        if isinstance(m, Conv):
+            if isinstance(m.act, nn.Hardswish):
+                m.act = Hardswish()
+            elif isinstance(m.act, nn.SiLU):
+                m.act = SiLU()
+    model.model[-1].export = False
+    model.model[-1].concat = True
+    model.eval()
+
+    labels = common.class_names(model)
+    return nn.Sequential(model, ObjectnessOutput()), common.image_size(args), labels
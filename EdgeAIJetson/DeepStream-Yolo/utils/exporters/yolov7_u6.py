@@ -0,0 +1,15 @@
+"""
+YOLOv7-u6 (u6 branch of WongKinYiu/yolov9 repository)
+"""
+
+from exporters import common
+from exporters.yolov9 import load_model
+
+
+def load(args, device):
+    import torch.nn as nn
+    from models.yolo import Detect, V6Detect, IV6Detect
+    from exporters.heads import TransposedOutput
+
+    model, _ = load_model(args.weights, device, (Detect, V6Detect, IV6Detect))
+    return nn.Sequential(model, TransposedOutput()), common.image_size(args), common.class_names(model)
@@ -0,0 +1,66 @@
+"""
+YOLOv9 (WongKinYiu/yolov9 repository), also used by YOLOv7-u6
+"""
+
+from exporters import common
+
+
+# Code swapped into utils.tal.anchor_generator.dist2bbox in load(), it runs with that module's globals
+def _dist2bbox(distance, anchor_points, xywh=False, dim=-1):
+    lt, rb = torch.split(distance, 2, dim)
+    x1y1 = anchor_points - lt
+    x2y2 = anchor_points + rb
+    return torch.cat((x1y1, x2y2), dim)
+
+
+def load_model(weights, device, heads, inplace=True, fuse=True):
+    """
+    Load a checkpoint of the yolov9 code base and set its detect heads for export
+
+    Args:
+        heads: Detect head classes of the repository
+
+    Returns:
+        tuple: (model, class name of the detect head)
+    """
+    import torch
+    import torch.nn as nn
+    from models.yolo import Model
+    import utils.tal.anchor_generator as _m
+
+    _m.dist2bbox.__code__ = _dist2bbox.__code__
+
+    ckpt = torch.load(weights, map_location="cpu", weights_only=False)
+    ckpt = (ckpt.get("ema") or ckpt["model"]).to(device).float()
+    if not hasattr(ckpt, "stride"):
+        ckpt.stride = torch.tensor([32.])
+    if hasattr(ckpt, "names") and isinstance(ckpt.names, (list, tuple)):
+        ckpt.names = dict(enumerate(ckpt.names))
+    model = ckpt.fuse().eval() if fuse and hasattr(ckpt, "fuse") else ckpt.eval()
+    for m in model.modules():
+        t = type(m)
+        if t in (nn.Hardswish, nn.LeakyReLU, nn.ReLU, nn.ReLU6, nn.SiLU, Model) + tuple(heads):
+            m.inplace = inplace
+        elif t is nn.Upsample and not hasattr(m, "recompute_scale_factor"):
+            m.recompute_scale_factor = None
+    model.eval()
+    head = "Detect"
+    for k, m in model.named_modules():
+        if isinstance(m, tuple(heads)):
+            m.inplace = False
+            m.dynamic = False
+            m.export = True
+            head = m.__class__.__name__
+    return model, head
+
+
+def load(args, device):
+    import torch.nn as nn
+    from models.yolo import Detect, DDetect, DualDetect, DualDDetect
+    from exporters.heads import TransposedOutput
+
+    model, head = load_model(args.weights, device, (Detect, DDetect, DualDetect, DualDDetect))
+
+    # Dual heads return (auxiliary, main) predictions
+    output = TransposedOutput() if head in ["Detect", "DDetect"] else TransposedOutput(index=1)
+    return nn.Sequential(model, output), common.image_size(args), common.class_names(model)
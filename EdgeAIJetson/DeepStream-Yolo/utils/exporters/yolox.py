@@ -0,0 +1,39 @@
+"""
+YOLOX (Megvii-BaseDetection/YOLOX repository)
+"""
+
+import os
+
+WEIGHTS = ".pth"
+SIZE = None  # From the exp file
+
+
+def add_arguments(parser):
+    parser.add_argument("-c", "--exp", required=True, help="Input exp (.py) file path (required)")
+
+
+def check_args(args):
+    if not os.path.isfile(args.exp):
+        raise RuntimeError("Invalid exp file")
+
+
+def load(args, device):
+    import torch
+    import torch.nn as nn
+    from yolox.exp import get_exp
+    from yolox.utils import replace_module
+    from yolox.models.network_blocks import SiLU
+    from exporters.heads import ObjectnessOutput
+
+    exp = get_exp(args.exp)
+    model = exp.get_model()
+    ckpt = torch.load(args.weights, map_location="cpu", weights_only=False)
+    model.eval()
+    if "model" in ckpt:
+        ckpt = ckpt["model"]
+    model.load_state_dict(ckpt)
+    model = replace_module(model, nn.SiLU, SiLU)
+    model.head.decode_in_inference = True
+
+    img_size = [exp.input_size[1], exp.input_size[0]]
+    return nn.Sequential(model, ObjectnessOutput()), img_size, []
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+asyncio-native Motor Controller for JetAcker
+Same kinematics and pre-activation as MotorController, but every wait is
+awaitable so motor control can share an event loop with camera and
+network I/O
+"""
+
+import sys
+import os
+import time
+import asyncio
+import serial
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hiwonder_protocol import HiwonderProtocol, FrameParser
+from motor_controller import (RIGHT_MOTOR_ID, LEFT_MOTOR_ID, LEFT_MOTOR_INVERTED,
+                              PRE_ACTIVATE_THRESHOLD, PRE_ACTIVATE_SPEED, PRE_ACTIVATE_DELAY,
+                              TRACK_WIDTH, WHEEL_DIAMETER,
+                              velocity_to_wheel_speeds, pre_activation_command)
+
+
+class AsyncSerialTransport:
+    """
+    Non-blocking serial port driven by the event loop
+
+    Reads and writes go straight to the port's file descriptor with
+    loop.add_reader()/add_writer(), so nothing blocks the loop.
+    """
+
+    def __init__(self, port, baudrate):
+        self.port = port
+        self.baudrate = baudrate
+        self.ser = None
+        self._fd = None
+        self._loop = None
+        self._write_buffer = bytearray()
+        self._drained = None
+        self._readable = None
+
+    def open(self):
+        """Open the port in non-blocking mode"""
+        self._loop = asyncio.get_running_loop()
+        # Configure RTS/DTR before opening so the lines are never toggled
+        self.ser = serial.Serial()
+        self.ser.port = self.port
+        self.ser.baudrate = self.baudrate
+        self.ser.timeout = 0
+        self.ser.rts = False
+        self.ser.dtr = False
+        self.ser.open()
+        self._fd = self.ser.fileno()
+        os.set_blocking(self._fd, False)
+
+    @property
+    def is_open(self):
+        return self.ser is not None and self.ser.is_open
+
+    def close(self):
+        """Close the port and wake any pending reader"""
+        if self._fd is not None:
+            self._loop.remove_reader(self._fd)
+            self._loop.remove_writer(self._fd)
+        if self._readable is not None and not self._readable.done():
+            self._readable.set_result(None)
+        if self._drained is not None and not self._drained.done():
+            self._drained.set_result(None)
+        if self.ser is not None:
+            self.ser.close()
+        self._fd = None
+
+    async def read(self):
+        """
+        Wait for and return available bytes
+
+        Returns:
+            bytes: Data read, or b"" once the transport is closed
+        """
+        while self._fd is not None:
+            try:
+                data = os.read(self._fd, 4096)
+                if data:
+                    return data
+            except BlockingIOError:
+                pass
+            self._readable = self._loop.create_future()
+            self._loop.add_reader(self._fd, self._on_readable)
+            try:
+                await self._readable
+            finally:
+                if self._fd is not None:
+                    self._loop.remove_reader(self._fd)
+        return b""
+
+    def _on_readable(self):
+        if self._readable is not None and not self._readable.done():
+            self._readable.set_result(None)
+
+    def write(self, data):
+        """Queue bytes for sending; writes immediately when the port is ready"""
+        if self._fd is None:
+            raise RuntimeError("Serial port not open")
+        if not self._write_buffer:
+            try:
+                written = os.write(self._fd, data)
+            except BlockingIOError:
+                written = 0
+            if written == len(data):
+                return
+            data = data[written:]
+            self._loop.add_writer(self._fd, self._on_writable)
+        self._write_buffer += data
+
+    def _on_writable(self):
+        try:
+            written = os.write(self._fd, self._write_buffer)
+        except BlockingIOError:
+            return
+        del self._write_buffer[:written]
+        if not self._write_buffer:
+            self._loop.remove_writer(self._fd)
+            if self._drained is not None and not self._drained.done():
+                self._drained.set_result(None)
+
+    async def drain(self):
+        """Wait until queued bytes have been handed to the OS"""
+        if self._write_buffer:
+            # Concurrent drains share the pending future; shielded so one cancelled waiter doesn't cancel the others
+            if self._drained is None or self._drained.done():
+                self._drained = self._loop.create_future()
+            await asyncio.shield(self._drained)
+
+
+class AsyncMotorController:
+    """
+    asyncio motor controller with pre-activation and a feedback reader task
+
+    Pre-activation does not hold up the caller: the wake frame is sent and
+    the real command is scheduled with loop.call_later(). A newer command
+    replaces a pending one and stop() cancels it, as in MotorController's
+    non-blocking mode.
+
+    Board feedback is decoded by a reader task; subscribe() has the same
+    signature as TelemetryReader, so ImuSubscriber.attach() works with it.
+
+    Example:
+        async with AsyncMotorController() as mc:
+            await mc.warm_up()
+            await mc.set_velocity(0.2, 0.0)
+    """
+
+    def __init__(self, port='/dev/ttyACM0', baudrate=1000000, pre_activation=None):
+        self.port = port
+        self.baudrate = baudrate
+        pre_activation = pre_activation or {}
+        self.pre_activate_threshold = pre_activation.get("threshold", PRE_ACTIVATE_THRESHOLD)
+        self.pre_activate_speed = pre_activation.get("speed", PRE_ACTIVATE_SPEED)
+        self.pre_activate_delay = pre_activation.get("delay", PRE_ACTIVATE_DELAY)
+        self.transport = None
+        self.parser = FrameParser()
+        self.last_speeds = [0.0, 0.0]  # [right, left] in RPS
+        self.motors_active = False
+        self.command_written_ns = None  # perf_counter_ns() when the last motion command was written
+        self._handlers = {}
+        self._reader_task = None
+        self._pending_cmd = None
+        self._pending_handle = None
+
+    async def connect(self):
+        """Open serial connection and start the feedback reader task"""
+        self.transport = AsyncSerialTransport(self.port, self.baudrate)
+        self.transport.open()
+        self._reader_task = asyncio.get_running_loop().create_task(self._read_feedback())
+        await asyncio.sleep(0.5)
+        print(f"Connected to {self.port} at {self.baudrate} baud")
+
+    async def disconnect(self):
+        """Stop motors, cancel the reader task and close the port"""
+        if self.transport and self.transport.is_open:
+            await self.stop()
+            self.transport.close()
+            print("Motor controller disconnected")
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+            self._reader_task = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.disconnect()
+
+    # ------------------------------------------------------------------
+    # Feedback
+    # ------------------------------------------------------------------
+
+    def subscribe(self, function, callback):
+        """Register callback(payload, timestamp_ns) for a function code"""
+        self._handlers[function] = self._handlers.get(function, []) + [callback]
+
+    def unsubscribe(self, function, callback):
+        """Remove a previously registered callback"""
+        self._handlers[function] = [h for h in self._handlers.get(function, []) if h != callback]
+
+    async def _read_feedback(self):
+        while True:
+            data = await self.transport.read()
+            if not data:
+                return
+            timestamp_ns = time.monotonic_ns()
+            for function, payload in self.parser.feed(data):
+                for callback in self._handlers.get(function, ()):
+                    try:
+                        callback(payload, timestamp_ns)
+                    except Exception as e:
+                        print(f"Feedback callback error: {e}")
+
+    # ------------------------------------------------------------------
+    # Commands
+    # ------------------------------------------------------------------
+
+    def _check_open(self):
+        if not self.transport or not self.transport.is_open:
+            raise RuntimeError("Serial port not open")
+
+    async def warm_up(self):
+        """
+        Warm up motors with small synchronized movements
+        Call this once after connecting to eliminate cold-start delays
+        """
+        self._check_open()
+        print("Warming up motors...")
+
+        left_wake = -self.pre_activate_speed if LEFT_MOTOR_INVERTED else self.pre_activate_speed
+        right_wake = self.pre_activate_speed
+
+        # Forward pulse, reverse pulse, stop and settle
+        for sign in (1, -1):
+            self.transport.write(HiwonderProtocol.motor_command([
+                [RIGHT_MOTOR_ID, sign * right_wake],
+                [LEFT_MOTOR_ID, sign * left_wake]
+            ]))
+            await self.transport.drain()
+            await asyncio.sleep(0.3)
+        await self.stop()
+        await asyncio.sleep(0.2)
+
+        self.motors_active = False  # Allow pre-activation on first real command
+        print("Motors warmed up and ready!")
+
+    async def set_wheel_speeds(self, right_rps, left_rps):
+        """
+        Set wheel speeds in rotations per second
+
+        Args:
+            right_rps: Right wheel RPS (positive = forward)
+            left_rps: Left wheel RPS (positive = forward)
+        """
+        self.send_wheel_speeds(right_rps, left_rps)
+        await self.transport.drain()
+
+    def send_wheel_speeds(self, right_rps, left_rps):
+        """
+        Write a wheel speed command without waiting for the port to drain
+
+        Used by set_wheel_speeds() and by fleet_manager.py, which writes
+        several robots' commands back-to-back.
+        """
+        self._check_open()
+
+        if LEFT_MOTOR_INVERTED:
+            left_rps = -left_rps
+
+        cmd = HiwonderProtocol.motor_command([
+            [RIGHT_MOTOR_ID, right_rps],
+            [LEFT_MOTOR_ID, left_rps]
+        ])
+        active = (abs(right_rps) > 0.001 or abs(left_rps) > 0.001)
+
+        if self._pending_handle is not None and active:
+            # Motors are already waking - the newest command wins
+            self._pending_cmd = cmd
+        else:
+            self._cancel_pending()
+            wake = None if self.motors_active else pre_activation_command(
+                right_rps, left_rps, self.pre_activate_threshold, self.pre_activate_speed)
+            if wake is None:
+                self.transport.write(cmd)
+                self.command_written_ns = time.perf_counter_ns()
+            else:
+                self.transport.write(wake)
+                self._pending_cmd = cmd
+                self._pending_handle = asyncio.get_running_loop().call_later(
+                    self.pre_activate_delay, self._send_pending)
+
+        self.last_speeds = [right_rps, left_rps]
+        self.motors_active = active
+
+    async def set_velocity(self, linear_mps, angular_radps, track_width=TRACK_WIDTH, wheel_diameter=WHEEL_DIAMETER):
+        """
+        Set robot velocity using differential drive kinematics
+
+        Args:
+            linear_mps: Linear velocity in m/s (positive = forward)
+            angular_radps: Angular velocity in rad/s (positive = counter-clockwise)
+        """
+        right_rps, left_rps = velocity_to_wheel_speeds(linear_mps, angular_radps, track_width, wheel_diameter)
+        await self.set_wheel_speeds(right_rps, left_rps)
+
+    async def stop(self):
+        """Stop all motors"""
+        self._cancel_pending()
+        if self.transport and self.transport.is_open:
+            self.transport.write(HiwonderProtocol.motor_command([
+                [RIGHT_MOTOR_ID, 0],
+                [LEFT_MOTOR_ID, 0]
+            ]))
+            await self.transport.drain()
+        self.motors_active = False
+        self.last_speeds = [0.0, 0.0]
+
+    @property
+    def command_pending(self):
+        """True while a command waits for pre-activation"""
+        return self._pending_handle is not None
+
+    def _send_pending(self):
+        cmd = self._pending_cmd
+        self._pending_cmd = None
+        self._pending_handle = None
+        if cmd is not None and self.transport and self.transport.is_open:
+            self.transport.write(cmd)
+            self.command_written_ns = time.perf_counter_ns()
+
+    def _cancel_pending(self):
+        if self._pending_handle is not None:
+            self._pending_handle.cancel()
+        self._pending_handle = None
+        self._pending_cmd = None
+
+
+# Simple test: motor commands interleaved with other coroutines
+if __name__ == '__main__':
+    import argparse
+    from imu_subscriber import ImuSubscriber
+
+    parser = argparse.ArgumentParser(description="asyncio motor controller demo")
+    parser.add_argument("--port", default="/dev/ttyACM0")
+    args = parser.parse_args()
+
+    async def heartbeat(period, stats):
+        # Stand-in for camera/network work sharing the loop
+        last = time.monotonic()
+        while True:
+            await asyncio.sleep(period)
+            now = time.monotonic()
+            stats.append(now - last - period)
+            last = now
+
+    async def main():
+        async with AsyncMotorController(port=args.port) as mc:
+            imu = ImuSubscriber().attach(mc)
+            lateness = []
+            beat = asyncio.get_running_loop().create_task(heartbeat(0.01, lateness))
+            await mc.warm_up()
+
+            print("\nForward 0.5 RPS")
+            t0 = time.perf_counter()
+            await mc.set_wheel_speeds(0.5, 0.5)
+            print(f"  set_wheel_speeds returned in {(time.perf_counter() - t0) * 1e6:.0f} us")
+            await asyncio.sleep(2)
+
+            print("Turn in place")
+            await mc.set_velocity(0.0, 1.0)
+            await asyncio.sleep(2)
+            await mc.stop()
+
+            beat.cancel()
+            print(f"\nIMU samples received: {imu.count}")
+            if lateness:
+                print(f"Heartbeat max lateness: {max(lateness) * 1000:.1f} ms")
+
+    asyncio.run(main())
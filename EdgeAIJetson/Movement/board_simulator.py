@@ -0,0 +1,644 @@
+#!/usr/bin/env python3
+"""
+Software simulator of the Hiwonder RRC controller board
+Opens a pseudo-terminal that stands in for /dev/ttyACM0 so MotorController
+and the test scripts can run without hardware
+"""
+
+import sys
+import os
+import math
+import time
+import random
+import select
+import threading
+import tty
+import heapq
+import struct
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hiwonder_protocol import HiwonderProtocol, FrameParser
+
+# Robot geometry (JetAcker)
+TRACK_WIDTH = 0.133  # meters
+WHEEL_DIAMETER = 0.067  # meters
+
+# JGB37-520 motor model
+ENCODER_PPR = 11  # Hall pulses per motor shaft revolution (x4 quadrature)
+GEAR_RATIO = 90
+GEAR_RATIO_RATED_RPM = {20: 390, 30: 280, 60: 146, 90: 85}
+COMMAND_SATURATION = 1.0  # Commands above 1.0 give no extra speed
+MIN_START_COMMAND = 0.05  # Static friction - smaller commands don't turn a resting wheel
+TIME_CONSTANT = 0.08  # seconds, first-order spin-up
+
+# Driver cold-start model
+# A driver that has been at rest for COLD_TIMEOUT goes cold. A cold driver
+# engages after its wake time when given a small command (<= WAKE_THRESHOLD),
+# but stalls for its cold-start delay when hit with a large step. This is
+# the delay that pre-activation in motor_controller.py hides.
+WAKE_THRESHOLD = 0.1  # command units
+COLD_TIMEOUT = 0.5  # seconds
+WAKE_TIMES = (0.03, 0.06)  # seconds, [right, left]
+COLD_START_DELAYS = (0.4, 1.5)  # seconds, [right, left]
+
+# Telemetry
+IMU_RATE_HZ = 100
+ENCODER_RATE_HZ = 50
+BATTERY_RATE_HZ = 10
+BATTERY_VOLTAGE = 12.4  # volts, open circuit
+BATTERY_RESISTANCE = 0.12  # ohms, internal + wiring
+IDLE_CURRENT = 0.4  # amps, board + Jetson fan etc.
+GRAVITY = 9.81
+LINK_LATENCY = 0.001  # seconds, USB CDC delay for board -> host replies
+
+# Bus servo model (LX-series servos on the board's half-duplex servo bus)
+BUS_SERVO_TRANSACTION_TIME = 0.0015  # seconds per request/response on the bus
+BUS_SERVO_TIMEOUT = 0.005  # seconds before the board reports a silent servo
+
+
+class SimulatedMotor:
+    """
+    DC gear motor + driver with encoder, cold-start stall and stiction
+    """
+
+    def __init__(self, motor_id, wake_time, cold_start_delay,
+                 rpm_per_command, load_gain=1.0, time_constant=TIME_CONSTANT,
+                 min_start_command=MIN_START_COMMAND, gear_ratio=GEAR_RATIO):
+        self.motor_id = motor_id
+        self.wake_time = wake_time
+        self.cold_start_delay = cold_start_delay
+        self.rps_per_command = rpm_per_command / 60.0
+        self.load_gain = load_gain
+        self.time_constant = time_constant
+        self.min_start_command = min_start_command
+        self.counts_per_rev = ENCODER_PPR * 4 * gear_ratio
+
+        self.command = 0.0  # Last commanded value (board frame)
+        self.speed = 0.0  # Wheel RPS (board frame)
+        self.accel = 0.0  # Wheel RPS/s
+        self.ticks = 0.0
+        self.cold = True
+        self.engage_at = None
+        self.rest_since = None
+        self.start_request = None  # Time motion was requested from rest
+        self.onsets = []  # [(start_request, onset_time)]
+
+    def set_command(self, rps, now):
+        """Apply a new speed command received at time `now`"""
+        rps = float(rps)
+        if rps != 0.0 and self.cold:
+            delay = self.wake_time if abs(rps) <= WAKE_THRESHOLD else self.cold_start_delay
+            if self.engage_at is None or now + delay < self.engage_at:
+                self.engage_at = now + delay
+        if rps == 0.0:
+            self.start_request = None
+        elif self.command == 0.0 and self.speed == 0.0:
+            self.start_request = now
+        self.command = rps
+
+    def target_speed(self):
+        """Steady-state wheel speed for the current command"""
+        magnitude = min(abs(self.command), COMMAND_SATURATION)
+        if magnitude < self.min_start_command and self.speed == 0.0:
+            return 0.0
+        return math.copysign(magnitude * self.rps_per_command * self.load_gain, self.command)
+
+    def advance(self, now, dt):
+        """Integrate the motor state forward by dt seconds, ending at `now`"""
+        engaged = None
+        if self.cold and self.engage_at is not None and now >= self.engage_at:
+            engaged = self.engage_at
+            self.cold = False
+            self.engage_at = None
+
+        previous = self.speed
+        target = 0.0 if self.cold else self.target_speed()
+        if dt > 0:
+            self.speed = target + (previous - target) * math.exp(-dt / self.time_constant)
+            if target == 0.0 and abs(self.speed) < 1e-3:
+                self.speed = 0.0
+            self.accel = (self.speed - previous) / dt
+            self.ticks += 0.5 * (previous + self.speed) * dt * self.counts_per_rev
+
+        if previous == 0.0 and self.speed != 0.0 and self.start_request is not None:
+            started = engaged if engaged is not None else now - dt
+            self.onsets.append((self.start_request, max(self.start_request, started)))
+            self.start_request = None
+
+        if self.command == 0.0 and self.speed == 0.0:
+            if self.rest_since is None:
+                self.rest_since = now
+            elif now - self.rest_since >= COLD_TIMEOUT:
+                self.cold = True
+        else:
+            self.rest_since = None
+
+    def current(self):
+        """Approximate motor current draw in amps"""
+        return 0.6 * abs(self.speed) + 0.25 * abs(self.accel)
+
+
+class SimulatedBusServo:
+    """
+    Serial bus servo with linear timed moves
+    """
+
+    def __init__(self, servo_id, position=500, voltage_mv=12000, temperature=35):
+        self.servo_id = servo_id
+        self.start_position = position
+        self.target_position = position
+        self.move_start = 0.0
+        self.move_duration = 0.0
+        self.voltage_mv = voltage_mv
+        self.temperature = temperature
+
+    def move(self, position, duration, now):
+        """Start a timed move to `position` (0-1000)"""
+        self.start_position = self.position(now)
+        self.target_position = max(0, min(1000, int(position)))
+        self.move_start = now
+        self.move_duration = max(0.0, duration)
+
+    def position(self, now):
+        """Current position at time `now`"""
+        if self.move_duration <= 0 or now >= self.move_start + self.move_duration:
+            return self.target_position
+        fraction = (now - self.move_start) / self.move_duration
+        return round(self.start_position + fraction * (self.target_position - self.start_position))
+
+    def read(self, read_cmd, now):
+        """Value returned for a read request"""
+        if read_cmd == HiwonderProtocol.BUS_SERVO_READ_POSITION:
+            return self.position(now)
+        if read_cmd == HiwonderProtocol.BUS_SERVO_READ_VIN:
+            return self.voltage_mv
+        return self.temperature
+
+
+class BoardSimulator:
+    """
+    Simulated RRC controller board on a pseudo-terminal
+
+    Decodes HiwonderProtocol frames written to `port` and streams IMU,
+    battery and encoder frames back at the board's rates. Bus servo reads
+    are answered one at a time, as on the real half-duplex servo bus.
+
+    Example:
+        with BoardSimulator() as sim:
+            with MotorController(port=sim.port) as mc:
+                mc.set_wheel_speeds(0.5, 0.5)
+    """
+
+    def __init__(self, right_motor_id=2, left_motor_id=4, left_inverted=True,
+                 gear_ratio=GEAR_RATIO, rpm_per_command=None, load_gain=1.0,
+                 wake_times=WAKE_TIMES, cold_start_delays=COLD_START_DELAYS,
+                 imu_rate_hz=IMU_RATE_HZ, encoder_rate_hz=ENCODER_RATE_HZ,
+                 battery_rate_hz=BATTERY_RATE_HZ, bus_servo_ids=(),
+                 noise=True, seed=None, clock=time.monotonic):
+        if rpm_per_command is None:
+            rpm_per_command = GEAR_RATIO_RATED_RPM[gear_ratio]
+
+        self.right_motor_id = right_motor_id
+        self.left_motor_id = left_motor_id
+        self.left_inverted = left_inverted
+        self.motors = {
+            right_motor_id: SimulatedMotor(right_motor_id, wake_times[0], cold_start_delays[0],
+                                           rpm_per_command, load_gain, gear_ratio=gear_ratio),
+            left_motor_id: SimulatedMotor(left_motor_id, wake_times[1], cold_start_delays[1],
+                                          rpm_per_command, load_gain, gear_ratio=gear_ratio),
+        }
+        self.bus_servos = {i: SimulatedBusServo(i) for i in bus_servo_ids}
+        self.imu_period = 1.0 / imu_rate_hz if imu_rate_hz else None
+        self.encoder_period = 1.0 / encoder_rate_hz if encoder_rate_hz else None
+        self.battery_period = 1.0 / battery_rate_hz if battery_rate_hz else None
+        self.noise = noise
+        self.rng = random.Random(seed)
+        self.clock = clock
+
+        # Ground-truth robot state
+        self.pose = [0.0, 0.0, 0.0]  # x, y, theta
+        self.linear_velocity = 0.0
+        self.angular_velocity = 0.0
+        self.linear_accel = 0.0
+        self.battery_voltage = BATTERY_VOLTAGE
+        self.rgb = {}  # LED index -> (r, g, b)
+        self.oled = {}  # line -> text
+
+        # Statistics / logs
+        self.parser = FrameParser()
+        self.command_log = deque(maxlen=10000)  # (time, function, payload)
+        self.frames_sent = 0
+        self.frames_dropped = 0
+
+        self._last_time = None
+        self._next_due = {}
+        self._scheduled = []  # heap of (due, sequence, frame)
+        self._sequence = 0
+        self._bus_free_at = 0.0
+        self._lock = threading.Lock()
+        self._master = None
+        self._slave = None
+        self._thread = None
+        self._running = False
+        self.port = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Open the pseudo-terminal and start the board thread"""
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        os.set_blocking(self._master, False)
+        self.port = os.ttyname(self._slave)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="board-simulator", daemon=True)
+        self._thread.start()
+        print(f"Board simulator running on {self.port}")
+        return self
+
+    def close(self):
+        """Stop the board thread and close the pseudo-terminal"""
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                os.close(fd)
+        self._master = self._slave = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Board model
+    # ------------------------------------------------------------------
+
+    def handle_bytes(self, data, now):
+        """Decode host bytes and apply every complete frame"""
+        with self._lock:
+            self._advance(now)
+            for function, payload in self.parser.feed(data):
+                self.command_log.append((now, function, payload))
+                self._handle_frame(function, payload, now)
+
+    def _handle_frame(self, function, payload, now):
+        if function == HiwonderProtocol.FUNC_MOTOR:
+            speeds = HiwonderProtocol.parse_motor_command(payload)
+            for motor_id, rps in speeds or []:
+                motor = self.motors.get(motor_id)
+                if motor is not None:
+                    motor.set_command(rps, now)
+        elif function == HiwonderProtocol.FUNC_BUS_SERVO and payload:
+            self._handle_bus_servo(payload, now)
+        elif function == HiwonderProtocol.FUNC_RGB:
+            for index, r, g, b in HiwonderProtocol.parse_rgb_command(payload) or []:
+                self.rgb[index] = (r, g, b)
+        elif function == HiwonderProtocol.FUNC_OLED:
+            text = HiwonderProtocol.parse_oled_command(payload)
+            if text is not None:
+                self.oled[text[0]] = text[1]
+
+    def _handle_bus_servo(self, payload, now):
+        if payload[0] == HiwonderProtocol.BUS_SERVO_SET_POSITION:
+            if len(payload) < 4:
+                return
+            duration = (payload[1] | (payload[2] << 8)) / 1000.0
+            for i in range(payload[3]):
+                if len(payload) < 4 + (i + 1) * 3:
+                    break
+                servo_id, position = struct.unpack_from("<BH", payload, 4 + i * 3)
+                servo = self.bus_servos.get(servo_id)
+                if servo is not None:
+                    servo.move(position, duration, now)
+            return
+
+        read_cmd = payload[0]
+        if read_cmd not in HiwonderProtocol.BUS_SERVO_READ_FORMATS or len(payload) < 2:
+            return
+        servo_id = payload[1]
+        servo = self.bus_servos.get(servo_id)
+        # The servo bus handles one transaction at a time
+        start = max(now, self._bus_free_at)
+        if servo is None:
+            done = start + BUS_SERVO_TIMEOUT
+            frame = HiwonderProtocol.bus_servo_response(servo_id, read_cmd, 0, success=False)
+        else:
+            done = start + BUS_SERVO_TRANSACTION_TIME
+            frame = HiwonderProtocol.bus_servo_response(servo_id, read_cmd, servo.read(read_cmd, done))
+        self._bus_free_at = done
+        self.schedule(frame, done + LINK_LATENCY)
+
+    def schedule(self, frame, due):
+        """Queue a frame for transmission to the host at time `due`"""
+        self._sequence += 1
+        heapq.heappush(self._scheduled, (due, self._sequence, frame))
+
+    def inject_frame(self, frame, delay=0.0):
+        """
+        Send a frame to the host as if a board peripheral produced it
+
+        Used for input the simulator doesn't model itself, e.g. gamepad or
+        SBUS reports built with HiwonderProtocol.gamepad_report().
+        """
+        with self._lock:
+            self.schedule(frame, self.clock() + delay)
+
+    def advance(self, now):
+        """Integrate the physical model up to time `now`"""
+        with self._lock:
+            self._advance(now)
+
+    def _advance(self, now):
+        if self._last_time is None:
+            self._last_time = now
+            return
+        dt = now - self._last_time
+        if dt <= 0:
+            return
+        self._last_time = now
+        for motor in self.motors.values():
+            motor.advance(now, dt)
+
+        right, left = self.wheel_speeds()
+        right_accel, left_accel = self._wheel_values("accel")
+        circumference = math.pi * WHEEL_DIAMETER
+        self.linear_velocity = circumference * (right + left) / 2.0
+        self.angular_velocity = circumference * (right - left) / TRACK_WIDTH
+        self.linear_accel = circumference * (right_accel + left_accel) / 2.0
+
+        theta = self.pose[2]
+        self.pose[0] += self.linear_velocity * math.cos(theta) * dt
+        self.pose[1] += self.linear_velocity * math.sin(theta) * dt
+        self.pose[2] = theta + self.angular_velocity * dt
+
+        load = IDLE_CURRENT + sum(m.current() for m in self.motors.values())
+        self.battery_voltage = BATTERY_VOLTAGE - BATTERY_RESISTANCE * load
+
+    def _wheel_values(self, attribute):
+        right = getattr(self.motors[self.right_motor_id], attribute)
+        left = getattr(self.motors[self.left_motor_id], attribute)
+        if self.left_inverted:
+            left = -left
+        return right, left
+
+    def wheel_speeds(self):
+        """Actual [right, left] wheel speeds in RPS (positive = forward)"""
+        return self._wheel_values("speed")
+
+    def _gauss(self, sigma):
+        return self.rng.gauss(0.0, sigma) if self.noise else 0.0
+
+    def frames_due(self, now):
+        """
+        Build the telemetry and reply frames due at time `now`
+
+        Returns:
+            list: Complete frames (bytes) in emission order
+        """
+        frames = []
+        with self._lock:
+            self._advance(now)
+            for name, period in (("imu", self.imu_period),
+                                 ("encoder", self.encoder_period),
+                                 ("battery", self.battery_period)):
+                if period is None:
+                    continue
+                due = self._next_due.setdefault(name, now)
+                if now < due:
+                    continue
+                frames.append(getattr(self, "_" + name + "_frame")())
+                # Skip missed slots instead of bursting to catch up
+                self._next_due[name] = due + period if now - due < period else now + period
+            while self._scheduled and self._scheduled[0][0] <= now:
+                frames.append(heapq.heappop(self._scheduled)[2])
+        return frames
+
+    def next_output_time(self):
+        """Time at which the next frame to the host is due"""
+        times = list(self._next_due.values())
+        if self._scheduled:
+            times.append(self._scheduled[0][0])
+        return min(times) if times else 0.0
+
+    def _imu_frame(self):
+        wheel_activity = sum(abs(m.speed) for m in self.motors.values())
+        vibration = 0.3 * wheel_activity
+        return HiwonderProtocol.imu_report(
+            self.linear_accel + self._gauss(0.02 + vibration),
+            self.linear_velocity * self.angular_velocity + self._gauss(0.02 + vibration),
+            GRAVITY + self._gauss(0.02 + vibration),
+            self._gauss(0.002 + 0.01 * wheel_activity),
+            self._gauss(0.002 + 0.01 * wheel_activity),
+            self.angular_velocity + 0.001 + self._gauss(0.002 + 0.01 * wheel_activity))
+
+    def _encoder_frame(self):
+        encoders = []
+        for motor_id in sorted(self.motors):
+            motor = self.motors[motor_id]
+            measured = motor.speed + (self._gauss(0.005) if motor.speed else 0.0)
+            encoders.append([motor_id, motor.ticks, measured])
+        return HiwonderProtocol.encoder_report(encoders)
+
+    def _battery_frame(self):
+        millivolts = (self.battery_voltage + self._gauss(0.01)) * 1000.0
+        return HiwonderProtocol.battery_report(max(0, min(65535, millivolts)))
+
+    # ------------------------------------------------------------------
+    # Measurement helpers
+    # ------------------------------------------------------------------
+
+    def wait_for_onset(self, motor_id, after, timeout=3.0):
+        """
+        Wait until a wheel starts moving after time `after`
+
+        Args:
+            motor_id: Motor port (e.g. 2 or 4)
+            after: Clock time (same clock as the simulator) of the command
+            timeout: Maximum seconds to wait
+
+        Returns:
+            float: Clock time the wheel started moving, or None on timeout
+        """
+        deadline = self.clock() + timeout
+        motor = self.motors[motor_id]
+        while self.clock() < deadline:
+            with self._lock:
+                for request, onset in motor.onsets:
+                    if onset >= after:
+                        return onset
+            time.sleep(0.001)
+        return None
+
+    def wait_until_cold(self, timeout=5.0):
+        """
+        Wait until every driver is back in its cold (unarmed) state
+
+        Returns:
+            bool: True if all drivers went cold before the timeout
+        """
+        deadline = self.clock() + timeout
+        while self.clock() < deadline:
+            with self._lock:
+                if all(m.cold for m in self.motors.values()):
+                    return True
+            time.sleep(0.01)
+        return False
+
+    # ------------------------------------------------------------------
+    # Pseudo-terminal I/O
+    # ------------------------------------------------------------------
+
+    def _write(self, frame):
+        try:
+            os.write(self._master, frame)
+            self.frames_sent += 1
+        except BlockingIOError:
+            # Host is not reading - the real board drops data the same way
+            self.frames_dropped += 1
+
+    def _run(self):
+        while self._running:
+            now = self.clock()
+            timeout = max(0.0, min(self.next_output_time() - now, 0.01))
+            readable, _, _ = select.select([self._master], [], [], timeout)
+            if readable:
+                try:
+                    data = os.read(self._master, 4096)
+                except (BlockingIOError, OSError):
+                    data = b""
+                if data:
+                    self.handle_bytes(data, self.clock())
+            for frame in self.frames_due(self.clock()):
+                self._write(frame)
+
+
+class LoopbackSerial:
+    """
+    Serial-port stand-in wired directly to a BoardSimulator
+
+    Writes are decoded by the simulator at clock.monotonic(); telemetry is
+    produced by timers on the clock at the board's rates. On a
+    clock.VirtualClock the whole board runs on the caller's thread with
+    no pseudo-terminal, so simulated minutes take milliseconds. Pass it
+    as MotorController(port=LoopbackSerial(sim, clock), clock=clock); the
+    simulator doesn't need start().
+    """
+
+    def __init__(self, sim, clock, buffer_size=1 << 16):
+        self.sim = sim
+        self.clock = clock
+        self.buffer_size = buffer_size
+        sim.clock = clock.monotonic
+        self.is_open = False
+        self._inbound = bytearray()
+        self._timer = None
+
+    def open(self):
+        self.is_open = True
+        self._schedule()
+        return self
+
+    def close(self):
+        self.is_open = False
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _schedule(self):
+        now = self.clock.monotonic()
+        due = max(self.sim.next_output_time(), now)
+        if self._timer is not None:
+            if self._timer.due <= due:
+                return
+            self._timer.cancel()
+        self._timer = self.clock.call_at(due, self._pump)
+
+    def _pump(self):
+        self._timer = None
+        if not self.is_open:
+            return
+        for frame in self.sim.frames_due(self.clock.monotonic()):
+            if len(self._inbound) + len(frame) > self.buffer_size:
+                self.sim.frames_dropped += 1  # Host is not reading
+            else:
+                self._inbound += frame
+                self.sim.frames_sent += 1
+        self._schedule()
+
+    def write(self, data):
+        if not self.is_open:
+            raise OSError("Loopback port not open")
+        self.sim.handle_bytes(bytes(data), self.clock.monotonic())
+        self._schedule()  # A reply may now be due before the next telemetry
+        return len(data)
+
+    def flush(self):
+        pass
+
+    @property
+    def in_waiting(self):
+        return len(self._inbound)
+
+    def read(self, size=1):
+        data = bytes(self._inbound[:size])
+        del self._inbound[:size]
+        return data
+
+    def reset_input_buffer(self):
+        self._inbound.clear()
+
+
+def measure_start_latency(sim, mc, right_rps=0.5, left_rps=0.5):
+    """
+    Measure command-to-motion latency of each wheel
+
+    Args:
+        sim: Running BoardSimulator
+        mc: MotorController connected to sim.port, motors at rest
+
+    Returns:
+        tuple: (right_latency, left_latency) in seconds, None if a wheel never started
+    """
+    start = sim.clock()
+    mc.set_wheel_speeds(right_rps, left_rps)
+    latencies = []
+    for motor_id in (sim.right_motor_id, sim.left_motor_id):
+        onset = sim.wait_for_onset(motor_id, start)
+        latencies.append(onset - start if onset is not None else None)
+    return tuple(latencies)
+
+
+# Command-to-effect latency demo
+if __name__ == '__main__':
+    from motor_controller import MotorController
+
+    def show(label, latencies):
+        text = ", ".join("n/a" if t is None else f"{t * 1000:.0f} ms" for t in latencies)
+        print(f"  {label}: right/left start latency = {text}")
+
+    print("Board simulator - command-to-effect latency")
+    print("="*70)
+
+    with BoardSimulator(seed=1) as sim:
+        with MotorController(port=sim.port) as mc:
+            print("\nCold start WITH pre-activation (MotorController):")
+            show("pre-activated", measure_start_latency(sim, mc))
+            mc.stop()
+            sim.wait_until_cold()
+
+            print("\nCold start WITHOUT pre-activation (raw frame):")
+            start = sim.clock()
+            mc.ser.write(HiwonderProtocol.motor_command([[2, 0.5], [4, -0.5]]))
+            show("raw", [None if t is None else t - start for t in
+                         (sim.wait_for_onset(2, start), sim.wait_for_onset(4, start))])
+            mc.stop()
+
+        print(f"\nFrames decoded: {sim.parser.frames_ok}, "
+              f"telemetry sent: {sim.frames_sent}, dropped: {sim.frames_dropped}")
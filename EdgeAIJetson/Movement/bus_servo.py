@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Pipelined bus servo client
+Keeps several read requests in flight and matches responses by servo ID,
+instead of one request/response round trip per servo
+"""
+
+import sys
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hiwonder_protocol import HiwonderProtocol
+
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_TIMEOUT = 0.05  # seconds per request
+
+
+class BusServoClient:
+    """
+    Bus servo reads/writes over a shared serial port
+
+    Requests are queued and up to `max_in_flight` are outstanding at once.
+    Responses are matched by (servo_id, read command), so at most one
+    request per key is on the wire. Failed or timed-out reads resolve to
+    None; a timer expires them, so plain submit() callers are woken too.
+
+    Given the MotorController, frames go through its locked write path (and
+    journal) and can't interleave with deferred motor writes; a bare serial
+    port is written directly.
+
+    Example:
+        with MotorController() as mc, TelemetryReader(mc.ser) as reader:
+            servos = BusServoClient(mc, reader)
+            positions = servos.read_positions([1, 2, 3, 4, 5, 6])
+    """
+
+    def __init__(self, port, reader, max_in_flight=DEFAULT_MAX_IN_FLIGHT, timeout=DEFAULT_TIMEOUT):
+        self._write = port._write if hasattr(port, "_write") else port.write
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.timeout = timeout
+        self.latencies_ns = deque(maxlen=10000)  # Completed request round trips
+        self.timeouts = 0
+        self.failures = 0
+        self._pending = {}  # (servo_id, read_cmd) -> (future, sent_ns)
+        self._waiting = deque()  # (servo_id, read_cmd, future)
+        self._lock = threading.Lock()
+        self._timer = None  # Expires the oldest pending request
+        reader.subscribe(HiwonderProtocol.FUNC_BUS_SERVO, self._on_response)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def set_positions(self, duration, positions):
+        """
+        Move several servos in one frame
+
+        Args:
+            duration: Movement duration in seconds
+            positions: List of [servo_id, position] pairs (position 0-1000)
+        """
+        self._write(HiwonderProtocol.bus_servo_set_position(duration, positions))
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def submit(self, servo_id, read_cmd):
+        """
+        Queue a read request
+
+        Returns:
+            Future: resolves to the value, or None on failure/timeout
+        """
+        future = Future()
+        with self._lock:
+            self._waiting.append((servo_id, read_cmd, future))
+            frames = self._pump()
+        self._send(frames)
+        return future
+
+    def read_many(self, servo_ids, read_cmd):
+        """
+        Read one value from several servos, pipelined
+
+        Returns:
+            dict: servo_id -> value (None if the read failed)
+        """
+        futures = [(servo_id, self.submit(servo_id, read_cmd)) for servo_id in servo_ids]
+        results = {}
+        for servo_id, future in futures:
+            results[servo_id] = future.result()
+        return results
+
+    def read_positions(self, servo_ids):
+        """Read positions (0-1000) of several servos"""
+        return self.read_many(servo_ids, HiwonderProtocol.BUS_SERVO_READ_POSITION)
+
+    def read_voltages(self, servo_ids):
+        """Read supply voltages (millivolts) of several servos"""
+        return self.read_many(servo_ids, HiwonderProtocol.BUS_SERVO_READ_VIN)
+
+    def read_temperatures(self, servo_ids):
+        """Read temperatures (degrees C) of several servos"""
+        return self.read_many(servo_ids, HiwonderProtocol.BUS_SERVO_READ_TEMP)
+
+    # ------------------------------------------------------------------
+    # Pipeline
+    # ------------------------------------------------------------------
+
+    def _pump(self):
+        """Move waiting requests onto the wire (call with lock held)"""
+        frames = []
+        deferred = []
+        now = time.monotonic_ns()
+        while self._waiting and len(self._pending) < self.max_in_flight:
+            servo_id, read_cmd, future = self._waiting.popleft()
+            key = (servo_id, read_cmd)
+            if key in self._pending:
+                # Same key already on the wire - responses couldn't be told apart
+                deferred.append((servo_id, read_cmd, future))
+                continue
+            self._pending[key] = (future, now)
+            frames.append(HiwonderProtocol.bus_servo_read(servo_id, read_cmd))
+        self._waiting.extendleft(reversed(deferred))
+        self._schedule_expiry()
+        return frames
+
+    def _schedule_expiry(self):
+        """Start the timer for the oldest pending request (call with lock held)"""
+        if self._timer is not None or not self._pending:
+            return
+        oldest_ns = min(sent_ns for _, sent_ns in self._pending.values())
+        delay = max(0.0, (oldest_ns - time.monotonic_ns()) / 1e9 + self.timeout)
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+        self._expire()
+
+    def _send(self, frames):
+        if frames:
+            self._write(b"".join(frames))
+
+    def _on_response(self, payload, timestamp_ns):
+        response = HiwonderProtocol.parse_bus_servo_response(payload)
+        if response is None:
+            return
+        servo_id, read_cmd, value = response
+        with self._lock:
+            entry = self._pending.pop((servo_id, read_cmd), None)
+            frames = self._pump()
+        self._send(frames)
+        if entry is None:
+            return  # Late response to a request that already timed out
+        future, sent_ns = entry
+        self.latencies_ns.append(timestamp_ns - sent_ns)
+        if value is None:
+            self.failures += 1
+        future.set_result(value)
+
+    def _expire(self):
+        """Resolve requests that have waited longer than the timeout"""
+        now = time.monotonic_ns()
+        limit = int(self.timeout * 1e9)
+        expired = []
+        with self._lock:
+            for key, (future, sent_ns) in list(self._pending.items()):
+                if now - sent_ns > limit:
+                    del self._pending[key]
+                    expired.append(future)
+            frames = self._pump() if expired else []
+            self._schedule_expiry()
+        self._send(frames)
+        for future in expired:
+            self.timeouts += 1
+            future.set_result(None)
+
+
+# Latency / throughput benchmark against the simulated board
+if __name__ == '__main__':
+    import argparse
+    from board_simulator import BoardSimulator
+    from motor_controller import MotorController
+    from telemetry_reader import TelemetryReader
+
+    parser = argparse.ArgumentParser(description="Bus servo read benchmark (simulated board)")
+    parser.add_argument("--servos", type=int, default=6, help="Number of servos on the bus")
+    parser.add_argument("--rounds", type=int, default=200, help="Read sweeps per setting")
+    parser.add_argument("--in-flight", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    servo_ids = list(range(1, args.servos + 1))
+
+    print("BUS SERVO READ BENCHMARK (simulated board)")
+    print("="*70)
+    print(f"Servos: {args.servos}, sweeps per setting: {args.rounds}")
+
+    with BoardSimulator(bus_servo_ids=servo_ids, imu_rate_hz=100) as sim:
+        with MotorController(port=sim.port) as mc, TelemetryReader(mc.ser) as reader:
+            print(f"\n{'in-flight':>9} {'sweep p50':>10} {'sweep p99':>10} "
+                  f"{'req p50':>9} {'reads/s':>9} {'lost':>5}")
+            for in_flight in args.in_flight:
+                client = BusServoClient(mc, reader, max_in_flight=in_flight)
+                client.read_positions(servo_ids)  # Warm-up
+                client.latencies_ns.clear()
+                sweeps = []
+                lost = 0
+                start = time.perf_counter()
+                for _ in range(args.rounds):
+                    t0 = time.perf_counter()
+                    result = client.read_positions(servo_ids)
+                    sweeps.append(time.perf_counter() - t0)
+                    lost += sum(1 for v in result.values() if v is None)
+                elapsed = time.perf_counter() - start
+                reader.unsubscribe(HiwonderProtocol.FUNC_BUS_SERVO, client._on_response)
+
+                sweeps.sort()
+                requests = sorted(client.latencies_ns)
+                p50 = sweeps[len(sweeps) // 2] * 1000
+                p99 = sweeps[int(len(sweeps) * 0.99) - 1] * 1000
+                req_p50 = requests[len(requests) // 2] / 1e6 if requests else float("nan")
+                rate = args.rounds * len(servo_ids) / elapsed
+                print(f"{in_flight:>9} {p50:>8.2f}ms {p99:>8.2f}ms "
+                      f"{req_p50:>7.2f}ms {rate:>9.0f} {lost:>5}")
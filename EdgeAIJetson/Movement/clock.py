@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Clock and scheduler abstraction
+MotorController takes its time, sleeps and deferred sends from a clock, so
+the same code runs in real time on the robot or on a virtual clock that
+jumps straight to the next event (scenario_runner.py)
+"""
+
+import time
+import heapq
+import threading
+import itertools
+
+
+class Timer:
+    """Handle for a scheduled callback"""
+
+    __slots__ = ("due", "callback", "cancelled")
+
+    def __init__(self, due, callback):
+        self.due = due
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class SystemClock:
+    """
+    Real time: time.monotonic(), time.sleep() and a scheduler thread
+
+    Callbacks run on one daemon thread (started on first use), outside the
+    clock's lock, so they may take their own locks and schedule again.
+    """
+
+    def __init__(self):
+        self._timers = []  # heap of (due, sequence, Timer)
+        self._sequence = itertools.count()
+        self._wakeup = threading.Condition()
+        self._thread = None
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def call_at(self, due, callback):
+        """Run callback() at monotonic time `due`; returns a Timer"""
+        timer = Timer(due, callback)
+        with self._wakeup:
+            heapq.heappush(self._timers, (due, next(self._sequence), timer))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="clock-scheduler", daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+        return timer
+
+    def call_later(self, delay, callback):
+        return self.call_at(self.monotonic() + delay, callback)
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while not self._timers or self._timers[0][2].cancelled:
+                    if self._timers:
+                        heapq.heappop(self._timers)
+                    else:
+                        self._wakeup.wait()
+                remaining = self._timers[0][0] - time.monotonic()
+                if remaining > 0:
+                    self._wakeup.wait(remaining)
+                    continue
+                timer = heapq.heappop(self._timers)[2]
+            if not timer.cancelled:
+                timer.callback()
+
+
+class VirtualClock:
+    """
+    Simulated time that only moves when someone sleeps
+
+    sleep() runs every timer due before the wake-up time in order, with
+    monotonic() set to each timer's due time, then jumps to the wake-up
+    time. Everything happens on the calling thread, so a run is
+    deterministic and takes no real time.
+
+    Example:
+        clock = VirtualClock()
+        clock.call_later(0.1, lambda: print(clock.monotonic()))
+        clock.sleep(1.0)  # prints 0.1, returns immediately
+    """
+
+    def __init__(self, start=0.0):
+        self.now = start
+        self._timers = []
+        self._sequence = itertools.count()
+        self.timers_run = 0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.run_until(self.now + max(0.0, seconds))
+
+    def call_at(self, due, callback):
+        timer = Timer(due, callback)
+        heapq.heappush(self._timers, (due, next(self._sequence), timer))
+        return timer
+
+    def call_later(self, delay, callback):
+        return self.call_at(self.now + delay, callback)
+
+    def run_until(self, until):
+        """Advance to `until`, running due timers (including ones they schedule)"""
+        while self._timers and self._timers[0][0] <= until:
+            due, _, timer = heapq.heappop(self._timers)
+            if timer.cancelled:
+                continue
+            self.now = max(self.now, due)
+            timer.callback()
+            self.timers_run += 1
+        self.now = max(self.now, until)
+
+
+SYSTEM_CLOCK = SystemClock()
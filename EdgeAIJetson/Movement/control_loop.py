@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Fixed-rate control loop for MotorController
+Callers post targets into a single-slot mailbox; one thread sends the
+latest target at a fixed rate, and only when it actually changed
+"""
+
+import sys
+import os
+import math
+import time
+import threading
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from motor_controller import LEFT_MOTOR_INVERTED, TRACK_WIDTH, WHEEL_DIAMETER, velocity_to_wheel_speeds
+
+DEFAULT_RATE_HZ = 50
+DEFAULT_DEADBAND = 0.005  # RPS
+
+
+class ControlLoop:
+    """
+    Latest-command-wins control loop thread
+
+    post_wheel_speeds()/post_velocity() store the target with a single
+    attribute assignment (atomic, no lock), so callers never block on the
+    serial port and bursts collapse to the newest target. Each tick the
+    loop compares the target with the controller's last_speeds and sends
+    only if a wheel differs by more than `deadband`. With command_timeout
+    set, a target older than that is replaced by a stop, so a stalled
+    caller can't leave the robot driving.
+
+    Use MotorController(non_blocking_preactivate=True), otherwise the
+    100 ms pre-activation sleep shows up as loop overruns.
+
+    Ticks are timed with the controller's clock (mc.clock). On a
+    VirtualClock, drive the loop from the calling thread with run_for()
+    instead of start().
+
+    Example:
+        with ControlLoop(mc, rate_hz=50) as loop:
+            loop.post_velocity(0.2, 0.0)
+    """
+
+    def __init__(self, mc, rate_hz=DEFAULT_RATE_HZ, deadband=DEFAULT_DEADBAND, command_timeout=None):
+        self.mc = mc
+        self.clock = mc.clock
+        self.rate_hz = rate_hz
+        self.period = 1.0 / rate_hz
+        self.deadband = deadband
+        self.command_timeout = command_timeout
+
+        self._mailbox = None  # (right_rps, left_rps, posted_time)
+        self._expired = None  # Last target stopped by command_timeout
+        self._thread = None
+        self._running = False
+
+        # Statistics
+        self.ticks = 0
+        self.commands_sent = 0
+        self.overruns = 0  # Ticks that started a full period late
+        self.timeouts = 0
+        self._jitter_mean = 0.0
+        self._jitter_m2 = 0.0
+        self._jitter_max = 0.0
+        self._recent_jitter = deque(maxlen=1000)
+
+    # ------------------------------------------------------------------
+    # Mailbox
+    # ------------------------------------------------------------------
+
+    def post_wheel_speeds(self, right_rps, left_rps):
+        """Post a wheel speed target (RPS, positive = forward)"""
+        self._mailbox = (float(right_rps), float(left_rps), self.clock.monotonic())
+
+    def post_velocity(self, linear_mps, angular_radps, track_width=TRACK_WIDTH, wheel_diameter=WHEEL_DIAMETER):
+        """Post a body velocity target (m/s, rad/s)"""
+        right_rps, left_rps = velocity_to_wheel_speeds(linear_mps, angular_radps, track_width, wheel_diameter)
+        self.post_wheel_speeds(right_rps, left_rps)
+
+    def post_stop(self):
+        """Post a stop target"""
+        self.post_wheel_speeds(0.0, 0.0)
+
+    # ------------------------------------------------------------------
+    # Loop
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start the control loop thread"""
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="control-loop", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the loop thread and the motors"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self._mailbox = None
+        self.mc.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def run_for(self, seconds):
+        """Run the loop on the calling thread for `seconds` of clock time (no thread)"""
+        self._running = True
+        try:
+            self._run(self.clock.monotonic() + seconds)
+        finally:
+            self._running = False
+
+    def _run(self, until=None):
+        clock = self.clock
+        next_tick = clock.monotonic()
+        while self._running and (until is None or next_tick < until):
+            now = clock.monotonic()
+            if now < next_tick:
+                clock.sleep(next_tick - now)
+                now = clock.monotonic()
+            self._record_jitter(now - next_tick)
+            if now - next_tick >= self.period:
+                # Fell behind - skip missed ticks instead of bursting
+                self.overruns += 1
+                next_tick = now
+            next_tick += self.period
+            self.tick(now)
+
+    def tick(self, now):
+        """Run one control step: send the mailbox target if it changed"""
+        self.ticks += 1
+        target = self._mailbox
+        if target is None:
+            return
+        right_rps, left_rps, posted = target
+        if self.command_timeout is not None and now - posted > self.command_timeout:
+            if target is not self._expired and (right_rps != 0.0 or left_rps != 0.0):
+                self._expired = target
+                self.timeouts += 1
+            right_rps = left_rps = 0.0
+
+        # last_speeds holds motor values, left wheel inverted
+        last_right, last_left = self.mc.last_speeds
+        if LEFT_MOTOR_INVERTED:
+            last_left = -last_left
+
+        changed = (abs(right_rps - last_right) > self.deadband or
+                   abs(left_rps - last_left) > self.deadband)
+        stopping = right_rps == 0.0 and left_rps == 0.0 and (last_right != 0.0 or last_left != 0.0)
+        if changed or stopping:
+            if right_rps == 0.0 and left_rps == 0.0:
+                self.mc.stop()
+            else:
+                self.mc.set_wheel_speeds(right_rps, left_rps)
+            self.commands_sent += 1
+
+    # ------------------------------------------------------------------
+    # Jitter statistics
+    # ------------------------------------------------------------------
+
+    def _record_jitter(self, lateness):
+        n = self.ticks + 1
+        delta = lateness - self._jitter_mean
+        self._jitter_mean += delta / n
+        self._jitter_m2 += delta * (lateness - self._jitter_mean)
+        self._jitter_max = max(self._jitter_max, lateness)
+        self._recent_jitter.append(lateness)
+
+    def jitter_stats(self):
+        """
+        Tick lateness statistics in microseconds
+
+        Returns:
+            dict: ticks, mean, std, max, p99 (last 1000 ticks), overruns, commands_sent
+        """
+        recent = sorted(self._recent_jitter)
+        p99 = recent[min(len(recent) - 1, int(len(recent) * 0.99))] if recent else 0.0
+        std = math.sqrt(self._jitter_m2 / self.ticks) if self.ticks > 1 else 0.0
+        return {
+            "ticks": self.ticks,
+            "mean_us": self._jitter_mean * 1e6,
+            "std_us": std * 1e6,
+            "max_us": self._jitter_max * 1e6,
+            "p99_us": p99 * 1e6,
+            "overruns": self.overruns,
+            "commands_sent": self.commands_sent,
+        }
+
+
+# Simple test: bursty caller against the control loop
+if __name__ == '__main__':
+    import argparse
+    import random
+    from motor_controller import MotorController
+
+    parser = argparse.ArgumentParser(description="Fixed-rate control loop demo")
+    parser.add_argument("--port", default="/dev/ttyACM0")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE_HZ)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with MotorController(port=args.port, non_blocking_preactivate=True) as mc:
+        with ControlLoop(mc, rate_hz=args.rate, command_timeout=0.5) as loop:
+            posts = 0
+            end = time.monotonic() + args.seconds
+            while time.monotonic() < end:
+                # Perception-style bursts: many posts, then a gap
+                for _ in range(random.randint(1, 20)):
+                    loop.post_velocity(0.15, random.uniform(-0.2, 0.2))
+                    posts += 1
+                time.sleep(random.uniform(0.0, 0.1))
+            stats = loop.jitter_stats()
+
+    print(f"\nPosted {posts} targets, sent {stats['commands_sent']} commands")
+    print(f"Tick jitter: mean {stats['mean_us']:.0f} us, p99 {stats['p99_us']:.0f} us, "
+          f"max {stats['max_us']:.0f} us, overruns {stats['overruns']}")
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Fleet manager for several JetAcker boards on one host
+Drives N AsyncMotorControllers from a single event loop, with synchronized
+broadcast commands and per-robot health and latency metrics
+"""
+
+import sys
+import os
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hiwonder_protocol import HiwonderProtocol
+from async_motor_controller import AsyncMotorController
+from latency_metrics import LatencyHistogram, CommandInstrumentation
+from motor_controller import TRACK_WIDTH, WHEEL_DIAMETER, velocity_to_wheel_speeds
+
+STALE_AFTER = 0.5  # seconds without board frames before a robot is unhealthy
+LOW_BATTERY_VOLTAGE = 10.5  # volts, 3S LiPo
+
+
+class Robot:
+    """One board in the fleet: its controller, metrics and health state"""
+
+    def __init__(self, name, port, baudrate=1000000):
+        self.name = name
+        self.port = port
+        self.mc = AsyncMotorController(port=port, baudrate=baudrate)
+        self.metrics = CommandInstrumentation(measure_wire=False)
+        self.state = "disconnected"
+        self.error = None
+        self.battery_voltage = None
+        self.last_frame_ns = None
+        self.commands_failed = 0
+
+    def on_frame(self, payload, timestamp_ns):
+        self.last_frame_ns = timestamp_ns
+
+    def on_battery(self, payload, timestamp_ns):
+        self.last_frame_ns = timestamp_ns
+        millivolts = HiwonderProtocol.parse_battery(payload)
+        if millivolts is not None:
+            self.battery_voltage = millivolts / 1000.0
+
+    def health(self, now_ns=None):
+        """Health summary dict"""
+        now_ns = now_ns or time.monotonic_ns()
+        age = None if self.last_frame_ns is None else (now_ns - self.last_frame_ns) * 1e-9
+        problems = []
+        if self.state != "connected":
+            problems.append(self.state if self.error is None else f"{self.state}: {self.error}")
+        elif age is None or age > STALE_AFTER:
+            problems.append("no board frames")
+        if self.battery_voltage is not None and self.battery_voltage < LOW_BATTERY_VOLTAGE:
+            problems.append("low battery")
+        return {
+            "healthy": not problems,
+            "problems": problems,
+            "state": self.state,
+            "last_frame_age_s": age,
+            "battery_voltage": self.battery_voltage,
+            "frames_ok": self.mc.parser.frames_ok,
+            "frames_corrupt": self.mc.parser.frames_corrupt,
+            "commands_failed": self.commands_failed,
+            "motors_active": self.mc.motors_active,
+        }
+
+
+class FleetManager:
+    """
+    Drives several boards from one asyncio event loop
+
+    Every robot gets its own AsyncMotorController (non-blocking port I/O
+    through loop.add_reader/add_writer), so one process and one thread
+    serve the whole fleet. A robot that fails to connect or write is
+    marked unhealthy; the rest of the fleet carries on.
+
+    Broadcast commands are written to all ports back-to-back without
+    awaiting in between; robots leaving rest get their wake frames first
+    and their deferred commands from timers that fire in the same loop
+    iteration. The start skew (spread of the motion command write times
+    across robots) is reported per broadcast and kept in a histogram.
+
+    Example:
+        async with FleetManager(['/dev/ttyACM0', '/dev/ttyACM1']) as fleet:
+            await fleet.warm_up()
+            result = await fleet.broadcast_velocity(0.2, 0.0)
+            print(result['skew_us'])
+    """
+
+    def __init__(self, ports, names=None, baudrate=1000000):
+        names = names or [f"robot{i}" for i in range(len(ports))]
+        self.robots = {name: Robot(name, port, baudrate) for name, port in zip(names, ports)}
+        self.skew = LatencyHistogram()
+
+    # ------------------------------------------------------------------
+    # Connection
+    # ------------------------------------------------------------------
+
+    async def _connect_robot(self, robot):
+        try:
+            await robot.mc.connect()
+        except Exception as e:
+            robot.state = "failed"
+            robot.error = str(e)
+            print(f"{robot.name}: connect failed ({e})")
+            return
+        robot.state = "connected"
+        robot.error = None
+        for function in (HiwonderProtocol.FUNC_IMU, HiwonderProtocol.FUNC_MOTOR):
+            robot.mc.subscribe(function, robot.on_frame)
+        robot.mc.subscribe(HiwonderProtocol.FUNC_SYS, robot.on_battery)
+        robot.metrics.attach(robot.mc)
+
+    async def connect(self):
+        """Connect all robots concurrently (one 0.5 s settle for the fleet)"""
+        await asyncio.gather(*(self._connect_robot(r) for r in self.robots.values()))
+        return self
+
+    async def disconnect(self):
+        """Stop and disconnect all robots, including failed ones whose port is still open"""
+        robots = [r for r in self.robots.values() if r.mc.transport is not None and r.mc.transport.is_open]
+        await asyncio.gather(*(r.mc.disconnect() for r in robots), return_exceptions=True)
+        for robot in self.robots.values():
+            robot.state = "disconnected"
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.disconnect()
+
+    def connected(self):
+        return [r for r in self.robots.values() if r.state == "connected"]
+
+    async def warm_up(self):
+        """Warm up all robots concurrently"""
+        await asyncio.gather(*(r.mc.warm_up() for r in self.connected()), return_exceptions=True)
+
+    # ------------------------------------------------------------------
+    # Commands
+    # ------------------------------------------------------------------
+
+    def _failed(self, robot, error):
+        robot.commands_failed += 1
+        robot.state = "failed"
+        robot.error = str(error)
+
+    async def broadcast_wheel_speeds(self, right_rps, left_rps):
+        """
+        Send the same wheel speeds to every connected robot
+
+        Returns once every motion command has been written (after
+        pre-activation, if the robots were at rest).
+
+        Returns:
+            dict: robots commanded, skew_us (spread of motion command write
+                  times), per-robot latency_us from the call
+        """
+        robots = self.connected()
+        call_ns = time.perf_counter_ns()
+        call_mono_ns = time.monotonic_ns()
+        for robot in robots:
+            try:
+                robot.mc.send_wheel_speeds(right_rps, left_rps)
+            except Exception as e:
+                self._failed(robot, e)
+        robots = [r for r in robots if r.state == "connected"]
+
+        # Wait for deferred (pre-activated) commands to go out
+        if any(r.mc.command_pending for r in robots):
+            await asyncio.sleep(min(r.mc.pre_activate_delay for r in robots if r.mc.command_pending))
+            while any(r.mc.command_pending for r in robots):
+                await asyncio.sleep(0.001)
+        await asyncio.gather(*(r.mc.transport.drain() for r in robots), return_exceptions=True)
+
+        latency = {}
+        written = []
+        for robot in robots:
+            written_ns = robot.mc.command_written_ns
+            if written_ns is None or written_ns < call_ns:
+                continue
+            written.append(written_ns)
+            latency[robot.name] = (written_ns - call_ns) / 1e3
+            robot.metrics.record("broadcast", "write", written_ns - call_ns)
+            robot.metrics.command_sent("broadcast", call_ns, call_mono_ns + (written_ns - call_ns))
+        skew_ns = max(written) - min(written) if written else 0
+        if written:
+            self.skew.record(skew_ns)
+        return {"robots": len(written), "skew_us": skew_ns / 1e3, "latency_us": latency}
+
+    async def broadcast_velocity(self, linear_mps, angular_radps, track_width=TRACK_WIDTH,
+                                 wheel_diameter=WHEEL_DIAMETER):
+        """Send the same body velocity to every connected robot"""
+        right_rps, left_rps = velocity_to_wheel_speeds(linear_mps, angular_radps, track_width, wheel_diameter)
+        return await self.broadcast_wheel_speeds(right_rps, left_rps)
+
+    async def stop_all(self):
+        """Stop every connected robot"""
+        for robot in self.connected():
+            try:
+                robot.mc.send_wheel_speeds(0.0, 0.0)  # Also cancels a pending command
+            except Exception as e:
+                self._failed(robot, e)
+        await asyncio.gather(*(r.mc.transport.drain() for r in self.connected()), return_exceptions=True)
+
+    async def set_wheel_speeds(self, name, right_rps, left_rps):
+        """Command a single robot"""
+        robot = self.robots[name]
+        try:
+            await robot.mc.set_wheel_speeds(right_rps, left_rps)
+        except Exception as e:
+            self._failed(robot, e)
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def health(self):
+        """Health dict per robot"""
+        now_ns = time.monotonic_ns()
+        return {name: robot.health(now_ns) for name, robot in self.robots.items()}
+
+    def metrics(self):
+        """Fleet skew histogram and per-robot latency histograms"""
+        return {
+            "broadcast_skew": self.skew.to_dict(),
+            "robots": {name: robot.metrics.to_dict() for name, robot in self.robots.items()},
+        }
+
+    def report(self):
+        """Human-readable health and latency table"""
+        rows = [f"{'robot':<10} {'health':<8} {'battery':>8} {'age':>8} {'write p50':>10} "
+                f"{'write p99':>10} {'feedback p50':>13} {'corrupt':>8}"]
+        for name, health in self.health().items():
+            phases = self.robots[name].metrics.to_dict().get("broadcast", {})
+            write = phases.get("write", {})
+            feedback = phases.get("feedback", {})
+            battery = f"{health['battery_voltage']:.2f}V" if health["battery_voltage"] else "-"
+            age = f"{health['last_frame_age_s'] * 1000:.0f}ms" if health["last_frame_age_s"] is not None else "-"
+            rows.append(f"{name:<10} {'ok' if health['healthy'] else 'FAIL':<8} {battery:>8} {age:>8} "
+                        f"{write.get('p50_ns', 0) / 1e3:>8.0f}us {write.get('p99_ns', 0) / 1e3:>8.0f}us "
+                        f"{feedback.get('p50_ns', 0) / 1e3:>11.0f}us {health['frames_corrupt']:>8}")
+        skew = self.skew.to_dict()
+        rows.append(f"broadcast start skew: p50 {skew['p50_ns'] / 1e3:.0f} us, "
+                    f"p99 {skew['p99_ns'] / 1e3:.0f} us, max {skew['max_ns'] / 1e3:.0f} us "
+                    f"({skew['count']} broadcasts)")
+        return "\n".join(rows)
+
+
+# Drive several boards (or simulated boards) in lockstep
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Drive several robots from one process")
+    parser.add_argument("--ports", nargs="+", default=["/dev/ttyACM0"])
+    parser.add_argument("--simulate", type=int, default=0, help="Use N simulated boards instead of ports")
+    parser.add_argument("--cycles", type=int, default=5)
+    args = parser.parse_args()
+
+    sims = []
+    if args.simulate:
+        from board_simulator import BoardSimulator
+        sims = [BoardSimulator(seed=i).start() for i in range(args.simulate)]
+        args.ports = [sim.port for sim in sims]
+
+    async def main():
+        async with FleetManager(args.ports) as fleet:
+            await fleet.warm_up()
+            for cycle in range(args.cycles):
+                start = await fleet.broadcast_velocity(0.15, 0.0)
+                await asyncio.sleep(0.5)
+                update = await fleet.broadcast_velocity(0.15, 0.3)
+                await asyncio.sleep(0.3)
+                await fleet.stop_all()
+                await asyncio.sleep(0.3)
+                print(f"Cycle {cycle + 1}: {start['robots']} robots, start skew {start['skew_us']:.0f} us, "
+                      f"update skew {update['skew_us']:.0f} us")
+            print("\n" + fleet.report())
+
+    try:
+        asyncio.run(main())
+    finally:
+        for sim in sims:
+            sim.close()
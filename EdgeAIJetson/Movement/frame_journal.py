@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Binary journal of RRC frames and timed replay
+Records every frame sent to and received from the board with nanosecond
+timestamps, and re-sends recorded sessions with the original or scaled
+timing
+"""
+
+import sys
+import os
+import time
+import struct
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hiwonder_protocol import HiwonderProtocol
+
+# File layout:
+#   header: magic, version, wall-clock start (time.time_ns), monotonic start
+#   records: monotonic ns since start (int64), direction (uint8), length (uint16), frame bytes
+JOURNAL_MAGIC = b"RRCJ"
+JOURNAL_VERSION = 1
+HEADER = struct.Struct("<4sHqq")
+RECORD = struct.Struct("<qBH")
+
+DIRECTION_OUT = 0  # Host -> board
+DIRECTION_IN = 1  # Board -> host
+
+BUFFER_SIZE = 1 << 20  # bytes per buffer (two are preallocated)
+FLUSH_INTERVAL = 1.0  # seconds
+
+
+class FrameJournal:
+    """
+    Low-overhead binary recorder for RRC frames
+
+    Records are packed with struct.pack_into() into one of two
+    preallocated buffers; when the active buffer fills (or every
+    FLUSH_INTERVAL) it is handed to a background thread that writes it to
+    the file while recording continues in the other. If the writer falls a
+    whole buffer behind, records are dropped and counted rather than
+    blocking the motor path.
+
+    Example:
+        with FrameJournal("session.rrcj") as journal:
+            with MotorController(journal=journal) as mc, TelemetryReader(mc.ser) as reader:
+                journal.attach(reader)
+                ...
+    """
+
+    def __init__(self, path, buffer_size=BUFFER_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self._buffers = [bytearray(buffer_size), bytearray(buffer_size)]
+        self._active = 0
+        self._pos = 0
+        self._full = None  # (buffer index, length) waiting to be written
+        self._lock = threading.Lock()
+        self._flush = threading.Condition(self._lock)
+        self._file = None
+        self._thread = None
+        self._running = False
+        self._start_ns = 0
+        self._reader = None
+        self._handlers = {}
+
+        # Statistics
+        self.records = 0
+        self.records_dropped = 0
+        self.bytes_written = 0
+
+    def open(self):
+        """Create the file, write the header and start the flush thread"""
+        self._file = open(self.path, "wb")
+        self._start_ns = time.monotonic_ns()
+        self._file.write(HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION, time.time_ns(), self._start_ns))
+        self._running = True
+        self._thread = threading.Thread(target=self._run_flush, name="frame-journal", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Flush remaining records and close the file"""
+        if self._reader is not None:
+            self.detach()
+        with self._flush:
+            self._running = False
+            self._flush.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def record(self, direction, frame, timestamp_ns=None):
+        """
+        Append one frame
+
+        Args:
+            direction: DIRECTION_OUT or DIRECTION_IN
+            frame: Complete frame bytes
+            timestamp_ns: time.monotonic_ns() of the event (default: now)
+        """
+        if timestamp_ns is None:
+            timestamp_ns = time.monotonic_ns()
+        size = RECORD.size + len(frame)
+        with self._lock:
+            if self._pos + size > self.buffer_size:
+                if self._full is not None:
+                    # Writer is a whole buffer behind - don't block the caller
+                    self.records_dropped += 1
+                    return
+                self._swap()
+            buf = self._buffers[self._active]
+            RECORD.pack_into(buf, self._pos, timestamp_ns - self._start_ns, direction, len(frame))
+            start = self._pos + RECORD.size
+            buf[start:start + len(frame)] = frame
+            self._pos += size
+            self.records += 1
+
+    def record_out(self, frame):
+        """Record a frame written to the board"""
+        self.record(DIRECTION_OUT, frame)
+
+    def attach(self, reader):
+        """Record the board's frames from a TelemetryReader (all function codes)"""
+        self._reader = reader
+        self._handlers = {function: self._inbound_handler(function)
+                          for function in range(HiwonderProtocol.FUNC_RGB + 1)}
+        for function, handler in self._handlers.items():
+            reader.subscribe(function, handler)
+        return self
+
+    def detach(self):
+        for function, handler in self._handlers.items():
+            self._reader.unsubscribe(function, handler)
+        self._reader = None
+
+    def _inbound_handler(self, function):
+        def on_frame(payload, timestamp_ns):
+            self.record(DIRECTION_IN, HiwonderProtocol.build_frame(function, payload), timestamp_ns)
+        return on_frame
+
+    def _swap(self):
+        """Hand the active buffer to the flush thread (lock held)"""
+        self._full = (self._active, self._pos)
+        self._active ^= 1
+        self._pos = 0
+        self._flush.notify()
+
+    def _run_flush(self):
+        while True:
+            with self._flush:
+                if self._full is None and self._running:
+                    self._flush.wait(self.flush_interval)
+                if self._full is None and self._pos:
+                    self._swap()
+                full = self._full
+                running = self._running
+            if full is not None:
+                index, length = full
+                self._file.write(memoryview(self._buffers[index])[:length])
+                self._file.flush()
+                self.bytes_written += length
+                with self._flush:
+                    self._full = None
+            elif not running:
+                return
+
+
+def read_journal(path):
+    """
+    Load a journal
+
+    Returns:
+        tuple: (header dict, list of (t_ns, direction, frame bytes)), t_ns
+               relative to the start of recording
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, wall_ns, mono_ns = HEADER.unpack_from(data, 0)
+    if magic != JOURNAL_MAGIC:
+        raise ValueError(f"{path} is not a frame journal")
+    if version != JOURNAL_VERSION:
+        raise ValueError(f"Unsupported journal version {version}")
+
+    records = []
+    pos = HEADER.size
+    end = len(data)
+    while pos + RECORD.size <= end:
+        t_ns, direction, length = RECORD.unpack_from(data, pos)
+        pos += RECORD.size
+        if pos + length > end:
+            break  # Truncated by a crash mid-flush
+        records.append((t_ns, direction, data[pos:pos + length]))
+        pos += length
+    return {"version": version, "start_wall_ns": wall_ns, "start_monotonic_ns": mono_ns}, records
+
+
+class JournalReplayer:
+    """
+    Re-sends the outbound frames of a journal with their recorded timing
+
+    Frames go out against absolute deadlines (start + t / speed), sleeping
+    most of each gap and spinning the last spin_threshold seconds, so
+    lateness doesn't accumulate over a long session. speed=2.0 replays
+    twice as fast; speed=0 sends everything back-to-back.
+    """
+
+    def __init__(self, ser, speed=1.0, spin_threshold=0.0005):
+        self.ser = ser
+        self.speed = speed
+        self.spin_threshold = spin_threshold
+        self.lateness_ns = []
+
+    def _wait_until(self, deadline_ns):
+        remaining = (deadline_ns - time.monotonic_ns()) * 1e-9
+        if remaining > self.spin_threshold:
+            time.sleep(remaining - self.spin_threshold)
+        while time.monotonic_ns() < deadline_ns:
+            pass
+
+    def replay(self, records, journal=None):
+        """
+        Send the outbound records
+
+        Args:
+            records: (t_ns, direction, frame) list from read_journal()
+            journal: Optional FrameJournal recording the replayed frames
+
+        Returns:
+            dict: frames sent and lateness statistics (microseconds)
+        """
+        outbound = [(t_ns, frame) for t_ns, direction, frame in records if direction == DIRECTION_OUT]
+        self.lateness_ns = []
+        if not outbound:
+            return self.stats()
+        first = outbound[0][0]
+        start = time.monotonic_ns()
+        for t_ns, frame in outbound:
+            if self.speed > 0:
+                deadline = start + int((t_ns - first) / self.speed)
+                self._wait_until(deadline)
+            else:
+                deadline = time.monotonic_ns()
+            self.ser.write(frame)
+            sent = time.monotonic_ns()
+            if journal is not None:
+                journal.record(DIRECTION_OUT, frame, sent)
+            self.lateness_ns.append(sent - deadline)
+        return self.stats()
+
+    def stats(self):
+        lateness = sorted(self.lateness_ns)
+        if not lateness:
+            return {"frames_sent": 0}
+        return {
+            "frames_sent": len(lateness),
+            "mean_lateness_us": sum(lateness) / len(lateness) / 1e3,
+            "p99_lateness_us": lateness[min(len(lateness) - 1, int(len(lateness) * 0.99))] / 1e3,
+            "max_lateness_us": lateness[-1] / 1e3,
+        }
+
+
+def describe(record):
+    """One-line description of a journal record"""
+    t_ns, direction, frame = record
+    arrow = "->" if direction == DIRECTION_OUT else "<-"
+    function = frame[2] if len(frame) > 2 else None
+    payload = frame[4:-1]
+    text = frame.hex(" ")
+    if function == HiwonderProtocol.FUNC_MOTOR:
+        speeds = HiwonderProtocol.parse_motor_command(payload)
+        encoders = HiwonderProtocol.parse_encoder_report(payload)
+        if speeds is not None:
+            text = "motor " + " ".join(f"M{m}={rps:+.3f}" for m, rps in speeds)
+        elif encoders is not None:
+            text = "encoders " + " ".join(f"M{m}={rps:+.3f}" for m, _, rps in encoders)
+    elif function == HiwonderProtocol.FUNC_IMU and HiwonderProtocol.parse_imu(payload) is not None:
+        text = "imu " + " ".join(f"{v:+.2f}" for v in HiwonderProtocol.parse_imu(payload))
+    return f"{t_ns / 1e9:12.6f} {arrow} {text}"
+
+
+# Inspect or replay a journal
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or replay an RRC frame journal")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    dump = sub.add_parser("dump", help="Print records")
+    dump.add_argument("journal")
+    dump.add_argument("--outbound", action="store_true", help="Only frames sent to the board")
+
+    replay = sub.add_parser("replay", help="Re-send outbound frames with recorded timing")
+    replay.add_argument("journal")
+    replay.add_argument("--port", default="/dev/ttyACM0")
+    replay.add_argument("--simulate", action="store_true", help="Replay into board_simulator.py")
+    replay.add_argument("--speed", type=float, default=1.0, help="Time scale (2 = twice as fast, 0 = no waits)")
+    replay.add_argument("--record", help="Journal the replay session to this file")
+    args = parser.parse_args()
+
+    header, records = read_journal(args.journal)
+    if args.command == "dump":
+        out = sum(1 for r in records if r[1] == DIRECTION_OUT)
+        print(f"{len(records)} records ({out} outbound), recorded "
+              f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(header['start_wall_ns'] / 1e9))}")
+        for record in records:
+            if not args.outbound or record[1] == DIRECTION_OUT:
+                print(describe(record))
+        sys.exit(0)
+
+    from motor_controller import MotorController
+    from telemetry_reader import TelemetryReader
+
+    sim = None
+    if args.simulate:
+        from board_simulator import BoardSimulator
+        sim = BoardSimulator().start()
+        args.port = sim.port
+
+    journal = FrameJournal(args.record).open() if args.record else None
+    try:
+        mc = MotorController(port=args.port)
+        mc.connect()
+        with TelemetryReader(mc.ser) as reader:
+            if journal is not None:
+                journal.attach(reader)
+            stats = JournalReplayer(mc.ser, speed=args.speed).replay(records, journal)
+        mc.disconnect()
+    finally:
+        if journal is not None:
+            journal.close()
+        if sim is not None:
+            sim.close()
+
+    print(f"Replayed {stats['frames_sent']} frames at {args.speed}x")
+    if stats["frames_sent"]:
+        print(f"Lateness: mean {stats['mean_lateness_us']:.0f} us, "
+              f"p99 {stats['p99_lateness_us']:.0f} us, max {stats['max_lateness_us']:.0f} us")
@@ -55,6 +55,35 @@ class HiwonderProtocol:
     FUNC_OLED = 10
     FUNC_RGB = 11
 
+    # Sub-commands
+    MOTOR_SUB_SET_SPEED = 0x01
+    MOTOR_SUB_ENCODER_REPORT = 0x10  # Board -> host (simulator / patched firmware)
+    SYS_SUB_BATTERY = 0x04
+    RGB_SUB_SET = 0x01
+    BUS_SERVO_SET_POSITION = 0x01
+    BUS_SERVO_READ_POSITION = 0x05
+    BUS_SERVO_READ_VIN = 0x07
+    BUS_SERVO_READ_TEMP = 0x09
+
+    # Remote control reports (board -> host)
+    GAMEPAD_FORMAT = "<HB4b"  # buttons bitmask, hat, lx, ly, rx, ry
+    GAMEPAD_HAT_CENTER = 0x0F
+    SBUS_FORMAT = "<16hBBBB"  # 16 channels, ch17, ch18, signal loss, failsafe
+    SBUS_MIN = 192  # Raw channel value at full negative stick
+    SBUS_MAX = 1792
+
+    # Status display
+    RGB_PIXELS = 2  # RGB LEDs on the RRC Lite board, 1-indexed
+    OLED_LINES = 2  # Text lines on the OLED, 1-indexed
+    OLED_LINE_CHARS = 21  # 128 px / 6 px font
+
+    # Value format of each bus servo read response
+    BUS_SERVO_READ_FORMATS = {
+        BUS_SERVO_READ_POSITION: "<h",  # 0-1000
+        BUS_SERVO_READ_VIN: "<H",  # millivolts
+        BUS_SERVO_READ_TEMP: "<B",  # degrees C
+    }
+
     @staticmethod
     def build_frame(function, data):
         """
@@ -132,6 +161,337 @@ class HiwonderProtocol:
             data.extend(struct.pack("<BH", servo_id, position))
         return HiwonderProtocol.build_frame(HiwonderProtocol.FUNC_PWM_SERVO, data)
 
+    @staticmethod
+    def bus_servo_set_position(duration, positions):
+        """
+        Create bus servo position command
+
+        Args:
+            duration: Movement duration in seconds
+            positions: List of [servo_id, position] pairs
+                      servo_id: 1-253
+                      position: 0-1000
+        """
+        duration = int(duration * 1000)
+        data = [HiwonderProtocol.BUS_SERVO_SET_POSITION,
+                duration & 0xFF, 0xFF & (duration >> 8), len(positions)]
+        for servo_id, position in positions:
+            data.extend(struct.pack("<BH", servo_id, int(position)))
+        return HiwonderProtocol.build_frame(HiwonderProtocol.FUNC_BUS_SERVO, data)
+
+    @staticmethod
+    def bus_servo_read(servo_id, read_cmd):
+        """
+        Create bus servo read request
+
+        Args:
+            servo_id: Servo ID (1-253)
+            read_cmd: BUS_SERVO_READ_POSITION, BUS_SERVO_READ_VIN or
+                      BUS_SERVO_READ_TEMP
+        """
+        return HiwonderProtocol.build_frame(HiwonderProtocol.FUNC_BUS_SERVO,
+                                            [int(read_cmd), int(servo_id)])
+
+    @staticmethod
+    def bus_servo_response(servo_id, read_cmd, value, success=True):
+        """Create bus servo read response frame (board -> host)"""
+        data = struct.pack("<BBb", servo_id, read_cmd, 0 if success else -1)
+        if success:
+            data += struct.pack(HiwonderProtocol.BUS_SERVO_READ_FORMATS[read_cmd], int(value))
+        return HiwonderProtocol.build_frame(HiwonderProtocol.FUNC_BUS_SERVO, data)
+
+    @staticmethod
+    def parse_bus_servo_response(data):
+        """
+        Decode bus servo read response payload
+
+        Returns:
+            tuple: (servo_id, read_cmd, value); value is None if the servo
+                   reported failure. Returns None if the payload is malformed.
+        """
+        if len(data) < 3:
+            return None
+        servo_id, read_cmd, status = struct.unpack_from("<BBb", data)
+        fmt = HiwonderProtocol.BUS_SERVO_READ_FORMATS.get(read_cmd)
+        if fmt is None:
+            return None
+        if status != 0:
+            return servo_id, read_cmd, None
+        if len(data) != 3 + struct.calcsize(fmt):
+            return None
+        return servo_id, read_cmd, struct.unpack_from(fmt, data, 3)[0]
+
+    @staticmethod
+    def parse_motor_command(data):
+        """
+        Decode the payload of a motor control frame
+
+        Args:
+            data: Payload of a FUNC_MOTOR frame (without header/checksum)
+
+        Returns:
+            list: [motor_id, rps] pairs (motor_id 1-4), or None if the
+                  payload is not a set-speed command
+        """
+        if len(data) < 2 or data[0] != HiwonderProtocol.MOTOR_SUB_SET_SPEED:
+            return None
+        count = data[1]
+        if len(data) < 2 + count * 5:
+            return None
+        speeds = []
+        for i in range(count):
+            offset = 2 + i * 5
+            rps = struct.unpack_from("<f", data, offset + 1)[0]
+            speeds.append([data[offset] + 1, rps])
+        return speeds
+
+    @staticmethod
+    def rgb_command(pixels):
+        """
+        Create RGB LED command
+
+        Args:
+            pixels: List of [index, r, g, b]
+                    index: LED number, 1-RGB_PIXELS
+                    r, g, b: 0-255
+        """
+        data = [HiwonderProtocol.RGB_SUB_SET, len(pixels)]
+        for index, r, g, b in pixels:
+            data.extend(struct.pack("<BBBB", int(index - 1), int(r), int(g), int(b)))
+        return HiwonderProtocol.build_frame(HiwonderProtocol.FUNC_RGB, data)
+
+    @staticmethod
+    def parse_rgb_command(data):
+        """
+        Decode RGB LED command payload
+
+        Returns:
+            list: [index, r, g, b] per LED (index 1-based), or None if malformed
+        """
+        if len(data) < 2 or data[0] != HiwonderProtocol.RGB_SUB_SET or len(data) != 2 + data[1] * 4:
+            return None
+        return [[index + 1, r, g, b] for index, r, g, b in struct.iter_unpack("<BBBB", data[2:])]
+
+    @staticmethod
+    def oled_text_command(line, text):
+        """
+        Create OLED text command
+
+        Args:
+            line: Text line, 1-OLED_LINES
+            text: Replaces the whole line (UTF-8, at most 255 bytes)
+        """
+        encoded = text.encode("utf-8")[:255]
+        return HiwonderProtocol.build_frame(HiwonderProtocol.FUNC_OLED, bytes([int(line), len(encoded)]) + encoded)
+
+    @staticmethod
+    def parse_oled_command(data):
+        """
+        Decode OLED text command payload
+
+        Returns:
+            tuple: (line, text), or None if malformed
+        """
+        if len(data) < 2 or len(data) != 2 + data[1]:
+            return None
+        return data[0], bytes(data[2:]).decode("utf-8", errors="replace")
+
+    @staticmethod
+    def imu_report(ax, ay, az, gx, gy, gz):
+        """
+        Create IMU report frame (board -> host)
+
+        Args:
+            ax, ay, az: Acceleration in m/s^2
+            gx, gy, gz: Angular rate in rad/s
+        """
+        data = struct.pack("<6f", ax, ay, az, gx, gy, gz)
+        return HiwonderProtocol.build_frame(HiwonderProtocol.FUNC_IMU, data)
+
+    @staticmethod
+    def parse_imu(data):
+        """
+        Decode IMU report payload
+
+        Returns:
+            tuple: (ax, ay, az, gx, gy, gz), or None if the payload is malformed
+        """
+        if len(data) != 24:
+            return None
+        return struct.unpack("<6f", data)
+
+    @staticmethod
+    def battery_report(millivolts):
+        """Create battery voltage report frame (board -> host)"""
+        data = struct.pack("<BH", HiwonderProtocol.SYS_SUB_BATTERY, int(millivolts))
+        return HiwonderProtocol.build_frame(HiwonderProtocol.FUNC_SYS, data)
+
+    @staticmethod
+    def parse_battery(data):
+        """
+        Decode battery report payload
+
+        Returns:
+            int: Battery voltage in millivolts, or None if not a battery report
+        """
+        if len(data) != 3 or data[0] != HiwonderProtocol.SYS_SUB_BATTERY:
+            return None
+        return struct.unpack_from("<H", data, 1)[0]
+
+    @staticmethod
+    def gamepad_report(buttons, hat, lx, ly, rx, ry):
+        """
+        Create gamepad report frame (board -> host)
+
+        Args:
+            buttons: Bitmask, bit n = button n pressed
+            hat: D-pad direction 0-7 (clockwise from up) or GAMEPAD_HAT_CENTER
+            lx, ly, rx, ry: Stick axes, -128..127
+        """
+        data = struct.pack(HiwonderProtocol.GAMEPAD_FORMAT, buttons, hat, lx, ly, rx, ry)
+        return HiwonderProtocol.build_frame(HiwonderProtocol.FUNC_GAMEPAD, data)
+
+    @staticmethod
+    def parse_gamepad(data):
+        """
+        Decode gamepad report payload
+
+        Returns:
+            tuple: (buttons, hat, lx, ly, rx, ry), or None if malformed
+        """
+        if len(data) != struct.calcsize(HiwonderProtocol.GAMEPAD_FORMAT):
+            return None
+        return struct.unpack(HiwonderProtocol.GAMEPAD_FORMAT, data)
+
+    @staticmethod
+    def sbus_report(channels, signal_loss=False, failsafe=False):
+        """
+        Create SBUS receiver report frame (board -> host)
+
+        Args:
+            channels: 16 raw channel values (SBUS_MIN..SBUS_MAX, 992 = center)
+                      followed optionally by the digital channels 17 and 18
+        """
+        channels = list(channels) + [0] * (18 - len(channels))
+        data = struct.pack(HiwonderProtocol.SBUS_FORMAT, *channels[:16], channels[16], channels[17],
+                           int(signal_loss), int(failsafe))
+        return HiwonderProtocol.build_frame(HiwonderProtocol.FUNC_SBUS, data)
+
+    @staticmethod
+    def parse_sbus(data):
+        """
+        Decode SBUS report payload
+
+        Returns:
+            tuple: (channels[16], signal_loss, failsafe), or None if malformed
+        """
+        if len(data) != struct.calcsize(HiwonderProtocol.SBUS_FORMAT):
+            return None
+        values = struct.unpack(HiwonderProtocol.SBUS_FORMAT, data)
+        return values[:16], bool(values[18]), bool(values[19])
+
+    @staticmethod
+    def encoder_report(encoders):
+        """
+        Create encoder report frame (board -> host)
+
+        The stock STM32 firmware does not stream encoder values; this
+        frame is emitted by board_simulator.py and by patched firmware.
+
+        Args:
+            encoders: List of [motor_id, ticks, rps] entries
+                      motor_id: 1-4
+                      ticks: cumulative encoder count (int32, wraps)
+                      rps: measured wheel speed in rotations per second
+        """
+        data = [HiwonderProtocol.MOTOR_SUB_ENCODER_REPORT, len(encoders)]
+        for motor_id, ticks, rps in encoders:
+            ticks = (int(ticks) + 2**31) % 2**32 - 2**31
+            data.append(int(motor_id - 1))
+            data.extend(struct.pack("<if", ticks, float(rps)))
+        return HiwonderProtocol.build_frame(HiwonderProtocol.FUNC_MOTOR, data)
+
+    @staticmethod
+    def parse_encoder_report(data):
+        """
+        Decode encoder report payload
+
+        Returns:
+            list: [motor_id, ticks, rps] entries (motor_id 1-4), or None if
+                  the payload is not an encoder report
+        """
+        if len(data) < 2 or data[0] != HiwonderProtocol.MOTOR_SUB_ENCODER_REPORT:
+            return None
+        count = data[1]
+        if len(data) != 2 + count * 9:
+            return None
+        encoders = []
+        for i in range(count):
+            offset = 2 + i * 9
+            ticks, rps = struct.unpack_from("<if", data, offset + 1)
+            encoders.append([data[offset] + 1, ticks, rps])
+        return encoders
+
+
+class FrameParser:
+    """
+    Incremental parser for RRC frames arriving on a byte stream
+
+    Bytes can be fed in arbitrary chunks; complete frames are returned as
+    (function, payload) tuples. Frames with a bad checksum are counted and
+    the parser resynchronises on the next header.
+    """
+
+    HEADER = bytes([HiwonderProtocol.FRAME_HEADER_1, HiwonderProtocol.FRAME_HEADER_2])
+
+    def __init__(self):
+        self._buf = bytearray()
+        self.frames_ok = 0
+        self.frames_corrupt = 0
+        self.bytes_skipped = 0
+
+    def feed(self, data):
+        """
+        Add received bytes and extract all complete frames
+
+        Args:
+            data: bytes read from the serial port
+
+        Returns:
+            list: (function, payload) tuples in arrival order
+        """
+        buf = self._buf
+        buf += data
+        frames = []
+        pos = 0
+        size = len(buf)
+        while True:
+            start = buf.find(self.HEADER, pos)
+            if start < 0:
+                # Keep a trailing first header byte, the second may follow
+                keep = 1 if size > pos and buf[-1] == HiwonderProtocol.FRAME_HEADER_1 else 0
+                self.bytes_skipped += size - pos - keep
+                pos = size - keep
+                break
+            self.bytes_skipped += start - pos
+            if size - start < 5:
+                pos = start
+                break
+            end = start + 5 + buf[start + 3]
+            if end > size:
+                pos = start
+                break
+            if checksum_crc8(buf[start + 2:end - 1]) != buf[end - 1]:
+                self.frames_corrupt += 1
+                self.bytes_skipped += 1
+                pos = start + 1
+                continue
+            frames.append((buf[start + 2], bytes(buf[start + 4:end - 1])))
+            self.frames_ok += 1
+            pos = end
+        del buf[:pos]
+        return frames
+
 
 # Utility functions
 def meters_per_sec_to_rps(speed_mps, wheel_diameter=0.067):
@@ -19,6 +19,8 @@ def identify_gear_ratio():
     print("  • 1:30 → 280 RPM (moderate)")
     print("  • 1:60 → 146 RPM (good torque)")
     print("  • 1:90 → 85 RPM (high torque)")
+    print("\nBoards that stream encoder reports can skip the stopwatch:")
+    print("  python3 motor_characterization.py")
     print("\n" + "="*70)
     print("PREPARATION:")
     print("="*70)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+IMU stream subscriber
+Decodes FUNC_IMU frames into preallocated, timestamped NumPy ring buffers
+for heading hold and vibration monitoring at the board's full rate
+"""
+
+import sys
+import os
+import time
+from collections import namedtuple
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hiwonder_protocol import HiwonderProtocol
+
+IMU_RATE_HZ = 100  # Nominal board streaming rate
+
+ImuWindow = namedtuple("ImuWindow", ["first_index", "t_ns", "accel", "gyro"])
+
+
+class ImuSubscriber:
+    """
+    IMU frame consumer backed by mirrored ring buffers
+
+    Every sample is written twice (at i and i + capacity), so the most
+    recent n <= capacity samples are always one contiguous slice. window()
+    therefore returns read-only NumPy views without copying. A view stays
+    valid until (capacity - n) further samples arrive; compare `count`
+    before and after use, or copy, if the data must outlive that.
+
+    Example:
+        imu = ImuSubscriber()
+        imu.attach(reader)  # TelemetryReader
+        t_ns, accel, gyro = imu.window(seconds=0.5)[1:]
+    """
+
+    def __init__(self, capacity=8192, rate_hz=IMU_RATE_HZ):
+        self.capacity = int(capacity)
+        self.rate_hz = rate_hz
+        self._t_ns = np.zeros(2 * self.capacity, dtype=np.int64)
+        self._accel = np.zeros((2 * self.capacity, 3), dtype=np.float32)
+        self._gyro = np.zeros((2 * self.capacity, 3), dtype=np.float32)
+        self.count = 0  # Total samples received
+        self.frames_corrupt = 0  # IMU frames with a malformed payload
+        self._first_ns = None
+        self._last_ns = None
+        self._reader = None
+
+    def attach(self, reader):
+        """Subscribe to IMU frames from a TelemetryReader"""
+        self._reader = reader
+        reader.subscribe(HiwonderProtocol.FUNC_IMU, self.on_frame)
+        return self
+
+    def detach(self):
+        """Stop receiving IMU frames"""
+        if self._reader is not None:
+            self._reader.unsubscribe(HiwonderProtocol.FUNC_IMU, self.on_frame)
+            self._reader = None
+
+    def on_frame(self, payload, timestamp_ns):
+        """Decode one FUNC_IMU payload into the ring buffers"""
+        values = HiwonderProtocol.parse_imu(payload)
+        if values is None:
+            self.frames_corrupt += 1
+            return
+        i = self.count % self.capacity
+        j = i + self.capacity
+        self._t_ns[i] = self._t_ns[j] = timestamp_ns
+        self._accel[i] = self._accel[j] = values[:3]
+        self._gyro[i] = self._gyro[j] = values[3:]
+        if self._first_ns is None:
+            self._first_ns = timestamp_ns
+        self._last_ns = timestamp_ns
+        # Publish only after the sample is fully written
+        self.count += 1
+
+    @property
+    def frames_dropped(self):
+        """
+        Estimated frames lost between board and subscriber
+
+        Derived from the nominal rate and the time span of received frames,
+        so it tolerates frames read in bursts.
+        """
+        if self._first_ns is None:
+            return 0
+        expected = round((self._last_ns - self._first_ns) * 1e-9 * self.rate_hz) + 1
+        return max(0, expected - self.count)
+
+    @property
+    def link_corrupt(self):
+        """Frames of any type rejected by the reader's checksum check"""
+        return self._reader.parser.frames_corrupt if self._reader is not None else 0
+
+    def window(self, n=None, seconds=None):
+        """
+        Zero-copy view of the most recent samples
+
+        Args:
+            n: Number of samples (default: all available, up to capacity)
+            seconds: Alternatively, the time span to cover at rate_hz
+
+        Returns:
+            ImuWindow: (first_index, t_ns[n], accel[n, 3], gyro[n, 3])
+                       first_index is the sample number of row 0
+        """
+        count = self.count
+        if seconds is not None:
+            n = int(round(seconds * self.rate_hz))
+        available = min(count, self.capacity)
+        n = available if n is None else max(0, min(int(n), available))
+        start = (count - n) % self.capacity
+        views = []
+        for array in (self._t_ns, self._accel, self._gyro):
+            view = array[start:start + n]
+            view.flags.writeable = False
+            views.append(view)
+        return ImuWindow(count - n, *views)
+
+    def latest(self):
+        """Most recent sample as (t_ns, accel, gyro), or None if empty"""
+        if self.count == 0:
+            return None
+        _, t_ns, accel, gyro = self.window(1)
+        return int(t_ns[0]), accel[0].copy(), gyro[0].copy()
+
+    def vibration_rms(self, seconds=1.0):
+        """RMS of the de-meaned acceleration magnitude over the last `seconds`"""
+        accel = self.window(seconds=seconds).accel
+        if len(accel) < 2:
+            return 0.0
+        magnitude = np.linalg.norm(accel, axis=1)
+        return float(np.sqrt(np.mean((magnitude - magnitude.mean()) ** 2)))
+
+    def stats(self):
+        """Counters as a dict"""
+        return {
+            "received": self.count,
+            "dropped": self.frames_dropped,
+            "corrupt": self.frames_corrupt,
+            "link_corrupt": self.link_corrupt,
+        }
+
+
+# Simple test against the real board (or board_simulator.py)
+if __name__ == '__main__':
+    import argparse
+    from motor_controller import MotorController
+    from telemetry_reader import TelemetryReader
+
+    parser = argparse.ArgumentParser(description="Stream IMU data into ring buffers")
+    parser.add_argument("--port", default="/dev/ttyACM0")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with MotorController(port=args.port) as mc, TelemetryReader(mc.ser) as reader:
+        imu = ImuSubscriber().attach(reader)
+        for _ in range(int(args.seconds)):
+            time.sleep(1.0)
+            sample = imu.latest()
+            if sample is None:
+                print("  no IMU data yet")
+                continue
+            _, accel, gyro = sample
+            print(f"  accel={np.round(accel, 2)} gyro={np.round(gyro, 3)} "
+                  f"vibration={imu.vibration_rms():.3f} m/s^2")
+        print(f"\nIMU stats: {imu.stats()}")
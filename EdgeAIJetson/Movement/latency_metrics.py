@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Per-command latency instrumentation for MotorController
+HDR-style histograms of each command phase, exported as JSON or as a
+text metrics file
+"""
+
+import sys
+import os
+import json
+import math
+import time
+import threading
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hiwonder_protocol import HiwonderProtocol
+
+
+class LatencyHistogram:
+    """
+    Log-linear (HDR-style) histogram of nanosecond latencies
+
+    Values below 2^k are counted exactly; above that every power-of-two
+    range is split into 2^(k-1) buckets, giving a constant relative error
+    of about 1 / 2^(k-1). k is chosen from `significant_figures`. Recording
+    is an integer bit_length/shift and a list increment.
+    """
+
+    def __init__(self, highest_ns=60 * 10**9, significant_figures=2):
+        self.sub_bits = math.ceil(math.log2(2 * 10**significant_figures))
+        self.sub_count = 1 << self.sub_bits
+        self.half_count = self.sub_count >> 1
+        self.highest_ns = int(highest_ns)
+        max_shift = max(0, self.highest_ns.bit_length() - self.sub_bits)
+        self.counts = [0] * (self.sub_count + max_shift * self.half_count)
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+
+    def _index(self, value):
+        if value < self.sub_count:
+            return value
+        shift = value.bit_length() - self.sub_bits
+        return self.sub_count + (shift - 1) * self.half_count + (value >> shift) - self.half_count
+
+    def _bucket_range(self, index):
+        if index < self.sub_count:
+            return index, index
+        shift = (index - self.sub_count) // self.half_count + 1
+        top = (index - self.sub_count) % self.half_count + self.half_count
+        return top << shift, ((top + 1) << shift) - 1
+
+    def record(self, value_ns):
+        """Record one latency in nanoseconds (clamped to [0, highest_ns])"""
+        value = min(max(int(value_ns), 0), self.highest_ns)
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total_ns += value
+        if self.min_ns is None or value < self.min_ns:
+            self.min_ns = value
+        if value > self.max_ns:
+            self.max_ns = value
+
+    def percentile(self, p):
+        """Latency (ns) at percentile p (0-100), bucket midpoint"""
+        if self.count == 0:
+            return 0
+        rank = max(1, math.ceil(self.count * p / 100.0))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                low, high = self._bucket_range(index)
+                return min((low + high) // 2, self.max_ns)
+        return self.max_ns
+
+    @property
+    def mean_ns(self):
+        return self.total_ns / self.count if self.count else 0.0
+
+    def to_dict(self):
+        """Summary plus non-empty buckets as [low_ns, high_ns, count]"""
+        buckets = []
+        for index, n in enumerate(self.counts):
+            if n:
+                low, high = self._bucket_range(index)
+                buckets.append([low, high, n])
+        return {
+            "count": self.count,
+            "min_ns": self.min_ns or 0,
+            "max_ns": self.max_ns,
+            "mean_ns": round(self.mean_ns),
+            "p50_ns": self.percentile(50),
+            "p90_ns": self.percentile(90),
+            "p99_ns": self.percentile(99),
+            "p999_ns": self.percentile(99.9),
+            "buckets": buckets,
+        }
+
+
+class CommandInstrumentation:
+    """
+    Timestamps each phase of MotorController commands with perf_counter_ns
+
+    Command types:
+        start   - command leaving rest (pre-activated)
+        update  - command while motors are already active
+        stop    - stop()
+
+    Phases (all measured from the call):
+        build          - frames built
+        write          - write() returned (bytes handed to the OS)
+        wire           - output drained with flush() (bytes on the wire);
+                         only when measure_wire=True (latency studies),
+                         it adds a blocking drain to every command
+        deferred_write - non-blocking mode: delayed command written
+        feedback       - first board feedback frame after the command; needs
+                         attach(reader) and a board that streams encoder
+                         reports (simulator / patched firmware)
+
+    Example:
+        inst = CommandInstrumentation()
+        mc = MotorController(instrumentation=inst)
+        ...
+        inst.export_json("latency.json")
+    """
+
+    PHASES = ("build", "write", "wire", "deferred_write", "feedback")
+
+    def __init__(self, measure_wire=False, significant_figures=2):
+        self.measure_wire = measure_wire
+        self.significant_figures = significant_figures
+        self.histograms = {}  # (command_type, phase) -> LatencyHistogram
+        self._awaiting_feedback = deque(maxlen=64)  # (command_type, call_mono_ns)
+        self._lock = threading.Lock()
+        self._reader = None
+
+    def record(self, command_type, phase, latency_ns):
+        """Record one phase latency"""
+        key = (command_type, phase)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = LatencyHistogram(significant_figures=self.significant_figures)
+                self.histograms[key] = histogram
+            histogram.record(latency_ns)
+
+    def command_sent(self, command_type, call_perf_ns, call_mono_ns):
+        """
+        Record a completed call
+
+        Args:
+            call_perf_ns: perf_counter_ns() at the call
+            call_mono_ns: monotonic_ns() at the call (feedback timestamps
+                          from TelemetryReader use this clock)
+        """
+        if self._reader is not None:
+            self._awaiting_feedback.append((command_type, call_perf_ns, call_mono_ns))
+
+    def attach(self, reader):
+        """Measure the feedback phase from a TelemetryReader's motor reports"""
+        self._reader = reader
+        reader.subscribe(HiwonderProtocol.FUNC_MOTOR, self._on_feedback)
+        return self
+
+    def _on_feedback(self, payload, timestamp_ns):
+        if HiwonderProtocol.parse_encoder_report(payload) is None:
+            return
+        while self._awaiting_feedback:
+            command_type, _, call_mono_ns = self._awaiting_feedback[0]
+            if call_mono_ns > timestamp_ns:
+                break
+            self._awaiting_feedback.popleft()
+            self.record(command_type, "feedback", timestamp_ns - call_mono_ns)
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    def to_dict(self):
+        """Nested dict {command_type: {phase: histogram dict}}"""
+        result = {}
+        with self._lock:
+            for (command_type, phase), histogram in sorted(self.histograms.items()):
+                result.setdefault(command_type, {})[phase] = histogram.to_dict()
+        return result
+
+    def export_json(self, path):
+        """Write all histograms as JSON"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"unit": "ns", "timestamp": time.time(), "commands": self.to_dict()}, f, indent=2)
+
+    def export_text(self, path):
+        """
+        Write a text metrics file (Prometheus exposition format, summaries)
+        """
+        lines = [
+            "# HELP motor_command_latency_seconds MotorController command phase latency",
+            "# TYPE motor_command_latency_seconds summary",
+        ]
+        for command_type, phases in self.to_dict().items():
+            for phase, h in phases.items():
+                labels = f'command="{command_type}",phase="{phase}"'
+                for quantile, key in (("0.5", "p50_ns"), ("0.9", "p90_ns"),
+                                      ("0.99", "p99_ns"), ("0.999", "p999_ns")):
+                    lines.append(f'motor_command_latency_seconds{{{labels},quantile="{quantile}"}} '
+                                 f'{h[key] / 1e9:.9f}')
+                lines.append(f"motor_command_latency_seconds_sum{{{labels}}} "
+                             f"{h['mean_ns'] * h['count'] / 1e9:.9f}")
+                lines.append(f"motor_command_latency_seconds_count{{{labels}}} {h['count']}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def report(self):
+        """Human-readable table (microseconds)"""
+        rows = [f"{'command':<8} {'phase':<15} {'count':>6} {'p50':>10} {'p99':>10} {'max':>10}"]
+        for command_type, phases in self.to_dict().items():
+            for phase in self.PHASES:
+                h = phases.get(phase)
+                if h is None:
+                    continue
+                rows.append(f"{command_type:<8} {phase:<15} {h['count']:>6} "
+                            f"{h['p50_ns'] / 1e3:>8.1f}us {h['p99_ns'] / 1e3:>8.1f}us "
+                            f"{h['max_ns'] / 1e3:>8.1f}us")
+        return "\n".join(rows)
+
+
+# Latency profile of start/update/stop commands
+if __name__ == '__main__':
+    import argparse
+    from motor_controller import MotorController
+    from telemetry_reader import TelemetryReader
+
+    parser = argparse.ArgumentParser(description="MotorController command latency profile")
+    parser.add_argument("--port", default="/dev/ttyACM0")
+    parser.add_argument("--simulate", action="store_true", help="Run against board_simulator.py")
+    parser.add_argument("--cycles", type=int, default=10, help="Start/update/stop cycles")
+    parser.add_argument("--non-blocking", action="store_true", help="Non-blocking pre-activation")
+    parser.add_argument("--json", default="command_latency.json")
+    parser.add_argument("--text", default="command_latency.prom")
+    args = parser.parse_args()
+
+    sim = None
+    if args.simulate:
+        from board_simulator import BoardSimulator
+        sim = BoardSimulator().start()
+        args.port = sim.port
+
+    inst = CommandInstrumentation(measure_wire=True)
+    try:
+        with MotorController(port=args.port, non_blocking_preactivate=args.non_blocking,
+                             instrumentation=inst) as mc, TelemetryReader(mc.ser) as reader:
+            inst.attach(reader)
+            for _ in range(args.cycles):
+                mc.set_wheel_speeds(0.5, 0.5)
+                time.sleep(0.3)
+                for speed in (0.6, 0.7, 0.8):
+                    mc.set_wheel_speeds(speed, speed)
+                    time.sleep(0.05)
+                mc.stop()
+                time.sleep(0.2)
+    finally:
+        if sim is not None:
+            sim.close()
+
+    print("\n" + inst.report())
+    inst.export_json(args.json)
+    inst.export_text(args.text)
+    print(f"\nWrote {args.json} and {args.text}")
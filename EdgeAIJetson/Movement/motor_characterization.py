@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Automated motor characterization
+Sweeps wheel commands, measures the real wheel speed from encoder (or IMU)
+feedback, fits RPM per command unit and identifies the gear ratio
+Run with robot wheels OFF GROUND (encoder mode) or on a flat floor (IMU mode)
+"""
+
+import sys
+import os
+import math
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from motor_controller import TRACK_WIDTH, WHEEL_DIAMETER
+from speed_controller import EncoderFeedback
+from imu_subscriber import ImuSubscriber
+from robot_profile import save_profile_section
+
+# JGB37-520 rated output speed (RPM at 12 V) per gear ratio
+GEAR_RATIO_RATED_RPM = {20: 390, 30: 280, 60: 146, 90: 85}
+
+SWEEP_COMMANDS = (0.2, 0.35, 0.5, 0.65, 0.8, 1.0)
+SETTLE_TIME = 0.35  # seconds after each step before measuring
+MEASURE_TIME = 0.2  # seconds averaged per step
+
+
+def classify_gear_ratio(rpm_per_command):
+    """
+    Nearest gear ratio by rated RPM (compared on a log scale)
+
+    Returns:
+        tuple: (gear_ratio, relative deviation from its rated RPM)
+    """
+    ratio = min(GEAR_RATIO_RATED_RPM,
+                key=lambda r: abs(math.log(rpm_per_command / GEAR_RATIO_RATED_RPM[r])))
+    return ratio, rpm_per_command / GEAR_RATIO_RATED_RPM[ratio] - 1.0
+
+
+def fit_rps_per_command(commands, speeds):
+    """
+    Fit wheel speed against command
+
+    Returns:
+        tuple: (rps_per_command through the origin, min_start_command from
+               the intercept of a free line fit, RMS residual in RPS)
+    """
+    commands = np.asarray(commands, dtype=np.float64)
+    speeds = np.abs(np.asarray(speeds, dtype=np.float64))
+    moving = speeds > 0
+    commands, speeds = commands[moving], speeds[moving]
+    if len(commands) < 2:
+        raise RuntimeError("Wheels did not turn during the sweep - check battery and motor wiring")
+    gain = float(np.dot(commands, speeds) / np.dot(commands, commands))
+    slope, intercept = np.polyfit(commands, speeds, 1)
+    residual = float(np.sqrt(np.mean((speeds - gain * commands) ** 2)))
+    return gain, max(0.0, float(-intercept / slope)), residual
+
+
+def _average(sample, seconds):
+    """Average sample() taken every 10 ms for `seconds`"""
+    values = []
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        values.append(sample())
+        time.sleep(0.01)
+    return [float(v) for v in np.mean(values, axis=0)]
+
+
+def sweep(mc, reader, commands=SWEEP_COMMANDS, source="auto", settle=SETTLE_TIME, measure=MEASURE_TIME):
+    """
+    Step through commands and measure wheel speeds
+
+    Encoder mode drives both wheels forward and reads each wheel's speed.
+    IMU mode (for boards that don't stream encoders) spins the robot in
+    place and derives the average wheel speed from the gyro yaw rate.
+
+    Args:
+        mc: Connected MotorController (uncalibrated)
+        reader: Started TelemetryReader on mc.ser
+        source: "encoder", "imu" or "auto" (encoder if reports arrive)
+
+    Returns:
+        tuple: (source used, right speeds, left speeds) in RPS, one per command
+    """
+    feedback = EncoderFeedback().attach(reader)
+    imu = ImuSubscriber().attach(reader)
+    if source == "auto":
+        deadline = time.monotonic() + 0.3
+        while feedback.reports == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        source = "encoder" if feedback.reports else "imu"
+    if source == "imu" and imu.count == 0:
+        time.sleep(0.1)
+        if imu.count == 0:
+            raise RuntimeError("No encoder or IMU frames from the board")
+
+    right, left = [], []
+    try:
+        for command in commands:
+            if source == "encoder":
+                mc.set_wheel_speeds(command, command)
+                time.sleep(settle)
+                r, l = _average(lambda: (feedback.right_rps, feedback.left_rps), measure)
+            else:
+                mc.set_wheel_speeds(command, -command)
+                time.sleep(settle + measure)
+                # Same settle..settle+measure interval as the encoder average
+                yaw_rate = abs(float(imu.window(seconds=measure).gyro[:, 2].mean()))
+                # Spinning in place: each wheel moves at yaw_rate * track / 2
+                r = l = yaw_rate * TRACK_WIDTH / 2.0 / (math.pi * WHEEL_DIAMETER)
+            right.append(r)
+            left.append(l)
+    finally:
+        mc.stop()
+        feedback.detach(reader)
+        imu.detach()
+    return source, right, left
+
+
+def characterize(mc, reader, commands=SWEEP_COMMANDS, source="auto"):
+    """
+    Run the sweep and fit the calibration
+
+    Returns:
+        dict: Calibration (gear ratio, RPM per command, per-wheel RPS per
+              command, max speed, start command, fit quality, raw sweep)
+    """
+    source, right, left = sweep(mc, reader, commands, source)
+    right_gain, right_start, right_residual = fit_rps_per_command(commands, right)
+    left_gain, left_start, left_residual = fit_rps_per_command(commands, left)
+    rpm_per_command = (right_gain + left_gain) / 2.0 * 60.0
+    gear_ratio, deviation = classify_gear_ratio(rpm_per_command)
+    return {
+        "source": source,
+        "gear_ratio": gear_ratio,
+        "rated_rpm_deviation": round(deviation, 4),
+        "rpm_per_command": round(rpm_per_command, 2),
+        "right_rps_per_command": right_gain,
+        "left_rps_per_command": left_gain,
+        "max_rps": min(right[-1], left[-1]),
+        "min_start_command": max(right_start, left_start),
+        "fit_residual_rps": max(right_residual, left_residual),
+        "sweep": {"commands": list(commands), "right_rps": right, "left_rps": left},
+    }
+
+
+# Characterize the motors and store the calibration in the robot profile
+if __name__ == '__main__':
+    import argparse
+    from motor_controller import MotorController
+    from telemetry_reader import TelemetryReader
+    from robot_profile import load_calibration
+
+    parser = argparse.ArgumentParser(description="Identify gear ratio and RPM per command automatically")
+    parser.add_argument("--port", default="/dev/ttyACM0")
+    parser.add_argument("--simulate", action="store_true", help="Run against board_simulator.py")
+    parser.add_argument("--gear-ratio", type=int, default=90, choices=sorted(GEAR_RATIO_RATED_RPM),
+                        help="Simulator: gear ratio of the simulated motors")
+    parser.add_argument("--source", choices=("auto", "encoder", "imu"), default="auto")
+    parser.add_argument("--profile", help="Robot profile path (default: $JETACKER_PROFILE or ~/.config/jetacker)")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    sim = None
+    if args.simulate:
+        from board_simulator import BoardSimulator
+        sim = BoardSimulator(gear_ratio=args.gear_ratio).start()
+        args.port = sim.port
+
+    start = time.monotonic()
+    try:
+        with MotorController(port=args.port, non_blocking_preactivate=True) as mc, \
+                TelemetryReader(mc.ser) as reader:
+            calibration = characterize(mc, reader, source=args.source)
+
+            print(f"\nMeasured ({calibration['source']}):")
+            for command, r, l in zip(*calibration["sweep"].values()):
+                print(f"  command {command:4.2f} -> right {r:5.3f} RPS, left {l:5.3f} RPS")
+            print(f"\nRPM per command unit: {calibration['rpm_per_command']:.1f} "
+                  f"(fit residual {calibration['fit_residual_rps']:.4f} RPS)")
+            print(f"Gear ratio: 1:{calibration['gear_ratio']} "
+                  f"({calibration['rated_rpm_deviation'] * 100:+.1f}% from rated "
+                  f"{GEAR_RATIO_RATED_RPM[calibration['gear_ratio']]} RPM)")
+            print(f"Max wheel speed: {calibration['max_rps']:.3f} RPS "
+                  f"({calibration['max_rps'] * math.pi * WHEEL_DIAMETER:.2f} m/s)")
+
+            if not args.no_save:
+                path = save_profile_section("calibration", calibration, args.profile)
+                print(f"Saved calibration to {path}")
+
+                # Check: a calibrated controller should now hit requested speeds
+                mc.calibration = load_calibration(args.profile)
+                feedback = EncoderFeedback().attach(reader)
+                mc.set_wheel_speeds(0.5, 0.5)
+                time.sleep(SETTLE_TIME + 0.2)
+                if feedback.reports:
+                    print(f"Calibrated 0.5 RPS request -> right {feedback.right_rps:.3f}, "
+                          f"left {feedback.left_rps:.3f} RPS")
+                mc.stop()
+    finally:
+        if sim is not None:
+            sim.close()
+    print(f"Done in {time.monotonic() - start:.1f} s")
@@ -6,11 +6,15 @@ Eliminates delay between wheels
 
 import sys
 import os
+import math
 import time
+import threading
 import serial
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from hiwonder_protocol import HiwonderProtocol
+from serial_broker import BROKER_SCHEME, BrokerClient
+from clock import SYSTEM_CLOCK
 
 # Motor configuration
 RIGHT_MOTOR_ID = 2
@@ -22,25 +26,153 @@ PRE_ACTIVATE_THRESHOLD = 0.1  # RPS
 PRE_ACTIVATE_SPEED = 0.01  # Tiny speed to wake up motors
 PRE_ACTIVATE_DELAY = 0.1  # seconds
 
+# Robot physical dimensions
+TRACK_WIDTH = 0.133  # meters - distance between wheels
+WHEEL_DIAMETER = 0.067  # meters
+
+
+def velocity_to_wheel_speeds(linear_mps, angular_radps, track_width=TRACK_WIDTH, wheel_diameter=WHEEL_DIAMETER):
+    """
+    Differential drive kinematics
+
+    Args:
+        linear_mps: Linear velocity in m/s (positive = forward)
+        angular_radps: Angular velocity in rad/s (positive = counter-clockwise)
+        track_width: Distance between wheels in meters
+        wheel_diameter: Wheel diameter in meters
+
+    Returns:
+        tuple: (right_rps, left_rps), positive = forward
+    """
+    v_left_mps = linear_mps - angular_radps * track_width / 2.0
+    v_right_mps = linear_mps + angular_radps * track_width / 2.0
+
+    # Convert m/s to RPS
+    wheel_circumference = math.pi * wheel_diameter
+    return v_right_mps / wheel_circumference, v_left_mps / wheel_circumference
+
+
+def pre_activation_command(right_rps, left_rps, threshold=PRE_ACTIVATE_THRESHOLD, speed=PRE_ACTIVATE_SPEED):
+    """
+    Build the pre-activation frame for a command leaving rest
+
+    Args:
+        right_rps, left_rps: Motor speeds after inversion
+        threshold: Commands at or below this don't need pre-activation
+        speed: Wake-up speed
+
+    Returns:
+        bytes: Wake-up frame, or None if the command doesn't need one
+    """
+    if abs(right_rps) <= threshold and abs(left_rps) <= threshold:
+        return None
+
+    # Tiny speed to wake up motors
+    wake_right = speed if right_rps > 0 else (-speed if right_rps < 0 else 0)
+    wake_left = speed if left_rps > 0 else (-speed if left_rps < 0 else 0)
+    if wake_right == 0 and wake_left == 0:
+        return None
+    return HiwonderProtocol.motor_command([
+        [RIGHT_MOTOR_ID, wake_right],
+        [LEFT_MOTOR_ID, wake_left]
+    ])
+
 
 class MotorController:
     """
     Motor controller with automatic pre-activation to eliminate delays
+
+    With non_blocking_preactivate=True the wake-up frame is sent immediately
+    and the real command is sent by the clock's scheduler pre_activate_delay
+    later, so set_wheel_speeds() returns without sleeping. A newer command
+    issued while one is pending replaces it; stop() cancels it.
+
+    All waits and deferred sends go through `clock` (clock.py). The default
+    is real time; a VirtualClock together with a board_simulator.py
+    LoopbackSerial passed as `port` runs whole test sequences in
+    milliseconds (scenario_runner.py).
+
+    A port of the form 'broker://[socket path][?priority=N&name=...]'
+    connects through serial_broker.py instead of opening the device, so
+    several processes can share the board.
+
+    Pass instrumentation=CommandInstrumentation() (latency_metrics.py) to
+    record per-phase command latency histograms; when it is None the
+    command path only pays for a None check.
+
+    Pass journal=FrameJournal(path) (frame_journal.py) to record every
+    frame written to the board with its timestamp.
+
+    The pre-activation threshold, speed and delay default to the module
+    constants; pass pre_activation=load_pre_activation() (robot_profile.py)
+    to use the values found by preactivation_tuner.py.
+
+    Pass performance=load_performance() (robot_profile.py) to boost a
+    wheel leaving rest to at least its measured minimum start command
+    (test_minimum_speed.py), so slow requests don't leave it stuck in
+    static friction. Once turning, smaller commands pass through.
+
+    Pass calibration=load_calibration() (robot_profile.py) to command real
+    wheel speeds: each wheel's RPS is divided by its measured RPS per
+    command unit (motor_characterization.py). Without it the values are
+    sent to the board unscaled.
     """
 
-    def __init__(self, port='/dev/ttyACM0', baudrate=1000000):
+    def __init__(self, port='/dev/ttyACM0', baudrate=1000000, non_blocking_preactivate=False,
+                 instrumentation=None, journal=None, calibration=None, pre_activation=None, performance=None,
+                 clock=None):
         self.port = port
+        self.clock = clock or SYSTEM_CLOCK
         self.baudrate = baudrate
+        self.non_blocking_preactivate = non_blocking_preactivate
+        self.instrumentation = instrumentation
+        self.journal = journal
+        self.calibration = calibration
+        pre_activation = pre_activation or {}
+        self.pre_activate_threshold = pre_activation.get("threshold", PRE_ACTIVATE_THRESHOLD)
+        self.pre_activate_speed = pre_activation.get("speed", PRE_ACTIVATE_SPEED)
+        self.pre_activate_delay = pre_activation.get("delay", PRE_ACTIVATE_DELAY)
+        min_start = (performance or {}).get("min_start_command")
+        self.min_start_commands = (min_start["right"], min_start["left"]) if min_start else None
         self.ser = None
         self.last_speeds = [0.0, 0.0]  # [right, left] in RPS
         self.motors_active = False
+        self._write_lock = threading.Lock()
+        self._pending = threading.RLock()
+        self._pending_cmd = None
+        self._pending_call_ns = None
+        self._pending_timer = None
 
     def connect(self):
-        """Open serial connection"""
-        self.ser = serial.Serial(self.port, self.baudrate, timeout=1)
+        """
+        Open serial connection (or a serial_broker.py connection for
+        'broker://' ports). A port object with write() - e.g.
+        board_simulator.LoopbackSerial - is opened and used as is.
+        """
+        if hasattr(self.port, "write"):
+            self.ser = self.port
+            if not self.ser.is_open:
+                self.ser.open()
+            print("Connected to loopback port")
+            return
+
+        if self.port.startswith(BROKER_SCHEME):
+            # The broker already holds the port open - no settle delay
+            self.ser = BrokerClient.from_url(self.port)
+            self.ser.open()
+            print(f"Connected to {self.port}")
+            return
+
+        # Configure RTS/DTR before opening so the lines are never toggled
+        # (also lets the port be a pseudo-terminal, e.g. board_simulator.py)
+        self.ser = serial.Serial()
+        self.ser.port = self.port
+        self.ser.baudrate = self.baudrate
+        self.ser.timeout = 1
         self.ser.rts = False
         self.ser.dtr = False
-        time.sleep(0.5)
+        self.ser.open()
+        self.clock.sleep(0.5)
         print(f"Connected to {self.port} at {self.baudrate} baud")
 
     def warm_up(self):
@@ -57,28 +189,28 @@ class MotorController:
         # This ensures both motors are ready and responsive
 
         # Apply inversion for left motor
-        left_wake = -PRE_ACTIVATE_SPEED if LEFT_MOTOR_INVERTED else PRE_ACTIVATE_SPEED
-        right_wake = PRE_ACTIVATE_SPEED
+        left_wake = -self.pre_activate_speed if LEFT_MOTOR_INVERTED else self.pre_activate_speed
+        right_wake = self.pre_activate_speed
 
         # Forward pulse
         cmd = HiwonderProtocol.motor_command([
             [RIGHT_MOTOR_ID, right_wake],
             [LEFT_MOTOR_ID, left_wake]
         ])
-        self.ser.write(cmd)
-        time.sleep(0.3)
+        self._write(cmd)
+        self.clock.sleep(0.3)
 
         # Reverse pulse
         cmd = HiwonderProtocol.motor_command([
             [RIGHT_MOTOR_ID, -right_wake],
             [LEFT_MOTOR_ID, -left_wake]
         ])
-        self.ser.write(cmd)
-        time.sleep(0.3)
+        self._write(cmd)
+        self.clock.sleep(0.3)
 
         # Stop and settle
         self.stop()
-        time.sleep(0.2)
+        self.clock.sleep(0.2)
 
         # Mark motors as active (warm)
         self.motors_active = False  # Reset to allow pre-activation on first real command
@@ -86,11 +218,78 @@ class MotorController:
 
     def disconnect(self):
         """Close serial connection and stop motors"""
+        self._cancel_pending()
         if self.ser and self.ser.is_open:
             self.stop()
             self.ser.close()
             print("Motor controller disconnected")
 
+    def _write(self, cmd):
+        """Write a frame to the port (shared by caller and scheduler threads)"""
+        with self._write_lock:
+            self.ser.write(cmd)
+            if self.journal is not None:
+                self.journal.record_out(cmd)
+
+    def write_low_priority(self, frame):
+        """
+        Write a non-motor frame only if it can't delay a motor command
+
+        Skipped when another thread is writing, a pre-activated command is
+        waiting for its deferred send, or (pyserial) bytes are still queued
+        for the wire. Used by status_display.py for LEDs and the OLED.
+
+        Returns:
+            bool: True if the frame was written, False if the caller
+                  should retry later
+        """
+        if not self.ser or not self.ser.is_open or self._pending_cmd is not None:
+            return False
+        if not self._write_lock.acquire(blocking=False):
+            return False
+        try:
+            if getattr(self.ser, "out_waiting", 0):
+                return False
+            self.ser.write(frame)
+            if self.journal is not None:
+                self.journal.record_out(frame)
+        finally:
+            self._write_lock.release()
+        return True
+
+    def _to_commands(self, right_rps, left_rps):
+        """Convert wheel speeds to board command units using the calibration"""
+        if self.calibration is None:
+            return right_rps, left_rps
+        return (right_rps / self.calibration["right_rps_per_command"],
+                left_rps / self.calibration["left_rps_per_command"])
+
+    def _start_boost(self, right_cmd, left_cmd):
+        """Raise commands of wheels leaving rest to their minimum start command"""
+        if self.min_start_commands is None:
+            return right_cmd, left_cmd
+        boosted = []
+        for cmd, last, minimum in zip((right_cmd, left_cmd), self.last_speeds, self.min_start_commands):
+            if abs(last) <= 0.001 and 0.001 < abs(cmd) < minimum:
+                cmd = math.copysign(minimum, cmd)
+            boosted.append(cmd)
+        return tuple(boosted)
+
+    def _wake_command(self, right_rps, left_rps):
+        """
+        Build the pre-activation frame for a command, if one is needed
+
+        Args:
+            right_rps, left_rps: Motor speeds after inversion
+
+        Returns:
+            bytes: Wake-up frame, or None if no pre-activation is needed
+        """
+        # Pre-activate if motors were stopped and now need significant speed
+        if self.motors_active:
+            return None
+        return pre_activation_command(right_rps, left_rps, self.pre_activate_threshold, self.pre_activate_speed)
+
     def _send_command(self, right_rps, left_rps):
         """
         Send motor command with pre-activation if needed
@@ -102,40 +301,92 @@ class MotorController:
         if not self.ser or not self.ser.is_open:
             raise RuntimeError("Serial port not open")
 
+        inst = self.instrumentation
+        if inst is not None:
+            call_ns = time.perf_counter_ns()
+            call_mono_ns = time.monotonic_ns()
+
         # Apply left motor inversion
         if LEFT_MOTOR_INVERTED:
             left_rps = -left_rps
 
-        # Check if we need pre-activation
-        # Pre-activate if motors were stopped and now need significant speed
-        need_preactivate = False
-        if not self.motors_active:
-            if abs(right_rps) > PRE_ACTIVATE_THRESHOLD or abs(left_rps) > PRE_ACTIVATE_THRESHOLD:
-                need_preactivate = True
-
-        if need_preactivate:
-            # Send tiny speed to wake up motors
-            wake_right = PRE_ACTIVATE_SPEED if right_rps > 0 else (-PRE_ACTIVATE_SPEED if right_rps < 0 else 0)
-            wake_left = PRE_ACTIVATE_SPEED if left_rps > 0 else (-PRE_ACTIVATE_SPEED if left_rps < 0 else 0)
-
-            if wake_right != 0 or wake_left != 0:
-                cmd = HiwonderProtocol.motor_command([
-                    [RIGHT_MOTOR_ID, wake_right],
-                    [LEFT_MOTOR_ID, wake_left]
-                ])
-                self.ser.write(cmd)
-                time.sleep(PRE_ACTIVATE_DELAY)
-
-        # Send actual command
+        right_cmd, left_cmd = self._start_boost(*self._to_commands(right_rps, left_rps))
+        wake = self._wake_command(right_cmd, left_cmd)
         cmd = HiwonderProtocol.motor_command([
-            [RIGHT_MOTOR_ID, right_rps],
-            [LEFT_MOTOR_ID, left_rps]
+            [RIGHT_MOTOR_ID, right_cmd],
+            [LEFT_MOTOR_ID, left_cmd]
         ])
-        self.ser.write(cmd)
+        active = (abs(right_rps) > 0.001 or abs(left_rps) > 0.001)
+
+        if inst is not None:
+            built_ns = time.perf_counter_ns()
+
+        if self.non_blocking_preactivate:
+            self._send_non_blocking(wake, cmd, active, call_ns if inst is not None else None)
+        else:
+            if wake is not None:
+                self._write(wake)
+                self.clock.sleep(self.pre_activate_delay)
+            # Send actual command
+            self._write(cmd)
+
+        if inst is not None:
+            command_type = "start" if wake is not None else ("update" if active else "stop")
+            self._record_latency(inst, command_type, call_ns, call_mono_ns, built_ns)
 
         # Update state
         self.last_speeds = [right_rps, left_rps]
-        self.motors_active = (abs(right_rps) > 0.001 or abs(left_rps) > 0.001)
+        self.motors_active = active
+
+    def _record_latency(self, inst, command_type, call_ns, call_mono_ns, built_ns):
+        """Record build/write/wire phases of a command that was just written"""
+        written_ns = time.perf_counter_ns()
+        inst.record(command_type, "build", built_ns - call_ns)
+        inst.record(command_type, "write", written_ns - call_ns)
+        if inst.measure_wire:
+            self.ser.flush()
+            inst.record(command_type, "wire", time.perf_counter_ns() - call_ns)
+        inst.command_sent(command_type, call_ns, call_mono_ns)
+
+    def _send_non_blocking(self, wake, cmd, active, call_ns=None):
+        """Send wake frame now and schedule `cmd`, or supersede a pending command"""
+        with self._pending:
+            if self._pending_cmd is not None:
+                if active:
+                    # Motors are already waking - the newest command wins
+                    self._pending_cmd = cmd
+                    return
+                self._cancel_pending()
+
+            if wake is None:
+                self._write(cmd)
+                return
+
+            self._write(wake)
+            self._pending_cmd = cmd
+            self._pending_call_ns = call_ns
+            self._pending_timer = self.clock.call_later(self.pre_activate_delay, self._send_pending)
+
+    def _send_pending(self):
+        """Send the command that waited for pre-activation (runs on the clock's scheduler)"""
+        with self._pending:
+            cmd = self._pending_cmd
+            self._pending_cmd = None
+            self._pending_timer = None
+            if cmd is None or not (self.ser and self.ser.is_open):
+                return
+            self._write(cmd)
+            inst = self.instrumentation
+            if inst is not None and self._pending_call_ns is not None:
+                inst.record("start", "deferred_write", time.perf_counter_ns() - self._pending_call_ns)
+
+    def _cancel_pending(self):
+        """Drop a command still waiting for pre-activation"""
+        with self._pending:
+            self._pending_cmd = None
+            if self._pending_timer is not None:
+                self._pending_timer.cancel()
+                self._pending_timer = None
 
     def set_wheel_speeds(self, right_rps, left_rps):
         """
@@ -147,7 +398,7 @@ class MotorController:
         """
         self._send_command(right_rps, left_rps)
 
-    def set_velocity(self, linear_mps, angular_radps, track_width=0.133, wheel_diameter=0.067):
+    def set_velocity(self, linear_mps, angular_radps, track_width=TRACK_WIDTH, wheel_diameter=WHEEL_DIAMETER):
         """
         Set robot velocity using differential drive kinematics
 
@@ -157,27 +408,26 @@ class MotorController:
             track_width: Distance between wheels in meters
             wheel_diameter: Wheel diameter in meters
         """
-        import math
-
-        # Differential drive kinematics
-        v_left_mps = linear_mps - angular_radps * track_width / 2.0
-        v_right_mps = linear_mps + angular_radps * track_width / 2.0
-
-        # Convert m/s to RPS
-        wheel_circumference = math.pi * wheel_diameter
-        left_rps = v_left_mps / wheel_circumference
-        right_rps = v_right_mps / wheel_circumference
-
+        right_rps, left_rps = velocity_to_wheel_speeds(linear_mps, angular_radps, track_width, wheel_diameter)
         self.set_wheel_speeds(right_rps, left_rps)
 
     def stop(self):
         """Stop all motors"""
+        inst = self.instrumentation
+        if inst is not None:
+            call_ns = time.perf_counter_ns()
+            call_mono_ns = time.monotonic_ns()
+        self._cancel_pending()
         cmd = HiwonderProtocol.motor_command([
             [RIGHT_MOTOR_ID, 0],
             [LEFT_MOTOR_ID, 0]
         ])
         if self.ser and self.ser.is_open:
-            self.ser.write(cmd)
+            if inst is not None:
+                built_ns = time.perf_counter_ns()
+            self._write(cmd)
+            if inst is not None:
+                self._record_latency(inst, "stop", call_ns, call_mono_ns, built_ns)
         self.motors_active = False
         self.last_speeds = [0.0, 0.0]
 
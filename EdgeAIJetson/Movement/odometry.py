@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Dead-reckoning odometry for the differential drive
+Integrates wheel speeds (commanded or measured) into (x, y, theta), live at
+control rate or vectorized over recorded logs
+"""
+
+import sys
+import os
+import math
+import threading
+from collections import namedtuple
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hiwonder_protocol import HiwonderProtocol
+from motor_controller import (RIGHT_MOTOR_ID, LEFT_MOTOR_ID, LEFT_MOTOR_INVERTED,
+                              TRACK_WIDTH, WHEEL_DIAMETER)
+
+DEFAULT_IMU_WEIGHT = 0.98  # Share of the gyro in the fused yaw rate
+
+Trajectory2D = namedtuple("Trajectory2D", ["t", "x", "y", "theta"])
+
+
+def body_rates(right_rps, left_rps, track_width=TRACK_WIDTH, wheel_diameter=WHEEL_DIAMETER):
+    """
+    Inverse differential drive kinematics
+
+    Returns:
+        tuple: (linear_mps, angular_radps); works on scalars and arrays
+    """
+    circumference = math.pi * wheel_diameter
+    v_right = right_rps * circumference
+    v_left = left_rps * circumference
+    return (v_right + v_left) / 2.0, (v_right - v_left) / track_width
+
+
+def arc_step(theta, linear, angular, dt):
+    """
+    Exact pose increment for constant (linear, angular) over dt
+
+    Uses the chord form: the robot moves v*dt*sinc(dtheta/2) along heading
+    theta + dtheta/2, which has no special case for straight motion.
+    Works on scalars and arrays.
+
+    Returns:
+        tuple: (dx, dy, dtheta)
+    """
+    dtheta = angular * dt
+    chord = linear * dt * np.sinc(dtheta / (2.0 * np.pi))
+    heading = theta + dtheta / 2.0
+    return chord * np.cos(heading), chord * np.sin(heading), dtheta
+
+
+def integrate_wheel_speeds(t, right_rps, left_rps, yaw_rate=None, imu_weight=DEFAULT_IMU_WEIGHT,
+                           initial_pose=(0.0, 0.0, 0.0),
+                           track_width=TRACK_WIDTH, wheel_diameter=WHEEL_DIAMETER):
+    """
+    Batch dead reckoning over a recorded log (vectorized)
+
+    Sample k is held constant over [t[k], t[k+1]] and integrated with the
+    exact arc. Headings come from a cumulative sum, so the whole log is
+    integrated in a few NumPy passes.
+
+    Args:
+        t: Sample times in seconds (increasing)
+        right_rps, left_rps: Wheel speeds in RPS (positive = forward)
+        yaw_rate: Optional gyro z rate (rad/s) at the same times
+        imu_weight: Share of yaw_rate in the fused angular rate
+        initial_pose: (x, y, theta) at t[0]
+
+    Returns:
+        Trajectory2D: arrays t, x, y, theta (same length as t)
+    """
+    t = np.asarray(t, dtype=np.float64)
+    linear, angular = body_rates(np.asarray(right_rps, dtype=np.float64),
+                                 np.asarray(left_rps, dtype=np.float64),
+                                 track_width, wheel_diameter)
+    if yaw_rate is not None:
+        angular = imu_weight * np.asarray(yaw_rate, dtype=np.float64) + (1.0 - imu_weight) * angular
+
+    x0, y0, theta0 = initial_pose
+    dt = np.diff(t)
+    linear, angular = linear[:-1], angular[:-1]
+
+    theta = np.empty_like(t)
+    theta[0] = theta0
+    np.cumsum(angular * dt, out=theta[1:])
+    theta[1:] += theta0
+
+    dx, dy, _ = arc_step(theta[:-1], linear, angular, dt)
+    x = np.empty_like(t)
+    y = np.empty_like(t)
+    x[0], y[0] = x0, y0
+    np.cumsum(dx, out=x[1:])
+    np.cumsum(dy, out=y[1:])
+    x[1:] += x0
+    y[1:] += y0
+    return Trajectory2D(t, x, y, theta)
+
+
+def wheel_speeds_from_ticks(t, ticks, counts_per_rev):
+    """
+    Wheel speed (RPS) from cumulative encoder ticks
+
+    Handles int32 wrap-around. The speed of interval k is assigned to
+    sample k; the last sample repeats the previous speed.
+    """
+    t = np.asarray(t, dtype=np.float64)
+    delta = np.diff(np.asarray(ticks, dtype=np.int64))
+    delta = (delta + 2**31) % 2**32 - 2**31
+    rps = delta / counts_per_rev / np.diff(t)
+    return np.append(rps, rps[-1] if len(rps) else 0.0)
+
+
+class DiffDriveOdometry:
+    """
+    Live dead-reckoning pose
+
+    Feed it wheel speeds with update() at control rate (e.g. the commanded
+    speeds), or attach() it to a TelemetryReader to integrate the board's
+    encoder reports. With an ImuSubscriber the yaw rate is fused with the
+    latest gyro z reading.
+    """
+
+    def __init__(self, track_width=TRACK_WIDTH, wheel_diameter=WHEEL_DIAMETER,
+                 imu_weight=DEFAULT_IMU_WEIGHT):
+        self.track_width = track_width
+        self.wheel_diameter = wheel_diameter
+        self.imu_weight = imu_weight
+        self.x = 0.0
+        self.y = 0.0
+        self.theta = 0.0
+        self.distance = 0.0
+        self._imu = None
+        self._last_report_ns = None
+        self._lock = threading.Lock()
+
+    @property
+    def pose(self):
+        """Current (x, y, theta)"""
+        return self.x, self.y, self.theta
+
+    def reset(self, x=0.0, y=0.0, theta=0.0):
+        """Set the pose"""
+        with self._lock:
+            self.x, self.y, self.theta = x, y, theta
+            self.distance = 0.0
+
+    def update(self, right_rps, left_rps, dt, yaw_rate=None):
+        """
+        Integrate wheel speeds held for dt seconds
+
+        Args:
+            right_rps, left_rps: Wheel speeds in RPS (positive = forward)
+            yaw_rate: Optional gyro z rate (rad/s) to fuse
+        """
+        linear, angular = body_rates(right_rps, left_rps, self.track_width, self.wheel_diameter)
+        if yaw_rate is not None:
+            angular = self.imu_weight * yaw_rate + (1.0 - self.imu_weight) * angular
+        with self._lock:
+            dx, dy, dtheta = arc_step(self.theta, linear, angular, dt)
+            self.x += float(dx)
+            self.y += float(dy)
+            self.theta += float(dtheta)
+            self.distance += abs(linear * dt)
+        return self.pose
+
+    def attach(self, reader, imu=None):
+        """
+        Integrate encoder reports from a TelemetryReader
+
+        Args:
+            reader: TelemetryReader on the board's port
+            imu: Optional ImuSubscriber for yaw rate fusion
+        """
+        self._imu = imu
+        reader.subscribe(HiwonderProtocol.FUNC_MOTOR, self._on_motor_report)
+        return self
+
+    def _on_motor_report(self, payload, timestamp_ns):
+        encoders = HiwonderProtocol.parse_encoder_report(payload)
+        if encoders is None:
+            return
+        speeds = {motor_id: rps for motor_id, _, rps in encoders}
+        if RIGHT_MOTOR_ID not in speeds or LEFT_MOTOR_ID not in speeds:
+            return
+        right = speeds[RIGHT_MOTOR_ID]
+        left = -speeds[LEFT_MOTOR_ID] if LEFT_MOTOR_INVERTED else speeds[LEFT_MOTOR_ID]
+
+        last, self._last_report_ns = self._last_report_ns, timestamp_ns
+        if last is None:
+            return
+        yaw_rate = None
+        if self._imu is not None:
+            sample = self._imu.latest()
+            if sample is not None:
+                yaw_rate = float(sample[2][2])
+        self.update(right, left, (timestamp_ns - last) * 1e-9, yaw_rate)
+
+
+def load_log(path):
+    """
+    Load a recorded log for batch re-integration
+
+    Accepts .npz (arrays t, right_rps, left_rps[, yaw_rate]) or CSV with a
+    header row naming the same columns.
+
+    Returns:
+        dict: column name -> ndarray
+    """
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+    data = np.genfromtxt(path, delimiter=",", names=True)
+    return {name: data[name] for name in data.dtype.names}
+
+
+# Batch re-integration of a recorded (or synthetic) log
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Re-integrate a wheel speed log")
+    parser.add_argument("log", nargs="?", help=".npz or .csv log (t, right_rps, left_rps[, yaw_rate])")
+    parser.add_argument("--synthetic-hours", type=float, default=1.0,
+                        help="Without a log: benchmark on this many hours of 50 Hz synthetic data")
+    parser.add_argument("--imu-weight", type=float, default=DEFAULT_IMU_WEIGHT)
+    args = parser.parse_args()
+
+    if args.log:
+        log = load_log(args.log)
+    else:
+        n = int(args.synthetic_hours * 3600 * 50)
+        rng = np.random.default_rng(0)
+        t = np.arange(n) / 50.0
+        base = 0.5 + 0.3 * np.sin(t / 7.0)
+        turn = 0.2 * np.sin(t / 3.0)
+        log = {"t": t, "right_rps": base + turn + rng.normal(0, 0.01, n),
+               "left_rps": base - turn + rng.normal(0, 0.01, n)}
+        print(f"Synthetic log: {args.synthetic_hours:.1f} h at 50 Hz ({n} samples)")
+
+    start = time.perf_counter()
+    path = integrate_wheel_speeds(log["t"], log["right_rps"], log["left_rps"],
+                                  yaw_rate=log.get("yaw_rate"), imu_weight=args.imu_weight)
+    elapsed = time.perf_counter() - start
+
+    print(f"Integrated {len(path.t)} samples in {elapsed * 1000:.1f} ms")
+    print(f"Final pose: x={path.x[-1]:.3f} m, y={path.y[-1]:.3f} m, "
+          f"theta={math.degrees(path.theta[-1]) % 360:.1f} deg")
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Pure-pursuit path following
+Follows a recorded waypoint path with set_velocity() from the odometry
+pose; a grid index and arc-length lookup keep each control step cheap for
+paths with hundreds of thousands of points
+"""
+
+import sys
+import os
+import math
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+LOOKAHEAD = 0.3  # m
+CRUISE_SPEED = 0.12  # m/s
+MIN_SPEED = 0.03  # m/s, floor of the goal slow-down
+MAX_ANGULAR = 1.5  # rad/s
+GOAL_TOLERANCE = 0.05  # m
+SEARCH_WINDOW = 1.0  # m of path around the last match searched each step
+MAX_CROSS_TRACK = 0.5  # m, further than this the robot is re-located on the whole path
+GRID_CELL = 0.5  # m
+DEFAULT_RATE_HZ = 50
+
+
+def load_path(path):
+    """
+    Load waypoints
+
+    Accepts .npz (arrays x, y) or CSV with a header row naming x and y.
+    Repeated points (robot standing still while recording) are dropped.
+
+    Returns:
+        ndarray: (N, 2) float64 points
+    """
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            x, y = data["x"], data["y"]
+    else:
+        data = np.genfromtxt(path, delimiter=",", names=True)
+        x, y = data["x"], data["y"]
+    points = np.column_stack([x, y]).astype(np.float64)
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:] = np.any(np.diff(points, axis=0) != 0.0, axis=1)
+    return points[keep]
+
+
+def save_path(path, points):
+    """Write (N, 2) waypoints as .npz (x, y), e.g. from odometry.integrate_wheel_speeds()"""
+    points = np.asarray(points, dtype=np.float64)
+    np.savez_compressed(path, x=points[:, 0], y=points[:, 1])
+    return path
+
+
+class GridIndex:
+    """
+    Uniform grid over path points for nearest-point queries
+
+    Point indexes are sorted by cell key, so a cell's points are one
+    contiguous slice found with a binary search over the occupied cells.
+    A query scans rings of cells outward and stops once no closer point
+    can exist, so it touches a handful of cells whatever the path length.
+    """
+
+    def __init__(self, points, cell=GRID_CELL):
+        self.points = points
+        self.cell = cell
+        self.origin = points.min(axis=0)
+        cells = np.floor((points - self.origin) / cell).astype(np.int64)
+        self.shape = cells.max(axis=0) + 1
+        keys = cells[:, 0] * self.shape[1] + cells[:, 1]
+        self.order = np.argsort(keys, kind="stable")
+        self.keys, self.starts = np.unique(keys[self.order], return_index=True)
+        self.ends = np.append(self.starts[1:], len(keys))
+
+    def _cell_points(self, cx, cy):
+        if not (0 <= cx < self.shape[0] and 0 <= cy < self.shape[1]):
+            return None
+        key = cx * self.shape[1] + cy
+        i = np.searchsorted(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return None
+        return self.order[self.starts[i]:self.ends[i]]
+
+    def nearest(self, x, y, max_distance=None):
+        """
+        Nearest path point
+
+        Returns:
+            tuple: (index, distance), or (None, inf) if there is no point
+                   within max_distance
+        """
+        cx, cy = np.floor((np.array([x, y]) - self.origin) / self.cell).astype(np.int64)
+        # Rings beyond the grid's extent can't hold points
+        max_ring = int(max(cx, cy, self.shape[0] - cx, self.shape[1] - cy, 1))
+        if max_distance is not None:
+            max_ring = min(max_ring, int(math.ceil(max_distance / self.cell)) + 1)
+        best, best_d2 = None, math.inf
+        for ring in range(max_ring + 1):
+            if best is not None and ring > 0 and (ring - 1) * self.cell >= math.sqrt(best_d2):
+                break
+            for dx in range(-ring, ring + 1):
+                for dy in ((-ring, ring) if abs(dx) != ring else range(-ring, ring + 1)):
+                    candidates = self._cell_points(cx + dx, cy + dy)
+                    if candidates is None:
+                        continue
+                    d2 = np.sum((self.points[candidates] - (x, y)) ** 2, axis=1)
+                    k = int(np.argmin(d2))
+                    if d2[k] < best_d2:
+                        best, best_d2 = int(candidates[k]), float(d2[k])
+        distance = math.sqrt(best_d2)
+        if best is None or (max_distance is not None and distance > max_distance):
+            return None, math.inf
+        return best, distance
+
+
+class PurePursuitFollower:
+    """
+    Pure pursuit on a waypoint path
+
+    Each step projects the pose onto the path segments within
+    `search_window` of the previous match (so a path that doubles back
+    past itself is followed in order), falls back to the grid index when
+    the robot is more than `max_cross_track` off the path, finds the
+    lookahead point `lookahead` metres further along by binary search of
+    the cumulative arc length, and steers with curvature 2*y/d^2 toward
+    it. Speed is capped so the turn rate stays within max_angular, and
+    ramps down over the last metre to the goal.
+
+    Example:
+        follower = PurePursuitFollower(load_path("tunnel.npz"))
+        follower.run(mc, odometry)
+    """
+
+    def __init__(self, points, lookahead=LOOKAHEAD, speed=CRUISE_SPEED, max_angular=MAX_ANGULAR,
+                 goal_tolerance=GOAL_TOLERANCE, search_window=SEARCH_WINDOW,
+                 max_cross_track=MAX_CROSS_TRACK, cell=GRID_CELL):
+        points = np.asarray(points, dtype=np.float64)
+        if len(points) < 2:
+            raise ValueError("A path needs at least two points")
+        self.points = points
+        self.lookahead = lookahead
+        self.speed = speed
+        self.max_angular = max_angular
+        self.goal_tolerance = goal_tolerance
+        self.search_window = search_window
+        self.max_cross_track = max_cross_track
+
+        self._segments = np.diff(points, axis=0)
+        self._lengths2 = np.einsum("ij,ij->i", self._segments, self._segments)
+        self.s = np.concatenate([[0.0], np.cumsum(np.sqrt(self._lengths2))])  # Arc length at each point
+        self.length = float(self.s[-1])
+        self.index = GridIndex(points, cell)
+
+        self.segment = None  # Segment of the last match
+        self.progress = 0.0  # Arc length of the last match
+        self.cross_track_error = 0.0
+        self.done = False
+        self.relocations = 0
+
+    def _project(self, x, y, first, last):
+        """Closest point on segments first..last-1: (segment, arc length, distance)"""
+        a = self.points[first:last]
+        ab = self._segments[first:last]
+        t = np.einsum("ij,ij->i", (x, y) - a, ab) / np.maximum(self._lengths2[first:last], 1e-12)
+        np.clip(t, 0.0, 1.0, out=t)
+        d2 = np.sum((a + ab * t[:, None] - (x, y)) ** 2, axis=1)
+        k = int(np.argmin(d2))
+        segment = first + k
+        return segment, self.s[segment] + t[k] * math.sqrt(self._lengths2[segment]), math.sqrt(d2[k])
+
+    def locate(self, x, y):
+        """Match the pose against the whole path (grid index)"""
+        nearest, _ = self.index.nearest(x, y)
+        first, last = max(0, nearest - 1), min(len(self._segments), nearest + 1)
+        self.segment, self.progress, self.cross_track_error = self._project(x, y, first, last)
+        self.relocations += 1
+
+    def _track(self, x, y):
+        """Match the pose near the previous match"""
+        if self.segment is None:
+            self.locate(x, y)
+            return
+        first = max(0, int(np.searchsorted(self.s, self.progress - 0.25 * self.search_window)) - 1)
+        last = min(len(self._segments), int(np.searchsorted(self.s, self.progress + self.search_window)) + 1)
+        segment, progress, distance = self._project(x, y, first, max(last, first + 1))
+        if distance > self.max_cross_track:
+            self.locate(x, y)
+            return
+        self.segment, self.progress, self.cross_track_error = segment, progress, distance
+
+    def target(self):
+        """Lookahead point (x, y) on the path"""
+        s = self.progress + self.lookahead
+        if s >= self.length:
+            return self.points[-1]
+        j = max(1, int(np.searchsorted(self.s, s)))
+        f = (s - self.s[j - 1]) / (self.s[j] - self.s[j - 1])
+        return self.points[j - 1] + f * (self.points[j] - self.points[j - 1])
+
+    def compute(self, pose):
+        """
+        Velocity command for a pose
+
+        Args:
+            pose: (x, y, theta) in the path's frame
+
+        Returns:
+            tuple: (linear_mps, angular_radps); (0, 0) once at the goal
+        """
+        x, y, theta = pose
+        self._track(x, y)
+        goal_distance = math.hypot(self.points[-1, 0] - x, self.points[-1, 1] - y)
+        if self.done or (self.length - self.progress < self.lookahead and goal_distance < self.goal_tolerance):
+            self.done = True
+            return 0.0, 0.0
+
+        tx, ty = self.target()
+        dx, dy = tx - x, ty - y
+        local_x = math.cos(theta) * dx + math.sin(theta) * dy
+        local_y = -math.sin(theta) * dx + math.cos(theta) * dy
+        d2 = local_x * local_x + local_y * local_y
+        curvature = 2.0 * local_y / d2 if d2 > 1e-9 else 0.0
+
+        remaining = self.length - self.progress
+        linear = max(MIN_SPEED, min(self.speed, self.speed * max(remaining, goal_distance)))
+        if abs(curvature) * linear > self.max_angular:
+            linear = self.max_angular / abs(curvature)
+        return linear, linear * curvature
+
+    def run(self, mc, odometry, rate_hz=DEFAULT_RATE_HZ, timeout=None):
+        """
+        Follow the path to the goal at a fixed rate
+
+        Args:
+            mc: MotorController (non_blocking_preactivate=True recommended);
+                ticks are timed with mc.clock
+            odometry: Object with a .pose (x, y, theta), e.g. DiffDriveOdometry
+
+        Returns:
+            dict: steps, elapsed_s, reached, max cross-track error (m) and
+                  compute time per step (us, mean / max)
+        """
+        clock = mc.clock
+        period = 1.0 / rate_hz
+        start = clock.monotonic()
+        next_tick = start
+        steps = 0
+        compute_total = 0.0
+        compute_max = 0.0
+        max_error = 0.0
+        last = None
+        try:
+            while not self.done:
+                now = clock.monotonic()
+                if timeout is not None and now - start > timeout:
+                    break
+                if now < next_tick:
+                    clock.sleep(next_tick - now)
+                next_tick = max(next_tick + period, clock.monotonic())
+
+                t0 = time.perf_counter()
+                command = self.compute(odometry.pose)
+                elapsed = time.perf_counter() - t0
+                compute_total += elapsed
+                compute_max = max(compute_max, elapsed)
+                max_error = max(max_error, self.cross_track_error)
+                steps += 1
+                if command != last:
+                    mc.set_velocity(*command)
+                    last = command
+        finally:
+            mc.stop()
+        return {
+            "steps": steps,
+            "elapsed_s": clock.monotonic() - start,
+            "reached": self.done,
+            "max_cross_track_m": max_error,
+            "compute_mean_us": compute_total / max(steps, 1) * 1e6,
+            "compute_max_us": compute_max * 1e6,
+        }
+
+
+def tunnel_path(length=1200.0, spacing=0.01):
+    """Synthetic winding path (demo / benchmark): `length` m at `spacing` m"""
+    s = np.arange(0.0, length, spacing)
+    return np.column_stack([s, 1.5 * np.sin(s / 4.0) + 0.5 * np.sin(s / 1.3)])
+
+
+def benchmark_compute(sizes=(1_000, 10_000, 100_000, 1_000_000), steps=1000):
+    """
+    Per-step cost along paths of different sizes
+
+    Returns:
+        list: (points, build_ms, track_us, locate_us, full_scan_us) per
+              size: compute() following the path, a grid re-location from
+              a random pose, and a brute-force nearest point for reference
+    """
+    rng = np.random.default_rng(0)
+    results = []
+    for n in sizes:
+        points = tunnel_path(n * 0.01)
+        t0 = time.perf_counter()
+        follower = PurePursuitFollower(points)
+        build = time.perf_counter() - t0
+
+        # Poses 5 cm apart along the path, 5 cm to its side
+        poses = [(points[i, 0], points[i, 1] + 0.05, 0.0) for i in range(0, min(n - 1, steps * 5), 5)]
+        t0 = time.perf_counter()
+        for pose in poses:
+            follower.compute(pose)
+        track = (time.perf_counter() - t0) / len(poses)
+
+        queries = points[rng.integers(0, n, 200)] + rng.normal(0.0, 0.2, (200, 2))
+        t0 = time.perf_counter()
+        for x, y in queries:
+            follower.locate(x, y)
+        locate = (time.perf_counter() - t0) / len(queries)
+
+        t0 = time.perf_counter()
+        for x, y in queries[:20]:
+            np.argmin(np.sum((points - (x, y)) ** 2, axis=1))
+        full_scan = (time.perf_counter() - t0) / 20
+        results.append((n, build * 1e3, track * 1e6, locate * 1e6, full_scan * 1e6))
+    return results
+
+
+# Follow a path on the simulator (or robot) and benchmark the lookup
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pure-pursuit path follower")
+    parser.add_argument("path", nargs="?", help=".npz or .csv (x, y) path; default: synthetic tunnel path")
+    parser.add_argument("--port", default="/dev/ttyACM0")
+    parser.add_argument("--simulate", action="store_true", help="Follow the path on board_simulator.py")
+    parser.add_argument("--benchmark", action="store_true", help="Time the per-step lookup for 1k-1M point paths")
+    parser.add_argument("--lookahead", type=float, default=LOOKAHEAD)
+    parser.add_argument("--speed", type=float, default=CRUISE_SPEED)
+    parser.add_argument("--distance", type=float, default=3.0,
+                        help="Synthetic path: metres to follow (the index still covers 1.2 km)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        print(f"{'points':>10} {'build ms':>9} {'step us':>9} {'locate us':>10} {'full scan us':>13}")
+        for n, build_ms, track_us, locate_us, full_scan_us in benchmark_compute():
+            print(f"{n:>10} {build_ms:>9.1f} {track_us:>9.1f} {locate_us:>10.1f} {full_scan_us:>13.1f}")
+        sys.exit(0)
+
+    from motor_controller import MotorController
+    from telemetry_reader import TelemetryReader
+    from odometry import DiffDriveOdometry
+
+    if args.path:
+        points = load_path(args.path)
+    else:
+        points = tunnel_path()
+        # Goal cut after --distance metres; a long tail keeps the full-size index in play
+        points = points[:int(args.distance / 0.01) + 1]
+    follower = PurePursuitFollower(points, lookahead=args.lookahead, speed=args.speed)
+    print(f"Path: {len(points)} points, {follower.length:.1f} m")
+
+    sim = None
+    if args.simulate:
+        from board_simulator import BoardSimulator
+        sim = BoardSimulator().start()
+        args.port = sim.port
+        # Start 10 cm off the path, facing along it
+        heading = math.atan2(points[1, 1] - points[0, 1], points[1, 0] - points[0, 0])
+        sim.pose = [points[0, 0], points[0, 1] + 0.1, heading]
+
+    try:
+        with MotorController(port=args.port, non_blocking_preactivate=True) as mc, \
+                TelemetryReader(mc.ser) as reader:
+            odometry = DiffDriveOdometry().attach(reader)
+            if sim is not None:
+                odometry.reset(*sim.pose)
+            result = follower.run(mc, odometry, timeout=args.timeout)
+    finally:
+        if sim is not None:
+            sim.close()
+
+    print(f"{'Reached goal' if result['reached'] else 'Timed out'} in {result['elapsed_s']:.1f} s "
+          f"({result['steps']} steps), max cross-track error {result['max_cross_track_m'] * 100:.1f} cm")
+    print(f"compute(): mean {result['compute_mean_us']:.0f} us, max {result['compute_max_us']:.0f} us per step")
+    if sim is not None:
+        error = math.hypot(sim.pose[0] - points[-1, 0], sim.pose[1] - points[-1, 1])
+        print(f"Simulated final position {error * 100:.1f} cm from the goal")
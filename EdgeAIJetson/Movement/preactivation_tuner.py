@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Pre-activation auto-tuner
+Measures when each wheel starts moving from encoder feedback and searches
+the pre-activation threshold/speed/delay for the lowest start latency and
+left/right skew, then stores the result in the robot profile
+Run with robot wheels OFF GROUND
+"""
+
+import sys
+import os
+import time
+import threading
+import itertools
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hiwonder_protocol import HiwonderProtocol
+from motor_controller import RIGHT_MOTOR_ID, LEFT_MOTOR_ID, PRE_ACTIVATE_THRESHOLD
+from robot_profile import save_profile_section
+
+ONSET_SPEED = 0.03  # RPS, a wheel faster than this has started
+REST_SPEED = 0.002  # RPS, a wheel slower than this has stopped
+REST_TIME = 1.0  # seconds at rest before a trial, so the drivers are cold again
+SKEW_WEIGHT = 2.0  # Cost = latency + SKEW_WEIGHT * skew
+TRIAL_TIMEOUT = 2.0  # seconds
+
+DEFAULT_DELAYS = (0.02, 0.03, 0.04, 0.05, 0.06, 0.07, 0.08, 0.1, 0.12)
+DEFAULT_SPEEDS = (0.01, 0.02, 0.05)
+DEFAULT_THRESHOLDS = (PRE_ACTIVATE_THRESHOLD,)
+
+
+class OnsetDetector:
+    """
+    Wheel start times from encoder reports
+
+    After arm(), the first report in which a wheel exceeds ONSET_SPEED
+    marks its onset. The crossing is interpolated between that report and
+    the previous one, which resolves onsets well below the report period.
+    """
+
+    def __init__(self, onset_speed=ONSET_SPEED, rest_speed=REST_SPEED):
+        self.onset_speed = onset_speed
+        self.rest_speed = rest_speed
+        self.last_moving_ns = 0
+        self.reports = 0
+        self._armed_ns = None
+        self._previous = None  # (timestamp_ns, right, left)
+        self._onsets = {}
+        self._done = threading.Event()
+
+    def attach(self, reader):
+        reader.subscribe(HiwonderProtocol.FUNC_MOTOR, self.on_frame)
+        return self
+
+    def detach(self, reader):
+        reader.unsubscribe(HiwonderProtocol.FUNC_MOTOR, self.on_frame)
+
+    def arm(self, call_ns):
+        """Start looking for onsets after a command issued at monotonic_ns() call_ns"""
+        self._onsets = {}
+        self._done.clear()
+        self._armed_ns = call_ns
+
+    def wait(self, timeout):
+        """
+        Wait for both wheels to start
+
+        Returns:
+            tuple: (right, left) onset delays in seconds from the call; a
+                   wheel that didn't start within the timeout is None
+        """
+        self._done.wait(timeout)
+        armed, self._armed_ns = self._armed_ns, None
+        onsets = self._onsets
+        return tuple(None if onsets.get(w) is None else (onsets[w] - armed) * 1e-9 for w in ("right", "left"))
+
+    def on_frame(self, payload, timestamp_ns):
+        encoders = HiwonderProtocol.parse_encoder_report(payload)
+        if encoders is None:
+            return
+        speeds = {motor_id: rps for motor_id, _, rps in encoders}
+        if RIGHT_MOTOR_ID not in speeds or LEFT_MOTOR_ID not in speeds:
+            return
+        right = abs(speeds[RIGHT_MOTOR_ID])
+        left = abs(speeds[LEFT_MOTOR_ID])
+        self.reports += 1
+        if right > self.rest_speed or left > self.rest_speed:
+            self.last_moving_ns = timestamp_ns
+
+        previous, self._previous = self._previous, (timestamp_ns, right, left)
+        armed = self._armed_ns
+        if armed is None or timestamp_ns < armed:
+            return
+        for wheel, speed, index in (("right", right, 1), ("left", left, 2)):
+            if wheel in self._onsets or speed < self.onset_speed:
+                continue
+            onset = timestamp_ns
+            if previous is not None and previous[0] >= armed and speed > previous[index]:
+                fraction = (self.onset_speed - previous[index]) / (speed - previous[index])
+                onset = previous[0] + int(max(0.0, fraction) * (timestamp_ns - previous[0]))
+            self._onsets[wheel] = max(onset, armed)
+        if len(self._onsets) == 2:
+            self._done.set()
+
+    def wait_for_rest(self, rest_time, since_ns=0, timeout=10.0):
+        """
+        Block until the wheels have been still for rest_time seconds
+
+        Args:
+            since_ns: monotonic_ns() of the last stop command; a wake pulse
+                      arms the drivers without turning the wheels, so rest
+                      is counted from the later of this and the last motion
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            still = (time.monotonic_ns() - max(self.last_moving_ns, since_ns)) * 1e-9
+            if still >= rest_time:
+                return True
+            time.sleep(min(0.05, rest_time - still))
+        return False
+
+
+class PreActivationTuner:
+    """
+    Searches pre-activation parameters on a MotorController
+
+    Each trial waits for the drivers to go cold, commands a start from
+    rest and measures both wheel onsets. A candidate's cost is its mean
+    start latency (later wheel) plus SKEW_WEIGHT times the mean
+    left/right skew. Trials that can no longer beat the best candidate
+    are cut short, so stalls from bad settings don't dominate the run.
+
+    Example:
+        tuner = PreActivationTuner(mc, reader)
+        best = tuner.grid_search()
+        save_profile_section("pre_activation", best)
+    """
+
+    def __init__(self, mc, reader, targets=(0.5,), repeats=1, rest_time=REST_TIME,
+                 skew_weight=SKEW_WEIGHT, timeout=TRIAL_TIMEOUT):
+        self.mc = mc
+        self.detector = OnsetDetector().attach(reader)
+        self.targets = targets
+        self.repeats = repeats
+        self.rest_time = rest_time
+        self.skew_weight = skew_weight
+        self.timeout = timeout
+        self.results = []
+        self.best = None
+        self._stopped_ns = 0
+
+    def _trial(self, target, timeout):
+        self.detector.wait_for_rest(self.rest_time, self._stopped_ns)
+        call_ns = time.monotonic_ns()
+        self.detector.arm(call_ns)
+        self.mc.set_wheel_speeds(target, target)
+        right, left = self.detector.wait(timeout)
+        self.mc.stop()
+        self._stopped_ns = time.monotonic_ns()
+        return right, left
+
+    def evaluate(self, threshold, speed, delay):
+        """
+        Measure one parameter set
+
+        Returns:
+            dict: Parameters, latency/skew means (seconds), cost, trial count
+        """
+        self.mc.pre_activate_threshold = threshold
+        self.mc.pre_activate_speed = speed
+        self.mc.pre_activate_delay = delay
+
+        # A trial slower than this can't make the candidate the best one
+        limit = self.timeout if self.best is None else min(self.timeout, self.best["cost"] + 0.05)
+        latencies, skews = [], []
+        complete = True
+        for target in self.targets:
+            for _ in range(self.repeats):
+                right, left = self._trial(target, limit)
+                if right is None or left is None:
+                    complete = False
+                    break
+                latencies.append(max(right, left))
+                skews.append(abs(right - left))
+            if not complete:
+                break
+
+        if complete:
+            latency = sum(latencies) / len(latencies)
+            skew = sum(skews) / len(skews)
+            cost = latency + self.skew_weight * skew
+        else:
+            latency = skew = cost = float("inf")
+        result = {"threshold": threshold, "speed": speed, "delay": delay,
+                  "latency": latency, "skew": skew, "cost": cost, "trials": len(latencies)}
+        self.results.append(result)
+        if self.best is None or cost < self.best["cost"]:
+            self.best = result
+        return result
+
+    def grid_search(self, thresholds=DEFAULT_THRESHOLDS, speeds=DEFAULT_SPEEDS, delays=DEFAULT_DELAYS,
+                    verbose=True):
+        """
+        Evaluate every combination (the current settings first)
+
+        Returns:
+            dict: Best result (see evaluate())
+        """
+        baseline = (self.mc.pre_activate_threshold, self.mc.pre_activate_speed, self.mc.pre_activate_delay)
+        candidates = [baseline] + [c for c in itertools.product(thresholds, speeds, delays) if c != baseline]
+        for i, candidate in enumerate(candidates):
+            result = self.evaluate(*candidate)
+            if verbose:
+                status = (f"latency {result['latency'] * 1000:5.1f} ms, skew {result['skew'] * 1000:5.1f} ms"
+                          if result["trials"] == len(self.targets) * self.repeats else "cut short")
+                print(f"  [{i + 1:2d}/{len(candidates)}] threshold {candidate[0]:.2f} speed {candidate[1]:.3f} "
+                      f"delay {candidate[2] * 1000:3.0f} ms: {status}")
+        best = self.best
+        self.mc.pre_activate_threshold = best["threshold"]
+        self.mc.pre_activate_speed = best["speed"]
+        self.mc.pre_activate_delay = best["delay"]
+        return best
+
+    def baseline(self):
+        """Result of the settings the search started from"""
+        return self.results[0] if self.results else None
+
+
+# Tune pre-activation and store it in the robot profile
+if __name__ == '__main__':
+    import argparse
+    from motor_controller import MotorController
+    from telemetry_reader import TelemetryReader
+
+    parser = argparse.ArgumentParser(description="Tune pre-activation for minimum start latency and skew")
+    parser.add_argument("--port", default="/dev/ttyACM0")
+    parser.add_argument("--simulate", action="store_true", help="Run against board_simulator.py")
+    parser.add_argument("--targets", type=float, nargs="+", default=[0.5], help="Start speeds to test (RPS)")
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--rest", type=float, default=REST_TIME, help="Seconds at rest before each trial")
+    parser.add_argument("--delays", type=float, nargs="+", default=list(DEFAULT_DELAYS))
+    parser.add_argument("--speeds", type=float, nargs="+", default=list(DEFAULT_SPEEDS))
+    parser.add_argument("--thresholds", type=float, nargs="+", default=list(DEFAULT_THRESHOLDS))
+    parser.add_argument("--profile", help="Robot profile path (default: $JETACKER_PROFILE or ~/.config/jetacker)")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    sim = None
+    if args.simulate:
+        from board_simulator import BoardSimulator, COLD_TIMEOUT
+        sim = BoardSimulator().start()
+        args.port = sim.port
+        args.rest = min(args.rest, COLD_TIMEOUT + 0.15)
+
+    start = time.monotonic()
+    try:
+        with MotorController(port=args.port, non_blocking_preactivate=True) as mc, \
+                TelemetryReader(mc.ser) as reader:
+            tuner = PreActivationTuner(mc, reader, targets=args.targets, repeats=args.repeats, rest_time=args.rest)
+            if not tuner.detector.wait_for_rest(0.0, timeout=0.5) or not tuner.detector.reports:
+                time.sleep(0.3)
+                if not tuner.detector.reports:
+                    raise SystemExit("No encoder reports from the board - the tuner needs encoder feedback")
+            print("Searching pre-activation parameters...")
+            best = tuner.grid_search(args.thresholds, args.speeds, args.delays)
+    finally:
+        if sim is not None:
+            sim.close()
+
+    base = tuner.baseline()
+    print(f"\nStarting point: delay {base['delay'] * 1000:.0f} ms -> latency {base['latency'] * 1000:.1f} ms, "
+          f"skew {base['skew'] * 1000:.1f} ms")
+    print(f"Best:           threshold {best['threshold']:.2f}, speed {best['speed']:.3f}, "
+          f"delay {best['delay'] * 1000:.0f} ms -> latency {best['latency'] * 1000:.1f} ms, "
+          f"skew {best['skew'] * 1000:.1f} ms")
+    print(f"Search took {time.monotonic() - start:.1f} s")
+
+    if not args.no_save:
+        path = save_profile_section("pre_activation", {
+            "threshold": best["threshold"],
+            "speed": best["speed"],
+            "delay": best["delay"],
+            "start_latency_ms": round(best["latency"] * 1000, 2),
+            "start_skew_ms": round(best["skew"] * 1000, 2),
+            "baseline_latency_ms": round(base["latency"] * 1000, 2),
+            "baseline_skew_ms": round(base["skew"] * 1000, 2),
+            "targets": args.targets,
+        }, args.profile)
+        print(f"Saved to {path}; use MotorController(pre_activation=load_pre_activation())")
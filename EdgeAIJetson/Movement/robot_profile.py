@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Per-robot profile storage
+Calibration and tuning results measured on a robot, kept in one JSON file
+so MotorController and the tools can load them
+"""
+
+import os
+import json
+import time
+
+PROFILE_ENV = "JETACKER_PROFILE"  # Overrides the profile path
+DEFAULT_PROFILE_PATH = os.path.expanduser("~/.config/jetacker/robot_profile.json")
+
+
+def profile_path(path=None):
+    """Resolve the profile path: argument, $JETACKER_PROFILE, then the default"""
+    return path or os.environ.get(PROFILE_ENV) or DEFAULT_PROFILE_PATH
+
+
+def load_profile(path=None):
+    """
+    Load the robot profile
+
+    Returns:
+        dict: Sections by name ({} if no profile has been saved)
+    """
+    path = profile_path(path)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_profile_section(section, values, path=None, merge=False):
+    """
+    Store one section of the profile, keeping the others
+
+    The file is replaced atomically, so an interrupted write can't leave a
+    half-written profile behind.
+
+    Args:
+        section: Section name, e.g. "calibration"
+        values: JSON-serializable dict (a "measured_at" timestamp is added)
+        merge: Update the section's keys instead of replacing the section
+               (for sections written by several tools)
+
+    Returns:
+        str: Path written
+    """
+    path = profile_path(path)
+    profile = load_profile(path)
+    if merge:
+        values = dict(profile.get(section, {}), **values)
+    profile[section] = dict(values, measured_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def load_calibration(path=None):
+    """
+    Motor calibration for MotorController(calibration=...)
+
+    Returns:
+        dict: The "calibration" section, or None if the robot hasn't been
+              characterized (run motor_characterization.py)
+    """
+    return load_profile(path).get("calibration")
+
+
+def load_pre_activation(path=None):
+    """
+    Pre-activation settings for MotorController(pre_activation=...)
+
+    Returns:
+        dict: The "pre_activation" section (threshold, speed, delay), or
+              None if preactivation_tuner.py hasn't been run
+    """
+    return load_profile(path).get("pre_activation")
+
+
+def load_performance(path=None):
+    """
+    Performance figures for MotorController(performance=...)
+
+    Returns:
+        dict: The "performance" section (min_start_command from
+              test_minimum_speed.py, voltage_sag from test_voltage_sag.py),
+              or None if neither has been run
+    """
+    return load_profile(path).get("performance")
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Declarative motor test scenarios
+Runs the sequences of the Movement test scripts from JSON files, either on
+the robot in real time or against the board simulator on a virtual clock
+(a full pass in milliseconds), and checks frame order and timing
+"""
+
+import sys
+import os
+import json
+import math
+import time
+import glob
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hiwonder_protocol import HiwonderProtocol
+from motor_controller import MotorController, RIGHT_MOTOR_ID, LEFT_MOTOR_ID
+from clock import SYSTEM_CLOCK, SystemClock, VirtualClock
+
+SCENARIO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios")
+
+ACTIONS = ("warm_up", "stop", "wheel_speeds", "velocity")
+EXPECTATIONS = ("frames", "duration", "motion", "start_skew_max", "rotations", "distance")
+SIMULATOR_ONLY = ("motion", "start_skew_max", "rotations", "distance")  # Need ground truth
+
+TIMING_TOLERANCE = 0.002  # seconds, frame times and durations
+REAL_TIME_TOLERANCE = 0.01  # seconds, default when running on the wall clock (sleep jitter)
+VALUE_TOLERANCE = 0.001  # command units
+MOVING_SPEED = 0.05  # RPS, slower wheels count as stopped for "motion"
+
+# Scenario file format:
+#   {
+#     "name": "...", "description": "...",
+#     "controller": {MotorController keyword arguments},
+#     "simulator": {BoardSimulator keyword arguments},
+#     "timing_tolerance": 0.002,
+#     "steps": [
+#       {"say": "text", "prompt": false,
+#        "action": "wheel_speeds", "right": 0.5, "left": 0.5,   (or warm_up, stop, velocity: linear/angular)
+#        "hold": 3.0,                                            (seconds to wait after the action)
+#        "expect": {
+#          "frames": [{"right": 0.01, "left": -0.01, "at": 0.0}, ...],  motor frames written during the
+#                       step, in order, as sent on the wire (left inverted); "at" is seconds from step start
+#          "duration": 0.1,                  seconds the action call blocked
+#          "motion": "forward",              stopped/forward/reverse/spin_left/spin_right at the end
+#          "start_skew_max": 0.005,          seconds between the wheels' starts
+#          "rotations": {"right": [lo, hi], "left": [lo, hi]},  wheel revolutions during the step
+#          "distance": [lo, hi]              meters travelled during the step
+#        }}
+#     ]
+#   }
+
+
+def load_scenario(path):
+    """
+    Load and validate a scenario file
+
+    Returns:
+        dict: The scenario
+    """
+    with open(path, encoding="utf-8") as f:
+        scenario = json.load(f)
+    scenario.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    for i, step in enumerate(scenario.get("steps", []), 1):
+        action = step.get("action")
+        if action is not None and action not in ACTIONS:
+            raise ValueError(f"{path} step {i}: unknown action '{action}'")
+        unknown = set(step.get("expect", {})) - set(EXPECTATIONS)
+        if unknown:
+            raise ValueError(f"{path} step {i}: unknown expectation(s) {sorted(unknown)}")
+    return scenario
+
+
+class FrameLog:
+    """Records frames written by a MotorController (pass as journal=) with clock timestamps"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.frames = []  # (time, frame bytes)
+
+    def record_out(self, frame):
+        self.frames.append((self.clock.monotonic(), bytes(frame)))
+
+    def motor_commands(self, since=0.0):
+        """
+        Motor frames written at or after `since`
+
+        Returns:
+            list: (time, right, left) wire values
+        """
+        commands = []
+        for t, frame in self.frames:
+            if t < since or frame[2] != HiwonderProtocol.FUNC_MOTOR:
+                continue
+            speeds = dict(HiwonderProtocol.parse_motor_command(frame[4:-1]) or [])
+            if speeds:
+                commands.append((t, speeds.get(RIGHT_MOTOR_ID, 0.0), speeds.get(LEFT_MOTOR_ID, 0.0)))
+        return commands
+
+
+class ScenarioRunner:
+    """
+    Runs scenario steps on a MotorController and checks expectations
+
+    Timing is taken from the controller's clock, so the same scenario
+    gives exact frame times on a VirtualClock and wall-clock times on the
+    robot. Expectations that need ground truth (motion, start skew,
+    rotations, distance) are checked only when `sim` is given.
+    """
+
+    def __init__(self, mc, log, sim=None, tolerance=None, interactive=False, verbose=True):
+        self.mc = mc
+        self.clock = mc.clock
+        self.log = log
+        self.sim = sim
+        self.tolerance = tolerance
+        self.interactive = interactive
+        self.verbose = verbose
+
+    def run(self, scenario):
+        """
+        Run every step
+
+        Returns:
+            dict: name, steps run, failures (list of messages), checks
+                  skipped, scenario time and wall time in seconds
+        """
+        tolerance = self.tolerance or scenario.get("timing_tolerance", TIMING_TOLERANCE)
+        failures = []
+        skipped = 0
+        start = self.clock.monotonic()
+        wall_start = time.perf_counter()
+        for i, step in enumerate(scenario.get("steps", []), 1):
+            step_failures, step_skipped = self._run_step(step, tolerance)
+            skipped += step_skipped
+            label = step.get("say") or step.get("action", "")
+            if self.verbose:
+                print(f"  [{'ok' if not step_failures else 'FAIL':4}] {i:2d}. {label}")
+                for failure in step_failures:
+                    print(f"         {failure}")
+            failures.extend(f"step {i} ({label}): {f}" for f in step_failures)
+        return {
+            "name": scenario["name"],
+            "steps": len(scenario.get("steps", [])),
+            "failures": failures,
+            "skipped": skipped,
+            "scenario_s": self.clock.monotonic() - start,
+            "wall_s": time.perf_counter() - wall_start,
+        }
+
+    def _run_step(self, step, tolerance):
+        if step.get("prompt") and self.interactive:
+            input(f"{step.get('say', '')} - press ENTER...")
+
+        before = self._ground_truth()
+        start = self.clock.monotonic()
+        action = step.get("action")
+        if action == "warm_up":
+            self.mc.warm_up()
+        elif action == "stop":
+            self.mc.stop()
+        elif action == "wheel_speeds":
+            self.mc.set_wheel_speeds(step["right"], step["left"])
+        elif action == "velocity":
+            self.mc.set_velocity(step["linear"], step.get("angular", 0.0))
+        duration = self.clock.monotonic() - start
+        self.clock.sleep(step.get("hold", 0.0))
+        end = self.clock.monotonic()
+
+        failures = []
+        skipped = 0
+        for name, expected in step.get("expect", {}).items():
+            if name in SIMULATOR_ONLY and self.sim is None:
+                skipped += 1
+                continue
+            if name == "frames":
+                failures += self._check_frames(expected, self.log.motor_commands(start), start, tolerance)
+            elif name == "duration":
+                if abs(duration - expected) > tolerance:
+                    failures.append(f"action took {duration * 1000:.1f} ms, expected {expected * 1000:.1f} ms")
+            elif name == "motion":
+                motion = self._motion()
+                if motion != expected:
+                    failures.append(f"motion is {motion}, expected {expected}")
+            elif name == "start_skew_max":
+                failures += self._check_start_skew(expected, start, end)
+            elif name == "rotations":
+                after = self._ground_truth()
+                for wheel, index in (("right", 0), ("left", 1)):
+                    if wheel in expected:
+                        failures += _check_range(f"{wheel} rotations", after[index] - before[index], expected[wheel])
+            elif name == "distance":
+                after = self._ground_truth()
+                failures += _check_range("distance (m)", math.hypot(after[2] - before[2], after[3] - before[3]),
+                                         expected)
+        return failures, skipped
+
+    def _check_frames(self, expected, actual, start, tolerance):
+        failures = []
+        if len(actual) != len(expected):
+            failures.append(f"{len(actual)} motor frames written, expected {len(expected)}: "
+                            + ", ".join(f"[{r:+.3f} {l:+.3f}]@{(t - start) * 1000:.0f}ms" for t, r, l in actual))
+        for n, (want, (t, right, left)) in enumerate(zip(expected, actual), 1):
+            if abs(right - want["right"]) > VALUE_TOLERANCE or abs(left - want["left"]) > VALUE_TOLERANCE:
+                failures.append(f"frame {n} is [{right:+.3f} {left:+.3f}], "
+                                f"expected [{want['right']:+.3f} {want['left']:+.3f}]")
+            if "at" in want and abs(t - start - want["at"]) > tolerance:
+                failures.append(f"frame {n} at {(t - start) * 1000:.1f} ms, expected {want['at'] * 1000:.1f} ms")
+        return failures
+
+    def _check_start_skew(self, limit, start, end):
+        onsets = []
+        for motor_id in (RIGHT_MOTOR_ID, LEFT_MOTOR_ID):
+            started = [onset for _, onset in self.sim.motors[motor_id].onsets if start <= onset <= end]
+            if not started:
+                return [f"M{motor_id} never started"]
+            onsets.append(started[0])
+        skew = abs(onsets[0] - onsets[1])
+        if skew > limit:
+            return [f"start skew {skew * 1000:.1f} ms, limit {limit * 1000:.1f} ms"]
+        return []
+
+    def _ground_truth(self):
+        """(right revolutions, left revolutions, x, y) from the simulator, forward positive"""
+        if self.sim is None:
+            return None
+        right = self.sim.motors[self.sim.right_motor_id]
+        left = self.sim.motors[self.sim.left_motor_id]
+        left_revs = left.ticks / left.counts_per_rev
+        return (right.ticks / right.counts_per_rev,
+                -left_revs if self.sim.left_inverted else left_revs,
+                self.sim.pose[0], self.sim.pose[1])
+
+    def _motion(self):
+        right, left = self.sim.wheel_speeds()
+        if abs(right) < MOVING_SPEED and abs(left) < MOVING_SPEED:
+            return "stopped"
+        if right > 0 and left > 0:
+            return "forward"
+        if right < 0 and left < 0:
+            return "reverse"
+        return "spin_left" if right > left else "spin_right"
+
+
+def _check_range(label, value, bounds):
+    low, high = bounds
+    if not low <= value <= high:
+        return [f"{label} {value:.3f}, expected {low} to {high}"]
+    return []
+
+
+def run_scenario(scenario, port=None, simulate=True, real_time=False, tolerance=None, verbose=True):
+    """
+    Run one scenario on a fresh controller
+
+    Args:
+        scenario: Dict from load_scenario()
+        port: Serial port of the robot (when simulate is False)
+        simulate: Drive a BoardSimulator through a LoopbackSerial
+        real_time: With simulate, use the system clock instead of a virtual one
+        tolerance: Timing tolerance override (default: the scenario's on a
+                   virtual clock, REAL_TIME_TOLERANCE on the wall clock)
+
+    Returns:
+        dict: See ScenarioRunner.run()
+    """
+    sim = None
+    if simulate:
+        from board_simulator import BoardSimulator, LoopbackSerial
+        clock = SystemClock() if real_time else VirtualClock()
+        sim = BoardSimulator(**scenario.get("simulator", {}))
+        port = LoopbackSerial(sim, clock)
+    else:
+        clock = SYSTEM_CLOCK
+    if tolerance is None and not isinstance(clock, VirtualClock):
+        tolerance = REAL_TIME_TOLERANCE
+
+    log = FrameLog(clock)
+    with MotorController(port=port, clock=clock, journal=log, **scenario.get("controller", {})) as mc:
+        runner = ScenarioRunner(mc, log, sim, tolerance, interactive=not simulate, verbose=verbose)
+        return runner.run(scenario)
+
+
+# Run scenarios (all of scenarios/ by default)
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run declarative motor test scenarios")
+    parser.add_argument("scenarios", nargs="*", help=f"Scenario files (default: {SCENARIO_DIR}/*.json)")
+    parser.add_argument("--port", default="/dev/ttyACM0")
+    parser.add_argument("--simulate", action="store_true", help="Run against board_simulator.py on a virtual clock")
+    parser.add_argument("--real-time", action="store_true", help="With --simulate: run at wall-clock speed")
+    parser.add_argument("--tolerance", type=float, help="Timing tolerance in seconds (overrides scenarios)")
+    args = parser.parse_args()
+
+    paths = args.scenarios or sorted(glob.glob(os.path.join(SCENARIO_DIR, "*.json")))
+    results = []
+    for path in paths:
+        scenario = load_scenario(path)
+        print("=" * 70)
+        print(f"{scenario['name']}: {scenario.get('description', '')}")
+        print("=" * 70)
+        results.append(run_scenario(scenario, args.port, args.simulate, args.real_time, args.tolerance))
+
+    print("\n" + "=" * 70)
+    for result in results:
+        status = "PASS" if not result["failures"] else f"FAIL ({len(result['failures'])})"
+        skipped = f", {result['skipped']} checks need --simulate" if result["skipped"] else ""
+        print(f"{result['name']:<22} {status:<10} {result['steps']:3d} steps, "
+              f"{result['scenario_s']:6.1f} s of robot time in {result['wall_s'] * 1000:7.1f} ms{skipped}")
+    sys.exit(0 if all(not r["failures"] for r in results) else 1)
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Serial port broker for the RRC controller board
+One daemon owns the port; perception, teleop and diagnostics tools connect
+over a Unix socket and share it without reconnecting
+"""
+
+import sys
+import os
+import time
+import fcntl
+import socket
+import struct
+import termios
+import selectors
+import threading
+from urllib.parse import urlparse, parse_qs
+import serial
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hiwonder_protocol import HiwonderProtocol, FrameParser
+
+BROKER_SCHEME = "broker://"
+DEFAULT_SOCKET = "/tmp/rrc_broker.sock"
+
+# Broker control frames use a function code the board never sees
+FUNC_BROKER = 0xF0
+BROKER_OP_HELLO = 0x01  # [op, priority, name...]
+BROKER_OP_SUBSCRIBE = 0x02  # [op, function...]
+BROKER_OP_UNSUBSCRIBE = 0x03  # [op, function...]
+SUBSCRIBE_ALL = 0xFF
+
+# Motor command priorities (higher preempts lower)
+PRIORITY_DIAGNOSTICS = 0
+PRIORITY_AUTONOMY = 10
+PRIORITY_TELEOP = 20
+
+MAX_CLIENT_BUFFER = 256 * 1024  # bytes queued per subscriber before frames are dropped
+
+
+class _BrokerConnection:
+    """Broker-side state of one client"""
+
+    def __init__(self, sock, number):
+        self.sock = sock
+        self.name = f"client-{number}"
+        self.priority = PRIORITY_AUTONOMY
+        self.parser = FrameParser()
+        self.subscriptions = set()
+        self.out = bytearray()
+        self.frames_dropped = 0
+        self.motor_denied = 0
+
+    def wants(self, function):
+        return function in self.subscriptions or SUBSCRIBE_ALL in self.subscriptions
+
+
+class SerialBroker:
+    """
+    Multiplexes RRC frames between the board and local clients
+
+    Outbound frames from clients are written to the port unchanged, except
+    motor set-speed commands, which go through arbitration: one client owns
+    the motors at a time. A client with higher priority takes over
+    immediately; an equal or lower one only once the owner has sent a stop
+    or disconnected. Denied commands are dropped and counted. If the owner
+    disconnects with the motors running, the broker stops them.
+
+    MotorController and ControlLoop only send when the target changes, so
+    ownership does not expire by default. With `lease` set, an owner
+    silent for that many seconds can be taken over (for owners known to
+    stream commands).
+
+    Inbound frames are decoded once and fanned out to the clients
+    subscribed to their function code. A slow subscriber loses frames
+    (counted) instead of stalling the board or the other clients.
+
+    Example:
+        broker = SerialBroker('/dev/ttyACM0').start()
+        with MotorController(port='broker://') as mc:
+            ...
+    """
+
+    def __init__(self, port='/dev/ttyACM0', baudrate=1000000, socket_path=DEFAULT_SOCKET, lease=None):
+        self.port = port
+        self.baudrate = baudrate
+        self.socket_path = socket_path
+        self.lease = lease
+        self.ser = None
+        self.parser = FrameParser()
+        self.clients = {}  # socket -> _BrokerConnection
+        self.motor_owner = None
+        self._owner_time = 0.0
+        self._owner_motors = ()
+        self._listener = None
+        self._selector = None
+        self._thread = None
+        self._running = False
+        self._connections = 0
+
+        # Statistics
+        self.frames_from_board = 0
+        self.frames_to_board = 0
+        self.motor_denied = 0
+        self.preemptions = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def open(self):
+        """Open the serial port and the listening socket"""
+        # Configure RTS/DTR before opening so the lines are never toggled
+        self.ser = serial.Serial()
+        self.ser.port = self.port
+        self.ser.baudrate = self.baudrate
+        self.ser.timeout = 0
+        self.ser.rts = False
+        self.ser.dtr = False
+        self.ser.open()
+        time.sleep(0.5)
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(self.socket_path)
+        self._listener.listen()
+        self._listener.setblocking(False)
+
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._listener, selectors.EVENT_READ, "listener")
+        self._selector.register(self.ser.fileno(), selectors.EVENT_READ, "serial")
+        print(f"Broker on {self.socket_path} for {self.port} at {self.baudrate} baud")
+
+    def start(self):
+        """Open and serve in a background thread"""
+        self.open()
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, name="serial-broker", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Open and serve on the calling thread until close() or Ctrl+C"""
+        self.open()
+        self._running = True
+        try:
+            self._serve()
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop motors, disconnect clients and release the port"""
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+        for conn in list(self.clients.values()):
+            self._drop_client(conn)
+        if self._selector is not None:
+            self._selector.close()
+            self._selector = None
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+        if self.ser is not None and self.ser.is_open:
+            self.ser.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Event loop
+    # ------------------------------------------------------------------
+
+    def _serve(self):
+        while self._running:
+            for key, events in self._selector.select(timeout=0.1):
+                if key.data == "listener":
+                    self._accept()
+                elif key.data == "serial":
+                    self._read_board()
+                else:
+                    conn = key.data
+                    if events & selectors.EVENT_WRITE:
+                        self._flush_client(conn)
+                    if events & selectors.EVENT_READ and conn.sock in self.clients:
+                        self._read_client(conn)
+
+    def _accept(self):
+        sock, _ = self._listener.accept()
+        sock.setblocking(False)
+        self._connections += 1
+        conn = _BrokerConnection(sock, self._connections)
+        self.clients[sock] = conn
+        self._selector.register(sock, selectors.EVENT_READ, conn)
+
+    def _drop_client(self, conn):
+        if self.clients.pop(conn.sock, None) is None:
+            return
+        if self._selector is not None:
+            self._selector.unregister(conn.sock)
+        conn.sock.close()
+        if conn is self.motor_owner:
+            # Don't leave the robot driving for a client that is gone
+            self._write_board(HiwonderProtocol.motor_command([[m, 0] for m in self._owner_motors]))
+            self.motor_owner = None
+            print(f"{conn.name} disconnected while driving - motors stopped")
+
+    def _read_board(self):
+        try:
+            data = self.ser.read(self.ser.in_waiting or 1)
+        except (serial.SerialException, OSError):
+            print("Serial port lost")
+            self._running = False
+            return
+        for function, payload in self.parser.feed(data):
+            self.frames_from_board += 1
+            frame = None
+            for conn in list(self.clients.values()):
+                if conn.wants(function):
+                    if frame is None:
+                        frame = HiwonderProtocol.build_frame(function, payload)
+                    self._send_client(conn, frame)
+
+    def _read_client(self, conn):
+        try:
+            data = conn.sock.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._drop_client(conn)
+            return
+
+        outgoing = bytearray()
+        now = time.monotonic()
+        for function, payload in conn.parser.feed(data):
+            if function == FUNC_BROKER:
+                self._handle_control(conn, payload)
+                continue
+            if function == HiwonderProtocol.FUNC_MOTOR:
+                speeds = HiwonderProtocol.parse_motor_command(payload)
+                if speeds is not None and not self._arbitrate(conn, speeds, now):
+                    continue
+            outgoing += HiwonderProtocol.build_frame(function, payload)
+            self.frames_to_board += 1
+        if outgoing:
+            self._write_board(outgoing)
+
+    def _handle_control(self, conn, payload):
+        if not payload:
+            return
+        op = payload[0]
+        if op == BROKER_OP_HELLO and len(payload) >= 2:
+            conn.priority = payload[1]
+            if len(payload) > 2:
+                conn.name = payload[2:].decode("utf-8", "replace")
+        elif op == BROKER_OP_SUBSCRIBE:
+            conn.subscriptions.update(payload[1:])
+        elif op == BROKER_OP_UNSUBSCRIBE:
+            conn.subscriptions.difference_update(payload[1:])
+
+    def _arbitrate(self, conn, speeds, now):
+        """Decide whether a motor command from `conn` reaches the board"""
+        owner = self.motor_owner
+        if (owner is not None and owner is not conn and self.lease is not None
+                and now - self._owner_time > self.lease):
+            owner = None  # Lease lapsed
+        if owner is not None and owner is not conn and conn.priority <= owner.priority:
+            conn.motor_denied += 1
+            self.motor_denied += 1
+            return False
+
+        if owner is not None and owner is not conn:
+            self.preemptions += 1
+        stopping = all(abs(rps) <= 0.001 for _, rps in speeds)
+        if stopping:
+            self.motor_owner = None  # Anyone may drive next
+        else:
+            self.motor_owner = conn
+            self._owner_time = now
+            self._owner_motors = tuple(motor_id for motor_id, _ in speeds)
+        return True
+
+    def _write_board(self, data):
+        try:
+            self.ser.write(data)
+        except (serial.SerialException, OSError) as e:
+            print(f"Serial write failed: {e}")
+
+    def _send_client(self, conn, frame):
+        if len(conn.out) + len(frame) > MAX_CLIENT_BUFFER:
+            conn.frames_dropped += 1
+            return
+        pending = bool(conn.out)
+        conn.out += frame
+        if not pending:
+            self._flush_client(conn)
+
+    def _flush_client(self, conn):
+        try:
+            sent = conn.sock.send(conn.out)
+        except (BlockingIOError, InterruptedError):
+            sent = 0
+        except OSError:
+            self._drop_client(conn)
+            return
+        del conn.out[:sent]
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if conn.out else 0)
+        self._selector.modify(conn.sock, events, conn)
+
+    def stats(self):
+        """Broker and per-client counters"""
+        return {
+            "frames_from_board": self.frames_from_board,
+            "frames_to_board": self.frames_to_board,
+            "motor_denied": self.motor_denied,
+            "preemptions": self.preemptions,
+            "board_frames_corrupt": self.parser.frames_corrupt,
+            "motor_owner": self.motor_owner.name if self.motor_owner else None,
+            "clients": {c.name: {"priority": c.priority, "frames_dropped": c.frames_dropped,
+                                 "motor_denied": c.motor_denied}
+                        for c in self.clients.values()},
+        }
+
+
+class BrokerClient:
+    """
+    Serial-port-like connection to a SerialBroker
+
+    Provides the subset of serial.Serial used by MotorController and
+    TelemetryReader (write, flush, read, in_waiting, is_open, close), so
+    they work unchanged on top of the broker. MotorController opens one
+    when given a 'broker://' port:
+
+        broker://                             default socket
+        broker:///tmp/rrc_broker.sock?priority=20&name=teleop
+
+    Inbound frames are only delivered for subscribed function codes;
+    TelemetryReader.subscribe() forwards its function codes here.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, priority=PRIORITY_AUTONOMY, name=None, timeout=1.0):
+        self.socket_path = socket_path
+        self.priority = priority
+        self.name = name or f"{os.path.basename(sys.argv[0]) or 'python'}-{os.getpid()}"
+        self.timeout = timeout
+        self.sock = None
+        self._write_lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url, timeout=1.0):
+        """Create a client from a broker:// URL"""
+        parsed = urlparse(url)
+        query = parse_qs(parsed.query)
+        return cls(socket_path=parsed.path or DEFAULT_SOCKET,
+                   priority=int(query.get("priority", [PRIORITY_AUTONOMY])[0]),
+                   name=query.get("name", [None])[0],
+                   timeout=timeout)
+
+    def open(self):
+        """Connect to the broker and announce name and priority"""
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+        self.sock.settimeout(self.timeout)
+        name = self.name.encode("utf-8")[:64]
+        self._control(bytes([BROKER_OP_HELLO, self.priority]) + name)
+
+    @property
+    def is_open(self):
+        return self.sock is not None
+
+    @property
+    def port(self):
+        return BROKER_SCHEME + self.socket_path
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.sock.close()
+            self.sock = None
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def subscribe(self, *functions):
+        """Receive frames with these function codes (SUBSCRIBE_ALL for every frame)"""
+        self._control(bytes([BROKER_OP_SUBSCRIBE] + list(functions)))
+
+    def unsubscribe(self, *functions):
+        self._control(bytes([BROKER_OP_UNSUBSCRIBE] + list(functions)))
+
+    def _control(self, payload):
+        self.write(HiwonderProtocol.build_frame(FUNC_BROKER, payload))
+
+    def write(self, data):
+        if self.sock is None:
+            raise serial.SerialException("Broker connection not open")
+        with self._write_lock:
+            self.sock.sendall(data)
+        return len(data)
+
+    def flush(self):
+        """Writes are handed to the broker by write(); nothing to drain"""
+
+    @property
+    def in_waiting(self):
+        if self.sock is None:
+            raise serial.SerialException("Broker connection not open")
+        buf = fcntl.ioctl(self.sock.fileno(), termios.FIONREAD, b"\0\0\0\0")
+        return struct.unpack("I", buf)[0]
+
+    def read(self, size=1):
+        """Read up to `size` bytes; b"" after the timeout"""
+        if self.sock is None:
+            raise serial.SerialException("Broker connection not open")
+        try:
+            data = self.sock.recv(size)
+        except socket.timeout:
+            return b""
+        if not data:
+            raise serial.SerialException("Broker closed the connection")
+        return data
+
+
+# Run the broker daemon
+if __name__ == '__main__':
+    import argparse
+    import signal
+
+    parser = argparse.ArgumentParser(description="Share the RRC board's serial port between processes")
+    parser.add_argument("--port", default="/dev/ttyACM0")
+    parser.add_argument("--baudrate", type=int, default=1000000)
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    parser.add_argument("--lease", type=float, default=None,
+                        help="Seconds of silence after which the motor owner can be taken over")
+    parser.add_argument("--simulate", action="store_true", help="Serve board_simulator.py")
+    args = parser.parse_args()
+
+    sim = None
+    if args.simulate:
+        from board_simulator import BoardSimulator
+        sim = BoardSimulator().start()
+        args.port = sim.port
+
+    broker = SerialBroker(args.port, args.baudrate, args.socket, args.lease)
+    signal.signal(signal.SIGTERM, lambda *_: setattr(broker, "_running", False))
+    try:
+        broker.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if sim is not None:
+            sim.close()
+        print(f"\nBroker stopped: {broker.stats()}")
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+Shared-memory velocity command slot between processes
+A perception process writes (linear, angular, timestamp) into a seqlock
+slot in multiprocessing.shared_memory and rings a doorbell socket; the
+motor process wakes on the doorbell (or polls), applies the freshest
+command and rejects commands older than max_age
+"""
+
+import sys
+import os
+import time
+import zlib
+import select
+import socket
+import struct
+import threading
+import multiprocessing
+from multiprocessing import shared_memory, resource_tracker
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from latency_metrics import LatencyHistogram
+
+DEFAULT_NAME = "jetacker_command"
+MAX_AGE = 0.2  # seconds, older commands are rejected (robot stops)
+POLL_INTERVAL = 0.01  # seconds, longest consumer wait; the doorbell wakes it on each write
+READ_RETRIES = 100
+
+# Slot layout: seq | payload (linear, angular, timestamp_ns, seq) | crc32(payload)
+SEQ_FORMAT = "<Q"
+PAYLOAD_FORMAT = "<ddqQ"
+PAYLOAD_OFFSET = struct.calcsize(SEQ_FORMAT)
+PAYLOAD_SIZE = struct.calcsize(PAYLOAD_FORMAT)
+CRC_OFFSET = PAYLOAD_OFFSET + PAYLOAD_SIZE
+SLOT_SIZE = 64  # One cache line
+
+
+class SharedCommandSlot:
+    """
+    Single-writer seqlock slot in shared memory
+
+    The writer makes the sequence number odd, writes the payload, then
+    makes it even again; a reader retries if it saw an odd number or the
+    number changed during its copy. Python has no memory fences, and on
+    the Jetson's ARM cores another core may observe the stores out of
+    order, so the payload also carries its sequence number and a CRC32:
+    a read is only accepted if both match, which rejects torn copies on
+    any CPU. Neither side ever blocks the other.
+
+    Timestamps are time.monotonic_ns(), which is system-wide on Linux, so
+    ages can be compared across processes.
+
+    Each write also sends one byte to a Unix datagram socket in the
+    abstract namespace ("doorbell"), which the reader blocks on in wait()
+    instead of sleeping between polls. The doorbell is only a wake-up:
+    a lost or unanswered ring (no reader bound, queue full) costs nothing
+    and the slot stays the source of truth.
+
+    Example:
+        slot = SharedCommandSlot.create()          # perception process
+        slot.write(0.2, 0.1)
+        slot = SharedCommandSlot.attach()          # motor process
+        seq, linear, angular, timestamp_ns = slot.read()
+    """
+
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self._buf = shm.buf
+        self.name = shm.name
+        self.owner = owner
+        self.torn_reads = 0  # Copies rejected and retried
+        self._bell_address = "\0" + shm.name.lstrip("/") + ".bell"
+        self._bell_out = None  # Writer side, unbound
+        self._bell_in = None  # Reader side, bound on the first wait()
+        seq = self._read_seq()
+        self._seq = seq + 1 if seq & 1 else seq  # A writer died mid-write: skip to the next even number
+
+    @classmethod
+    def create(cls, name=DEFAULT_NAME, replace=True):
+        """
+        Create the slot (the process that creates it unlinks it on close)
+
+        Args:
+            replace: Remove a slot left behind by a crashed process
+        """
+        try:
+            shm = shared_memory.SharedMemory(name, create=True, size=SLOT_SIZE)
+        except FileExistsError:
+            if not replace:
+                raise
+            stale = shared_memory.SharedMemory(name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name, create=True, size=SLOT_SIZE)
+        shm.buf[:SLOT_SIZE] = bytes(SLOT_SIZE)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name=DEFAULT_NAME):
+        """Open an existing slot"""
+        try:
+            shm = shared_memory.SharedMemory(name, track=False)  # Python 3.13+
+        except TypeError:
+            shm = shared_memory.SharedMemory(name)
+            if multiprocessing.parent_process() is None:
+                # A separately started process has its own resource tracker,
+                # which would unlink the slot when this process exits; only
+                # the creator should. multiprocessing children share the
+                # creator's tracker and must leave its registration alone.
+                resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+
+    def _read_seq(self):
+        return struct.unpack_from(SEQ_FORMAT, self._buf, 0)[0]
+
+    def write(self, linear_mps, angular_radps, timestamp_ns=None):
+        """
+        Publish a velocity command (single writer only)
+
+        Returns:
+            int: Command sequence number
+        """
+        if timestamp_ns is None:
+            timestamp_ns = time.monotonic_ns()
+        seq = self._seq + 2
+        payload = struct.pack(PAYLOAD_FORMAT, float(linear_mps), float(angular_radps), int(timestamp_ns), seq)
+        buf = self._buf
+        struct.pack_into(SEQ_FORMAT, buf, 0, seq - 1)
+        buf[PAYLOAD_OFFSET:CRC_OFFSET] = payload
+        struct.pack_into("<I", buf, CRC_OFFSET, zlib.crc32(payload))
+        struct.pack_into(SEQ_FORMAT, buf, 0, seq)
+        self._seq = seq
+        self._ring()
+        return seq >> 1
+
+    def _ring(self):
+        if self._bell_out is None:
+            self._bell_out = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._bell_out.setblocking(False)
+        try:
+            self._bell_out.sendto(b"\0", self._bell_address)
+        except OSError:  # No reader bound, or its queue is full (it is awake anyway)
+            pass
+
+    def wait(self, timeout):
+        """
+        Block until the next write or `timeout` seconds (single reader)
+
+        Falls back to sleeping when the doorbell can't be bound (another
+        reader has it, or no abstract socket namespace).
+
+        Returns:
+            bool: True if woken by a write
+        """
+        if self._bell_in is None:
+            bell = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            try:
+                bell.bind(self._bell_address)
+            except OSError:
+                bell.close()
+                bell = False
+            else:
+                bell.setblocking(False)
+            self._bell_in = bell
+        if self._bell_in is False:
+            time.sleep(timeout)
+            return False
+        ready = select.select([self._bell_in], [], [], timeout)[0]
+        if not ready:
+            return False
+        try:
+            while True:  # Several writes since the last wait count as one
+                self._bell_in.recv(64)
+        except BlockingIOError:
+            pass
+        return True
+
+    def read(self, retries=READ_RETRIES):
+        """
+        Latest command
+
+        Returns:
+            tuple: (seq, linear_mps, angular_radps, timestamp_ns), or None
+                   if nothing was written yet or every copy was torn
+        """
+        buf = self._buf
+        for _ in range(retries):
+            seq = self._read_seq()
+            if seq == 0:
+                return None
+            if seq & 1:
+                self.torn_reads += 1
+                continue
+            payload = bytes(buf[PAYLOAD_OFFSET:CRC_OFFSET])
+            crc = struct.unpack_from("<I", buf, CRC_OFFSET)[0]
+            if self._read_seq() == seq and zlib.crc32(payload) == crc:
+                linear, angular, timestamp_ns, payload_seq = struct.unpack(PAYLOAD_FORMAT, payload)
+                if payload_seq == seq:
+                    return seq >> 1, linear, angular, timestamp_ns
+            self.torn_reads += 1
+        return None
+
+    def close(self):
+        """Detach; the creating process also removes the slot"""
+        if self._shm is None:
+            return
+        for bell in (self._bell_out, self._bell_in):
+            if bell:
+                bell.close()
+        self._bell_out = self._bell_in = None
+        self._buf = None
+        self._shm.close()
+        if self.owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class SharedCommandConsumer:
+    """
+    Applies the freshest slot command to a MotorController
+
+    Each poll reads the slot once. A new command is applied with
+    set_velocity() unless it is older than `max_age` when it arrives;
+    when the producer stops publishing, the robot is stopped once the last
+    command reaches `max_age`. Between polls the thread waits on the
+    slot's doorbell for at most `poll_interval` (0 spins a core instead).
+    Commands overwritten before a poll saw them are counted as superseded,
+    never replayed. Commands are only sent when the target changed.
+
+    Use MotorController(non_blocking_preactivate=True) so a start doesn't
+    stall polling for the pre-activation delay.
+
+    Example:
+        with SharedCommandConsumer(mc, SharedCommandSlot.attach()) as consumer:
+            ...
+    """
+
+    def __init__(self, mc, slot, max_age=MAX_AGE, poll_interval=POLL_INTERVAL):
+        self.mc = mc
+        self.slot = slot
+        self.max_age_ns = int(max_age * 1e9)
+        self.poll_interval = poll_interval
+        self.latency = LatencyHistogram()  # Publish -> motor command written
+        self._last_seq = None
+        self._command = (0.0, 0.0)
+        self._thread = None
+        self._running = False
+
+        # Statistics
+        self.polls = 0
+        self.commands_applied = 0
+        self.commands_superseded = 0
+        self.stale_rejected = 0
+        self.timeouts = 0
+
+    def poll(self):
+        """Read the slot once and update the motors"""
+        self.polls += 1
+        command = self.slot.read()
+        if command is None:
+            return
+        seq, linear, angular, timestamp_ns = command
+        stale = time.monotonic_ns() - timestamp_ns > self.max_age_ns
+
+        if seq != self._last_seq:
+            if self._last_seq is not None and seq > self._last_seq + 1:
+                self.commands_superseded += seq - self._last_seq - 1
+            self._last_seq = seq
+            if stale:
+                self.stale_rejected += 1
+                self._apply(0.0, 0.0)
+                return
+            self._apply(linear, angular)
+            self.commands_applied += 1
+            self.latency.record(time.monotonic_ns() - timestamp_ns)
+        elif stale and self._command != (0.0, 0.0):
+            self.timeouts += 1
+            self._apply(0.0, 0.0)
+
+    def _apply(self, linear, angular):
+        if (linear, angular) == self._command:
+            return
+        if linear == 0.0 and angular == 0.0:
+            self.mc.stop()
+        else:
+            self.mc.set_velocity(linear, angular)
+        self._command = (linear, angular)
+
+    def start(self):
+        """Poll on a background thread"""
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="shared-command", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop polling and the motors"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self._apply(0.0, 0.0)
+
+    def _run(self):
+        while self._running:
+            self.poll()
+            if self.poll_interval:
+                self.slot.wait(self.poll_interval)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def stats(self):
+        """Counters and publish-to-command latency (microseconds)"""
+        latency = self.latency.to_dict()
+        return {
+            "polls": self.polls,
+            "commands_applied": self.commands_applied,
+            "commands_superseded": self.commands_superseded,
+            "stale_rejected": self.stale_rejected,
+            "timeouts": self.timeouts,
+            "torn_reads": self.slot.torn_reads,
+            "latency_p50_us": latency["p50_ns"] / 1e3,
+            "latency_p99_us": latency["p99_ns"] / 1e3,
+        }
+
+
+# ----------------------------------------------------------------------
+# Cross-process handoff benchmark
+# ----------------------------------------------------------------------
+
+def _slot_producer(name, count, interval):
+    slot = SharedCommandSlot.attach(name)
+    next_time = time.monotonic()
+    for i in range(count):
+        slot.write(0.001 * i, 0.0)
+        next_time += interval
+        time.sleep(max(0.0, next_time - time.monotonic()))
+    slot.close()
+
+
+def _queue_producer(queue, count, interval):
+    next_time = time.monotonic()
+    for i in range(count):
+        queue.put((0.001 * i, 0.0, time.monotonic_ns()))
+        next_time += interval
+        time.sleep(max(0.0, next_time - time.monotonic()))
+    queue.put(None)
+
+
+def benchmark_handoff(count=2000, rate_hz=500, poll_interval=POLL_INTERVAL):
+    """
+    Publish-to-receive latency from another process: seqlock slot vs
+    multiprocessing.Queue
+
+    Args:
+        poll_interval: Longest slot wait between polls (doorbell wakes it); 0 spins a core
+
+    Returns:
+        dict: {"shared_memory": {...}, "queue": {...}} with count and
+              p50/p99/max in microseconds; the slot result adds superseded
+              (commands overwritten before a poll) and torn_reads
+    """
+    context = multiprocessing.get_context("spawn")  # Fresh interpreters, like a separate detector process
+    interval = 1.0 / rate_hz
+    results = {}
+
+    name = f"{DEFAULT_NAME}_bench_{os.getpid()}"
+    with SharedCommandSlot.create(name) as slot:
+        histogram = LatencyHistogram()
+        producer = context.Process(target=_slot_producer, args=(name, count, interval))
+        producer.start()
+        last_seq = 0
+        superseded = 0
+        while last_seq < count:
+            command = slot.read()
+            if command is not None and command[0] != last_seq:
+                histogram.record(time.monotonic_ns() - command[3])
+                superseded += command[0] - last_seq - 1
+                last_seq = command[0]
+            elif not producer.is_alive():
+                break
+            elif poll_interval:
+                slot.wait(poll_interval)
+        producer.join()
+        results["shared_memory"] = dict(_summary(histogram), superseded=superseded, torn_reads=slot.torn_reads)
+
+    queue = context.Queue()
+    histogram = LatencyHistogram()
+    producer = context.Process(target=_queue_producer, args=(queue, count, interval))
+    producer.start()
+    while True:
+        item = queue.get()
+        if item is None:
+            break
+        histogram.record(time.monotonic_ns() - item[2])
+    producer.join()
+    results["queue"] = _summary(histogram)
+    return results
+
+
+def _summary(histogram):
+    summary = histogram.to_dict()
+    return {"count": summary["count"], "p50_us": summary["p50_ns"] / 1e3,
+            "p99_us": summary["p99_ns"] / 1e3, "max_us": summary["max_ns"] / 1e3}
+
+
+def _demo_producer(name, seconds, stall_after):
+    """Publishes a slow turn at 30 Hz like a detector, then stalls"""
+    slot = SharedCommandSlot.attach(name)
+    start = time.monotonic()
+    while time.monotonic() - start < seconds:
+        if time.monotonic() - start < stall_after:
+            slot.write(0.1, 0.5)
+        time.sleep(1.0 / 30)
+    slot.close()
+
+
+# Benchmark the handoff; --simulate also drives the simulator from a producer process
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Shared-memory command slot benchmark")
+    parser.add_argument("--port", default="/dev/ttyACM0")
+    parser.add_argument("--simulate", action="store_true",
+                        help="Also drive board_simulator.py from a producer process")
+    parser.add_argument("--count", type=int, default=2000, help="Commands per benchmark")
+    parser.add_argument("--rate", type=float, default=500.0, help="Publish rate (Hz)")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL, help="Seconds; 0 = spin")
+    args = parser.parse_args()
+
+    print(f"Handoff latency, {args.count} commands at {args.rate:.0f} Hz from another process:")
+    results = benchmark_handoff(args.count, args.rate, args.poll_interval)
+    for method, r in results.items():
+        extra = f", superseded {r['superseded']}, torn reads {r['torn_reads']}" if "superseded" in r else ""
+        print(f"  {method:<14} p50 {r['p50_us']:7.1f} us  p99 {r['p99_us']:7.1f} us  "
+              f"max {r['max_us']:8.1f} us  ({r['count']} received{extra})")
+
+    if args.simulate:
+        from board_simulator import BoardSimulator
+        from motor_controller import MotorController
+
+        sim = BoardSimulator().start()
+        try:
+            with SharedCommandSlot.create() as slot, \
+                    MotorController(port=sim.port, non_blocking_preactivate=True) as mc:
+                producer = multiprocessing.get_context("spawn").Process(
+                    target=_demo_producer, args=(slot.name, 3.0, 2.0))
+                producer.start()
+                with SharedCommandConsumer(mc, slot) as consumer:
+                    producer.join()
+                stats = consumer.stats()
+        finally:
+            sim.close()
+        print(f"\nSimulator: {stats['commands_applied']} commands applied, {stats['timeouts']} stale stop(s) "
+              f"after the producer stalled, latency p50 {stats['latency_p50_us']:.0f} us, "
+              f"p99 {stats['latency_p99_us']:.0f} us")
+        print(f"Robot stopped: {all(abs(m.speed) < 0.01 for m in sim.motors.values())}")
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Closed-loop wheel speed control for MotorController
+Per-wheel PID on encoder feedback with anti-windup, plus feedforward from a
+measured command-to-speed curve
+"""
+
+import sys
+import os
+import json
+import time
+import threading
+from collections import deque
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hiwonder_protocol import HiwonderProtocol
+from motor_controller import RIGHT_MOTOR_ID, LEFT_MOTOR_ID, LEFT_MOTOR_INVERTED
+
+DEFAULT_RATE_HZ = 50
+COMMAND_LIMIT = 1.0  # Commands above 1.0 give no extra speed
+FEEDBACK_TIMEOUT = 0.2  # seconds without encoder reports before running on feedforward only
+
+
+class EncoderFeedback:
+    """
+    Latest measured wheel speeds from the board's encoder reports
+
+    Speeds are converted to the MotorController convention (positive =
+    forward for both wheels). The stock firmware does not stream encoder
+    values; board_simulator.py and patched firmware do.
+    """
+
+    def __init__(self):
+        self.right_rps = 0.0
+        self.left_rps = 0.0
+        self.timestamp_ns = None
+        self.reports = 0
+
+    def attach(self, reader):
+        """Subscribe to a TelemetryReader (or AsyncMotorController)"""
+        reader.subscribe(HiwonderProtocol.FUNC_MOTOR, self.on_frame)
+        return self
+
+    def detach(self, reader):
+        reader.unsubscribe(HiwonderProtocol.FUNC_MOTOR, self.on_frame)
+
+    def on_frame(self, payload, timestamp_ns):
+        encoders = HiwonderProtocol.parse_encoder_report(payload)
+        if encoders is None:
+            return
+        speeds = {motor_id: rps for motor_id, _, rps in encoders}
+        if RIGHT_MOTOR_ID not in speeds or LEFT_MOTOR_ID not in speeds:
+            return
+        self.right_rps = speeds[RIGHT_MOTOR_ID]
+        self.left_rps = -speeds[LEFT_MOTOR_ID] if LEFT_MOTOR_INVERTED else speeds[LEFT_MOTOR_ID]
+        self.timestamp_ns = timestamp_ns
+        self.reports += 1
+
+    def age(self, now_ns=None):
+        """Seconds since the last report (inf before the first)"""
+        if self.timestamp_ns is None:
+            return float("inf")
+        return ((now_ns or time.monotonic_ns()) - self.timestamp_ns) * 1e-9
+
+
+class FeedforwardCurve:
+    """
+    Command needed for a wheel speed, from a measured command -> speed table
+
+    The table covers positive commands; negative speeds mirror it. Speeds
+    are made non-decreasing, and the largest command that still measured
+    zero speed (stiction) becomes the starting point of the curve, so a
+    small target gets a command that actually turns the wheel.
+    """
+
+    def __init__(self, commands, speeds):
+        commands = np.asarray(commands, dtype=np.float64)
+        speeds = np.asarray(speeds, dtype=np.float64)
+        order = np.argsort(commands)
+        commands = np.concatenate([[0.0], commands[order]])
+        speeds = np.maximum.accumulate(np.concatenate([[0.0], np.abs(speeds[order])]))
+        # Keep the last command of each run of equal speeds
+        keep = np.append(speeds[1:] > speeds[:-1], True)
+        self.commands = commands[keep]
+        self.speeds = speeds[keep]
+
+    @classmethod
+    def identity(cls, limit=COMMAND_LIMIT):
+        """Command = speed, i.e. what set_wheel_speeds() assumes"""
+        return cls([limit], [limit])
+
+    def command_for(self, speed):
+        """Feedforward command for a target wheel speed (RPS)"""
+        if speed == 0.0:
+            return 0.0
+        magnitude = abs(speed)
+        top_speed, top_command = self.speeds[-1], self.commands[-1]
+        if magnitude > top_speed:
+            command = top_command * magnitude / top_speed  # Extrapolate the last slope
+        else:
+            command = float(np.interp(magnitude, self.speeds, self.commands))
+        return command if speed > 0 else -command
+
+    def to_dict(self):
+        return {"commands": self.commands[1:].tolist(), "speeds": self.speeds[1:].tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["commands"], data["speeds"])
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def measure_feedforward(mc, feedback, commands=(0.05, 0.1, 0.2, 0.3, 0.4, 0.6, 0.8, 1.0),
+                        settle=0.5, average=0.3):
+    """
+    Measure the command -> speed curve by stepping through commands
+
+    Args:
+        mc: Connected MotorController (robot on a stand or with room to drive)
+        feedback: Attached EncoderFeedback
+        settle: Seconds to wait after each step
+        average: Seconds of reports averaged per step
+
+    Returns:
+        FeedforwardCurve (per-wheel speeds averaged)
+    """
+    speeds = []
+    try:
+        for command in commands:
+            mc.set_wheel_speeds(command, command)
+            time.sleep(settle)
+            samples = []
+            end = time.monotonic() + average
+            while time.monotonic() < end:
+                samples.append((feedback.right_rps + feedback.left_rps) / 2.0)
+                time.sleep(0.01)
+            speeds.append(float(np.mean(samples)))
+    finally:
+        mc.stop()
+    return FeedforwardCurve(commands, speeds)
+
+
+class WheelPID:
+    """
+    PID on one wheel's speed with feedforward and anti-windup
+
+    The derivative acts on the measurement (no kick on setpoint steps).
+    Anti-windup is conditional integration: while the output is saturated
+    the integrator only moves in the direction that leaves saturation, and
+    it is clamped to the output range. It is also held while the wheel is
+    still at rest, so the pre-activation delay and cold start don't wind
+    it up and overshoot once the wheel moves.
+    """
+
+    def __init__(self, kp=0.3, ki=1.5, kd=0.0, output_limit=COMMAND_LIMIT):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.output_limit = output_limit
+        self.integral = 0.0
+        self._last_measured = None
+
+    def reset(self):
+        self.integral = 0.0
+        self._last_measured = None
+
+    def update(self, target, measured, dt, feedforward=0.0):
+        """
+        Compute the next command
+
+        Args:
+            target, measured: Wheel speed in RPS
+            dt: Seconds since the previous update
+            feedforward: Open-loop command for the target
+
+        Returns:
+            float: Command, clamped to +/-output_limit
+        """
+        error = target - measured
+        derivative = 0.0
+        if self._last_measured is not None and dt > 0:
+            derivative = -(measured - self._last_measured) / dt
+        self._last_measured = measured
+
+        limit = self.output_limit
+        unclamped = feedforward + self.kp * error + self.integral + self.kd * derivative
+        output = min(max(unclamped, -limit), limit)
+        starting = measured == 0.0 and target != 0.0
+        if not starting and (output == unclamped or (unclamped > output) != (error > 0)):
+            self.integral = min(max(self.integral + self.ki * error * dt, -limit), limit)
+        return output
+
+
+class SpeedController:
+    """
+    Fixed-rate closed-loop wheel speed controller
+
+    set_target() stores the target (latest wins, as in ControlLoop); the
+    loop thread runs each wheel's PID against the latest encoder speeds
+    and sends the commands with mc.set_wheel_speeds(). Without recent
+    encoder reports it falls back to feedforward only. A zero target
+    resets the PIDs and stops the motors.
+
+    Use MotorController(non_blocking_preactivate=True) so pre-activation
+    doesn't stall the loop.
+
+    Example:
+        feedback = EncoderFeedback().attach(reader)
+        with SpeedController(mc, feedback, feedforward=curve) as sc:
+            sc.set_target(0.5, 0.5)
+    """
+
+    def __init__(self, mc, feedback, rate_hz=DEFAULT_RATE_HZ, feedforward=None,
+                 kp=0.3, ki=1.5, kd=0.0, output_limit=COMMAND_LIMIT, history=0):
+        self.mc = mc
+        self.feedback = feedback
+        self.rate_hz = rate_hz
+        self.period = 1.0 / rate_hz
+        self.feedforward = feedforward or FeedforwardCurve.identity(output_limit)
+        self.right_pid = WheelPID(kp, ki, kd, output_limit)
+        self.left_pid = WheelPID(kp, ki, kd, output_limit)
+        self.history = deque(maxlen=history) if history else None
+
+        self._target = (0.0, 0.0)
+        self._thread = None
+        self._running = False
+        self._last_tick = None
+        self._stopped = True
+
+        # Statistics
+        self.ticks = 0
+        self.overruns = 0
+        self.feedback_timeouts = 0
+
+    def set_target(self, right_rps, left_rps):
+        """Set the wheel speed targets (RPS, positive = forward)"""
+        self._target = (float(right_rps), float(left_rps))
+
+    def start(self):
+        """Start the control thread"""
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="speed-controller", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the control thread and the motors"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self._target = (0.0, 0.0)
+        self.mc.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while self._running:
+            now = time.monotonic()
+            if now < next_tick:
+                time.sleep(next_tick - now)
+                now = time.monotonic()
+            if now - next_tick >= self.period:
+                self.overruns += 1
+                next_tick = now
+            next_tick += self.period
+            self.tick(now)
+
+    def tick(self, now):
+        """Run one control step"""
+        self.ticks += 1
+        dt = self.period if self._last_tick is None else now - self._last_tick
+        self._last_tick = now
+        target_right, target_left = self._target
+
+        if target_right == 0.0 and target_left == 0.0:
+            if not self._stopped:
+                self.mc.stop()
+                self.right_pid.reset()
+                self.left_pid.reset()
+                self._stopped = True
+            command_right = command_left = 0.0
+        else:
+            self._stopped = False
+            ff_right = self.feedforward.command_for(target_right)
+            ff_left = self.feedforward.command_for(target_left)
+            if self.feedback.age() > FEEDBACK_TIMEOUT:
+                self.feedback_timeouts += 1
+                command_right, command_left = ff_right, ff_left
+            else:
+                command_right = self.right_pid.update(target_right, self.feedback.right_rps, dt, ff_right)
+                command_left = self.left_pid.update(target_left, self.feedback.left_rps, dt, ff_left)
+            self.mc.set_wheel_speeds(command_right, command_left)
+
+        if self.history is not None:
+            self.history.append((now, target_right, target_left,
+                                 self.feedback.right_rps, self.feedback.left_rps,
+                                 command_right, command_left))
+
+
+def step_metrics(t, measured, target, settle_band=0.05):
+    """
+    Step response metrics for one wheel
+
+    Args:
+        t: Sample times (seconds from the step)
+        measured: Measured speeds
+        target: Step target
+
+    Returns:
+        dict: rise_time (10-90 %), overshoot_pct, settling_time (within
+              settle_band of target), steady_state_error (mean of the last
+              quarter)
+    """
+    t = np.asarray(t, dtype=np.float64)
+    y = np.asarray(measured, dtype=np.float64) / target
+    above_10 = np.flatnonzero(y >= 0.1)
+    above_90 = np.flatnonzero(y >= 0.9)
+    rise = t[above_90[0]] - t[above_10[0]] if len(above_10) and len(above_90) else float("nan")
+    outside = np.flatnonzero(np.abs(y - 1.0) > settle_band)
+    if len(outside) == 0:
+        settling = 0.0
+    elif outside[-1] + 1 < len(t):
+        settling = t[outside[-1] + 1]
+    else:
+        settling = float("nan")
+    tail = y[len(y) * 3 // 4:]
+    return {
+        "rise_time": float(rise),
+        "overshoot_pct": float(max(0.0, y.max() - 1.0) * 100.0),
+        "settling_time": float(settling),
+        "steady_state_error": float((1.0 - tail.mean()) * target),
+    }
+
+
+# Step response on the simulated board: open loop vs closed loop
+if __name__ == '__main__':
+    import argparse
+    from motor_controller import MotorController
+    from telemetry_reader import TelemetryReader
+
+    parser = argparse.ArgumentParser(description="Closed-loop wheel speed step response")
+    parser.add_argument("--port", default="/dev/ttyACM0")
+    parser.add_argument("--simulate", action="store_true", help="Run against board_simulator.py")
+    parser.add_argument("--load-gain", type=float, default=0.6,
+                        help="Simulator: fraction of the rated speed reached under load")
+    parser.add_argument("--target", type=float, default=0.5, help="Step target in RPS")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--measure-feedforward", action="store_true",
+                        help="Measure the command -> speed curve first")
+    parser.add_argument("--kp", type=float, default=0.3)
+    parser.add_argument("--ki", type=float, default=1.5)
+    args = parser.parse_args()
+
+    sim = None
+    if args.simulate:
+        from board_simulator import BoardSimulator
+        sim = BoardSimulator(load_gain=args.load_gain).start()
+        args.port = sim.port
+
+    def record(mc, feedback, seconds, controller=None):
+        samples = []
+        start = time.monotonic()
+        while time.monotonic() - start < seconds:
+            samples.append((time.monotonic() - start, feedback.right_rps, feedback.left_rps))
+            time.sleep(0.01)
+        if controller is None:
+            mc.stop()
+        else:
+            controller.set_target(0.0, 0.0)
+        time.sleep(1.0)
+        return np.array(samples)
+
+    def report(name, samples):
+        for wheel, column in (("right", 1), ("left", 2)):
+            m = step_metrics(samples[:, 0], samples[:, column], args.target)
+            print(f"  {name:<12} {wheel:<5} rise {m['rise_time'] * 1000:6.0f} ms  "
+                  f"overshoot {m['overshoot_pct']:5.1f} %  settle {m['settling_time'] * 1000:6.0f} ms  "
+                  f"steady-state error {m['steady_state_error']:+.3f} RPS")
+
+    try:
+        with MotorController(port=args.port, non_blocking_preactivate=True) as mc, \
+                TelemetryReader(mc.ser) as reader:
+            feedback = EncoderFeedback().attach(reader)
+            mc.warm_up()
+
+            curve = None
+            if args.measure_feedforward:
+                curve = measure_feedforward(mc, feedback)
+                print(f"Measured feedforward: {curve.to_dict()}")
+                time.sleep(1.0)
+
+            print(f"\nStep to {args.target} RPS")
+            mc.set_wheel_speeds(args.target, args.target)
+            report("open loop", record(mc, feedback, args.seconds))
+
+            with SpeedController(mc, feedback, feedforward=curve, kp=args.kp, ki=args.ki) as sc:
+                sc.set_target(args.target, args.target)
+                samples = record(mc, feedback, args.seconds, sc)
+            report("closed loop", samples)
+    finally:
+        if sim is not None:
+            sim.close()
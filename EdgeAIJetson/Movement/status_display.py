@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Diffed status display for the board's RGB LEDs and OLED
+Keeps the desired LED colors and OLED lines, compares them with what was
+last sent and writes only the changed LEDs and lines, rate-limited so
+cosmetic frames never get in the way of motor commands
+"""
+
+import sys
+import os
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hiwonder_protocol import HiwonderProtocol
+
+RGB_INTERVAL = 0.05  # seconds between LED frames (20 Hz)
+OLED_INTERVAL = 0.2  # seconds between frames for one OLED line (5 Hz)
+BYTE_BUDGET = 2000  # bytes/s of display frames, ~2% of the 1 Mbaud link
+TICK_RATE_HZ = 20
+
+
+class StatusDisplay:
+    """
+    Retained LED / OLED state, sent as diffs
+
+    set_pixel() and set_text() only record the desired state, so status
+    code can call them every loop from any thread. flush() (or the
+    start() timer) sends what changed since the last frame: one RGB frame
+    with just the changed LEDs and one OLED frame per changed line.
+    Intermediate states between flushes are never sent.
+
+    Motor commands keep priority: frames go through
+    MotorController.write_low_priority(), which skips the write while a
+    motor frame is being written or a pre-activated command is pending,
+    and the display is capped at `byte_budget` bytes/s with per-region
+    minimum intervals. Skipped regions stay dirty and are retried on the
+    next flush.
+
+    Example:
+        display = StatusDisplay(mc).start()
+        display.set_pixel(1, 0, 255, 0)
+        display.set_text(1, f"Bat {volts:.2f}V")
+    """
+
+    def __init__(self, mc, rgb_interval=RGB_INTERVAL, oled_interval=OLED_INTERVAL,
+                 byte_budget=BYTE_BUDGET, clock=None):
+        self.mc = mc
+        self.clock = clock or mc.clock
+        self.rgb_interval = rgb_interval
+        self.oled_interval = oled_interval
+        self.byte_budget = byte_budget
+
+        self._lock = threading.Lock()
+        self._rgb = {}  # index -> (r, g, b) desired
+        self._sent_rgb = {}  # index -> (r, g, b) on the board
+        self._text = {}  # line -> text desired
+        self._sent_text = {}  # line -> text on the board
+        self._rgb_due = 0.0
+        self._line_due = {}  # line -> earliest time of its next frame
+        self._tokens = float(byte_budget)  # Up to one second of budget as burst
+        self._tokens_at = None
+        self._timer = None
+        self._tick_interval = None
+
+        # Statistics
+        self.updates = 0  # set_pixel / set_text calls
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.deferred_busy = 0  # flushes that yielded to a motor write
+        self.deferred_budget = 0  # frames held back by the byte budget
+
+    def set_pixel(self, index, r, g, b):
+        """Set LED `index` (1-RGB_PIXELS) to r, g, b (0-255)"""
+        with self._lock:
+            self._rgb[index] = (int(r), int(g), int(b))
+            self.updates += 1
+
+    def set_pixels(self, colors):
+        """Set LEDs 1..n from a list of (r, g, b)"""
+        for index, color in enumerate(colors, 1):
+            self.set_pixel(index, *color)
+
+    def set_text(self, line, text):
+        """Set OLED `line` (1-OLED_LINES); truncated to OLED_LINE_CHARS"""
+        with self._lock:
+            self._text[line] = str(text)[:HiwonderProtocol.OLED_LINE_CHARS]
+            self.updates += 1
+
+    def invalidate(self):
+        """Forget what the board shows, e.g. after a board reset; everything is resent"""
+        with self._lock:
+            self._sent_rgb.clear()
+            self._sent_text.clear()
+
+    def dirty(self):
+        """
+        Regions whose desired state hasn't been sent yet
+
+        Returns:
+            tuple: (LED indexes, OLED lines)
+        """
+        with self._lock:
+            return ([i for i, c in sorted(self._rgb.items()) if self._sent_rgb.get(i) != c],
+                    [l for l, t in sorted(self._text.items()) if self._sent_text.get(l) != t])
+
+    def _send(self, frame):
+        """Write one display frame within the byte budget; False if held back"""
+        if len(frame) > self._tokens:
+            self.deferred_budget += 1
+            return False
+        if not self.mc.write_low_priority(frame):
+            self.deferred_busy += 1
+            return False
+        self._tokens -= len(frame)
+        self.frames_sent += 1
+        self.bytes_sent += len(frame)
+        return True
+
+    def flush(self):
+        """
+        Send changed regions that are due
+
+        Returns:
+            int: Frames written
+        """
+        now = self.clock.monotonic()
+        if self._tokens_at is not None:
+            self._tokens = min(float(self.byte_budget),
+                               self._tokens + (now - self._tokens_at) * self.byte_budget)
+        self._tokens_at = now
+
+        with self._lock:
+            rgb = {i: c for i, c in self._rgb.items() if self._sent_rgb.get(i) != c}
+            text = {l: t for l, t in self._text.items() if self._sent_text.get(l) != t}
+        written = 0
+
+        if rgb and now >= self._rgb_due:
+            frame = HiwonderProtocol.rgb_command([[i, *c] for i, c in sorted(rgb.items())])
+            if not self._send(frame):
+                return written
+            with self._lock:
+                self._sent_rgb.update(rgb)
+            self._rgb_due = now + self.rgb_interval
+            written += 1
+
+        for line, value in sorted(text.items()):
+            if now < self._line_due.get(line, 0.0):
+                continue
+            # Pad with spaces so a shorter text clears the end of the old one
+            previous = self._sent_text.get(line, "")
+            frame = HiwonderProtocol.oled_text_command(line, value.ljust(len(previous)))
+            if not self._send(frame):
+                return written
+            with self._lock:
+                self._sent_text[line] = value
+            self._line_due[line] = now + self.oled_interval
+            written += 1
+        return written
+
+    def start(self, rate_hz=TICK_RATE_HZ):
+        """Flush periodically on the controller's clock"""
+        self._tick_interval = 1.0 / rate_hz
+        self._timer = self.clock.call_later(self._tick_interval, self._tick)
+        return self
+
+    def _tick(self):
+        if self._tick_interval is None:
+            return
+        try:
+            self.flush()
+        except Exception as e:  # Keep the display timer alive across port errors
+            print(f"Status display flush failed: {e}")
+        self._timer = self.clock.call_later(self._tick_interval, self._tick)
+
+    def stop(self):
+        """Stop the periodic flush"""
+        self._tick_interval = None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def stats(self):
+        return {
+            "updates": self.updates,
+            "frames_sent": self.frames_sent,
+            "bytes_sent": self.bytes_sent,
+            "deferred_busy": self.deferred_busy,
+            "deferred_budget": self.deferred_budget,
+        }
+
+
+# Battery / command status on the board while driving a test pattern
+if __name__ == '__main__':
+    import argparse
+    import time
+    from motor_controller import MotorController
+    from telemetry_reader import TelemetryReader
+
+    parser = argparse.ArgumentParser(description="Diffed LED / OLED status display demo")
+    parser.add_argument("--port", default="/dev/ttyACM0")
+    parser.add_argument("--simulate", action="store_true", help="Run against board_simulator.py")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds")
+    parser.add_argument("--status-rate", type=float, default=100.0,
+                        help="Hz the status loop sets the display state")
+    args = parser.parse_args()
+
+    sim = None
+    if args.simulate:
+        from board_simulator import BoardSimulator
+        sim = BoardSimulator().start()
+        args.port = sim.port
+
+    battery = [None]
+
+    def on_battery(payload, timestamp_ns):
+        millivolts = HiwonderProtocol.parse_battery(payload)
+        if millivolts is not None:
+            battery[0] = millivolts / 1000.0
+
+    pattern = [(0.0, 0.0), (0.5, 0.5), (1.0, 1.0), (0.5, -0.5), (0.0, 0.0)]  # (right, left), equal parts of the run
+    ticks = 0
+    try:
+        with MotorController(port=args.port, non_blocking_preactivate=True) as mc, \
+                TelemetryReader(mc.ser) as reader:
+            reader.subscribe(HiwonderProtocol.FUNC_SYS, on_battery)
+            display = StatusDisplay(mc).start()
+            print(f"Status loop at {args.status_rate:.0f} Hz for {args.duration:.0f} s while driving...")
+            start = time.monotonic()
+            speeds = None
+            while time.monotonic() - start < args.duration:
+                elapsed = time.monotonic() - start
+                step = pattern[min(len(pattern) - 1, int(elapsed / args.duration * len(pattern)))]
+                if step != speeds:
+                    speeds = step
+                    mc.set_wheel_speeds(*speeds)
+                display.set_pixel(1, *((0, 255, 0) if any(speeds) else (0, 0, 255)))  # Green while moving
+                display.set_pixel(2, *((255, 160, 0) if int(elapsed * 2) % 2 else (0, 0, 0)))  # 1 Hz heartbeat
+                display.set_text(1, f"Bat {battery[0]:.2f}V" if battery[0] else "Bat --")
+                display.set_text(2, f"R{speeds[0]:+.1f} L{speeds[1]:+.1f} {elapsed:4.1f}s")
+                ticks += 1
+                time.sleep(1.0 / args.status_rate)
+            mc.stop()
+            time.sleep(0.3)  # Let the last changes through
+            display.stop()
+            display.flush()
+            reader.unsubscribe(HiwonderProtocol.FUNC_SYS, on_battery)
+    finally:
+        if sim is not None:
+            sim.close()
+
+    stats = display.stats()
+    naive = ticks * (len(HiwonderProtocol.rgb_command([[1, 0, 0, 0], [2, 0, 0, 0]]))
+                     + 2 * len(HiwonderProtocol.oled_text_command(1, " " * HiwonderProtocol.OLED_LINE_CHARS)))
+    print(f"\n{stats['updates']} state updates -> {stats['frames_sent']} frames, {stats['bytes_sent']} bytes "
+          f"({stats['bytes_sent'] / args.duration:.0f} B/s; redrawing every tick: {naive / args.duration:.0f} B/s)")
+    print(f"Yielded to motor writes: {stats['deferred_busy']}, held by byte budget: {stats['deferred_budget']}")
+    if sim is not None:
+        print(f"Board LEDs: {sim.rgb}")
+        print(f"Board OLED: {[sim.oled[line].rstrip() for line in sorted(sim.oled)]}")
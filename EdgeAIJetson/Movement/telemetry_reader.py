@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Background reader for frames streamed by the RRC controller board
+One thread owns the read side of the serial port and dispatches decoded
+frames to subscribers by function code
+"""
+
+import sys
+import os
+import time
+import threading
+import serial
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hiwonder_protocol import FrameParser
+
+
+class TelemetryReader:
+    """
+    Reads the serial port in a background thread and dispatches frames
+
+    Callbacks run on the reader thread as callback(payload, timestamp_ns),
+    where timestamp_ns is the host time.monotonic_ns() at which the bytes
+    completing the frame were read. Keep callbacks short.
+
+    Example:
+        with MotorController() as mc, TelemetryReader(mc.ser) as reader:
+            reader.subscribe(HiwonderProtocol.FUNC_IMU, on_imu)
+    """
+
+    def __init__(self, ser):
+        self.ser = ser
+        self.parser = FrameParser()
+        self.frames_received = 0
+        self.callback_errors = 0
+        self._handlers = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._running = False
+
+    def subscribe(self, function, callback):
+        """
+        Register a callback for frames with the given function code
+
+        Args:
+            function: HiwonderProtocol.FUNC_* code
+            callback: callable(payload, timestamp_ns)
+        """
+        with self._lock:
+            handlers = list(self._handlers.get(function, []))
+            handlers.append(callback)
+            self._handlers[function] = handlers
+        if hasattr(self.ser, "subscribe"):
+            # serial_broker.BrokerClient only forwards subscribed frames
+            self.ser.subscribe(function)
+
+    def unsubscribe(self, function, callback):
+        """Remove a previously registered callback"""
+        with self._lock:
+            handlers = [h for h in self._handlers.get(function, []) if h != callback]
+            self._handlers[function] = handlers
+
+    def start(self):
+        """Start the reader thread"""
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="telemetry-reader", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the reader thread (returns within the port's read timeout)"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def feed(self, data, timestamp_ns=None):
+        """Decode bytes and dispatch complete frames (used by the reader thread)"""
+        if timestamp_ns is None:
+            timestamp_ns = time.monotonic_ns()
+        for function, payload in self.parser.feed(data):
+            self.frames_received += 1
+            for callback in self._handlers.get(function, ()):
+                try:
+                    callback(payload, timestamp_ns)
+                except Exception as e:
+                    self.callback_errors += 1
+                    if self.callback_errors == 1:
+                        print(f"Telemetry callback error: {e}")
+
+    def _run(self):
+        while self._running:
+            try:
+                data = self.ser.read(self.ser.in_waiting or 1)
+            except (serial.SerialException, OSError, TypeError):
+                # Port closed underneath us
+                break
+            if data:
+                self.feed(data, time.monotonic_ns())
+        self._running = False
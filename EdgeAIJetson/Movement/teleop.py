@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Gamepad / SBUS teleoperation straight to the motors
+Decodes FUNC_GAMEPAD and FUNC_SBUS frames from the board and turns stick
+positions into set_velocity() on the telemetry reader thread, with
+per-axis deadband and expo curves and input-to-command latency stats
+"""
+
+import sys
+import os
+import math
+import time
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hiwonder_protocol import HiwonderProtocol
+from latency_metrics import LatencyHistogram
+
+SOURCES = ("gamepad", "sbus")
+DEFAULT_AXES = {"gamepad": ("ly", "rx"), "sbus": ("ch2", "ch1")}  # (linear, angular)
+SBUS_CENTER = (HiwonderProtocol.SBUS_MIN + HiwonderProtocol.SBUS_MAX) // 2
+SBUS_HALF_RANGE = (HiwonderProtocol.SBUS_MAX - HiwonderProtocol.SBUS_MIN) / 2.0
+
+MAX_LINEAR = 0.12  # m/s at full stick
+MAX_ANGULAR = 1.0  # rad/s at full stick
+INPUT_TIMEOUT = 0.5  # seconds without input frames before the robot stops
+MIN_CHANGE = 0.002  # m/s or rad/s, smaller changes are not sent
+
+
+def gamepad_axes(payload):
+    """
+    Normalized gamepad state
+
+    Returns:
+        tuple: ({"lx", "ly", "rx", "ry": -1..1}, buttons bitmask), or None
+               if the payload is malformed
+    """
+    report = HiwonderProtocol.parse_gamepad(payload)
+    if report is None:
+        return None
+    buttons, _, lx, ly, rx, ry = report
+    return {name: max(-1.0, value / 127.0) for name, value in zip(("lx", "ly", "rx", "ry"), (lx, ly, rx, ry))}, buttons
+
+
+def sbus_axes(payload):
+    """
+    Normalized SBUS channels
+
+    Returns:
+        tuple: ({"ch1".."ch16": -1..1}, signal_loss, failsafe), or None if
+               the payload is malformed
+    """
+    report = HiwonderProtocol.parse_sbus(payload)
+    if report is None:
+        return None
+    channels, signal_loss, failsafe = report
+    axes = {f"ch{i + 1}": max(-1.0, min(1.0, (raw - SBUS_CENTER) / SBUS_HALF_RANGE))
+            for i, raw in enumerate(channels)}
+    return axes, signal_loss, failsafe
+
+
+class AxisCurve:
+    """
+    Stick response: deadband, expo and scale
+
+    The deadband is removed and the rest rescaled to 0..1, so output
+    starts from zero at the deadband edge instead of jumping. expo blends
+    linear and cubic response (0 = linear, 1 = fully cubic) for finer
+    control near center.
+    """
+
+    def __init__(self, deadband=0.05, expo=0.3, scale=1.0, invert=False):
+        self.deadband = deadband
+        self.expo = expo
+        self.scale = scale
+        self.invert = invert
+
+    def apply(self, value):
+        if self.invert:
+            value = -value
+        magnitude = abs(value)
+        if magnitude <= self.deadband:
+            return 0.0
+        magnitude = min(1.0, (magnitude - self.deadband) / (1.0 - self.deadband))
+        magnitude = (1.0 - self.expo) * magnitude + self.expo * magnitude ** 3
+        return math.copysign(magnitude * self.scale, value)
+
+
+class TeleopMode:
+    """
+    Maps remote control input to MotorController.set_velocity()
+
+    Commands are sent from the TelemetryReader callback that decoded the
+    frame, so there is no queue or thread hop between input and motors.
+    Only changes larger than MIN_CHANGE are sent. The robot stops when
+    the SBUS receiver reports signal loss or failsafe, when the enable
+    input is released, or when no input arrives for `input_timeout`
+    (checked on the controller's clock).
+
+    Use MotorController(non_blocking_preactivate=True); otherwise the
+    pre-activation sleep blocks the reader thread on every start.
+
+    Example:
+        teleop = TeleopMode(mc, source="sbus", enable=5)
+        teleop.attach(reader)
+        ...
+        print(teleop.stats())
+    """
+
+    def __init__(self, mc, source="gamepad", linear_axis=None, angular_axis=None,
+                 max_linear=MAX_LINEAR, max_angular=MAX_ANGULAR, linear_curve=None, angular_curve=None,
+                 enable=None, input_timeout=INPUT_TIMEOUT, min_change=MIN_CHANGE):
+        """
+        Args:
+            source: "gamepad" or "sbus"
+            linear_axis, angular_axis: Axis names ("lx", "ly", "rx", "ry" or
+                                       "ch1".."ch16"); defaults per source
+            linear_curve, angular_curve: AxisCurve; the angular default is
+                                         inverted so stick right turns right
+            enable: Gamepad button number that must be held, or SBUS
+                    channel number (1-16) that must be above half; None
+                    to always drive
+        """
+        if source not in SOURCES:
+            raise ValueError(f"source must be one of {SOURCES}")
+        self.mc = mc
+        self.source = source
+        default_linear, default_angular = DEFAULT_AXES[source]
+        self.linear_axis = linear_axis or default_linear
+        self.angular_axis = angular_axis or default_angular
+        self.linear_curve = linear_curve or AxisCurve(scale=max_linear)
+        self.angular_curve = angular_curve or AxisCurve(scale=max_angular, invert=True)
+        self.enable = enable
+        self.input_timeout = input_timeout
+        self.min_change = min_change
+
+        self.function = HiwonderProtocol.FUNC_GAMEPAD if source == "gamepad" else HiwonderProtocol.FUNC_SBUS
+        self.latency = LatencyHistogram()
+        self._lock = threading.Lock()
+        self._command = (0.0, 0.0)  # Last (linear, angular) sent
+        self._last_input = None  # mc.clock time of the last input frame
+        self._reader = None
+        self._watchdog = None
+
+        # Statistics
+        self.frames = 0
+        self.frames_corrupt = 0
+        self.commands_sent = 0
+        self.halts = {}  # reason -> count
+
+    def attach(self, reader):
+        """Start driving from a TelemetryReader's input frames"""
+        self._reader = reader
+        reader.subscribe(self.function, self.on_frame)
+        self._schedule_watchdog()
+        return self
+
+    def detach(self):
+        """Stop listening and stop the robot"""
+        if self._reader is not None:
+            self._reader.unsubscribe(self.function, self.on_frame)
+            self._reader = None
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+            self._watchdog = None
+        self._halt("detached")
+
+    def _decode(self, payload):
+        """(axes, enabled, halt reason or None), or None if malformed"""
+        if self.source == "gamepad":
+            decoded = gamepad_axes(payload)
+            if decoded is None:
+                return None
+            axes, buttons = decoded
+            enabled = self.enable is None or bool(buttons >> self.enable & 1)
+            return axes, enabled, None
+        decoded = sbus_axes(payload)
+        if decoded is None:
+            return None
+        axes, signal_loss, failsafe = decoded
+        enabled = self.enable is None or axes[f"ch{self.enable}"] > 0.5
+        return axes, enabled, "failsafe" if failsafe or signal_loss else None
+
+    def on_frame(self, payload, timestamp_ns):
+        """Decode one input frame and command the motors (reader thread)"""
+        decoded = self._decode(payload)
+        if decoded is None:
+            self.frames_corrupt += 1
+            return
+        axes, enabled, halt = decoded
+        self.frames += 1
+        self._last_input = self.mc.clock.monotonic()
+        if halt is not None or not enabled:
+            self._halt(halt or "disabled")
+            return
+
+        linear = self.linear_curve.apply(axes[self.linear_axis])
+        angular = self.angular_curve.apply(axes[self.angular_axis])
+        with self._lock:
+            last_linear, last_angular = self._command
+            stopping = linear == 0.0 and angular == 0.0 and self._command != (0.0, 0.0)
+            # Small changes are filtered, but never the return to zero (the robot would keep creeping)
+            if (not stopping and abs(linear - last_linear) < self.min_change
+                    and abs(angular - last_angular) < self.min_change):
+                return
+            if linear == 0.0 and angular == 0.0:
+                self.mc.stop()
+            else:
+                self.mc.set_velocity(linear, angular)
+            self._command = (linear, angular)
+            self.commands_sent += 1
+        self.latency.record(time.monotonic_ns() - timestamp_ns)
+
+    def _halt(self, reason):
+        with self._lock:
+            if self._command == (0.0, 0.0):
+                return
+            self.mc.stop()
+            self._command = (0.0, 0.0)
+        self.halts[reason] = self.halts.get(reason, 0) + 1
+        print(f"Teleop stop: {reason}")
+
+    def _schedule_watchdog(self):
+        self._watchdog = self.mc.clock.call_later(self.input_timeout / 2.0, self._check_input)
+
+    def _check_input(self):
+        """Stop if input frames stopped arriving (clock scheduler)"""
+        if self._reader is None:
+            return
+        last = self._last_input
+        if last is not None and self.mc.clock.monotonic() - last > self.input_timeout:
+            self._halt("input timeout")
+        self._schedule_watchdog()
+
+    @property
+    def command(self):
+        """Last (linear_mps, angular_radps) sent"""
+        return self._command
+
+    def stats(self):
+        """Frame, command and latency counters (latency in microseconds)"""
+        latency = self.latency.to_dict()
+        return {
+            "frames": self.frames,
+            "frames_corrupt": self.frames_corrupt,
+            "commands_sent": self.commands_sent,
+            "halts": dict(self.halts),
+            "latency_p50_us": latency["p50_ns"] / 1e3,
+            "latency_p99_us": latency["p99_ns"] / 1e3,
+            "latency_max_us": latency["max_ns"] / 1e3,
+        }
+
+
+def _simulated_input(source, t):
+    """Scripted stick positions (linear, angular) in -1..1 for the --simulate demo"""
+    if t < 0.5:
+        return 0.0, 0.0
+    if t < 1.5:
+        return t - 0.5, 0.0  # Ramp forward
+    if t < 2.5:
+        return 1.0, 0.5  # Forward, turning right
+    if t < 3.0:
+        return 0.02, 0.0  # Inside the deadband
+    return None  # Receiver goes quiet
+
+
+def _input_frame(source, linear, angular, enable):
+    """Board input frame for stick positions (simulator demo)"""
+    if source == "gamepad":
+        # Stick up is negative y on most pads; the demo drives with ly = +linear
+        buttons = (1 << enable) if enable is not None else 0
+        return HiwonderProtocol.gamepad_report(buttons, HiwonderProtocol.GAMEPAD_HAT_CENTER,
+                                               0, int(linear * 127), int(angular * 127), 0)
+    channels = [SBUS_CENTER] * 16
+    channels[1] = int(SBUS_CENTER + linear * SBUS_HALF_RANGE)
+    channels[0] = int(SBUS_CENTER + angular * SBUS_HALF_RANGE)
+    if enable is not None:
+        channels[enable - 1] = HiwonderProtocol.SBUS_MAX
+    return HiwonderProtocol.sbus_report(channels)
+
+
+# Drive from a gamepad or RC receiver plugged into the board
+if __name__ == '__main__':
+    import argparse
+    from motor_controller import MotorController
+    from telemetry_reader import TelemetryReader
+
+    parser = argparse.ArgumentParser(description="Gamepad / SBUS teleop")
+    parser.add_argument("--port", default="/dev/ttyACM0")
+    parser.add_argument("--simulate", action="store_true", help="Scripted input into board_simulator.py")
+    parser.add_argument("--source", choices=SOURCES, default="gamepad")
+    parser.add_argument("--linear-axis", help="Default: ly (gamepad) / ch2 (sbus)")
+    parser.add_argument("--angular-axis", help="Default: rx (gamepad) / ch1 (sbus)")
+    parser.add_argument("--max-linear", type=float, default=MAX_LINEAR, help="m/s")
+    parser.add_argument("--max-angular", type=float, default=MAX_ANGULAR, help="rad/s")
+    parser.add_argument("--deadband", type=float, default=0.05)
+    parser.add_argument("--expo", type=float, default=0.3)
+    parser.add_argument("--invert-linear", action="store_true", help="For pads that report stick up as negative")
+    parser.add_argument("--enable", type=int, help="Deadman button number / arm switch channel")
+    args = parser.parse_args()
+
+    sim = None
+    if args.simulate:
+        from board_simulator import BoardSimulator
+        sim = BoardSimulator().start()
+        args.port = sim.port
+
+    linear_curve = AxisCurve(args.deadband, args.expo, args.max_linear, invert=args.invert_linear)
+    angular_curve = AxisCurve(args.deadband, args.expo, args.max_angular, invert=True)
+    try:
+        with MotorController(port=args.port, non_blocking_preactivate=True) as mc, \
+                TelemetryReader(mc.ser) as reader:
+            teleop = TeleopMode(mc, args.source, args.linear_axis, args.angular_axis,
+                                linear_curve=linear_curve, angular_curve=angular_curve, enable=args.enable)
+            teleop.attach(reader)
+            print(f"Teleop from {args.source}: linear {teleop.linear_axis}, angular {teleop.angular_axis}"
+                  + (" (Ctrl+C to stop)" if sim is None else ""))
+            try:
+                if sim is None:
+                    while True:
+                        time.sleep(1.0)
+                        stats = teleop.stats()
+                        print(f"  command {teleop.command[0]:+.2f} m/s {teleop.command[1]:+.2f} rad/s, "
+                              f"latency p50 {stats['latency_p50_us']:.0f} us")
+                else:
+                    start = time.monotonic()
+                    while time.monotonic() - start < 4.0:
+                        stick = _simulated_input(args.source, time.monotonic() - start)
+                        if stick is not None:
+                            sim.inject_frame(_input_frame(args.source, *stick, args.enable))
+                        time.sleep(0.02)  # 50 Hz input
+            except KeyboardInterrupt:
+                pass
+            teleop.detach()
+    finally:
+        if sim is not None:
+            sim.close()
+
+    stats = teleop.stats()
+    print(f"\n{stats['frames']} input frames, {stats['commands_sent']} commands sent, stops: {stats['halts']}")
+    print(f"Input-to-command latency: p50 {stats['latency_p50_us']:.0f} us, "
+          f"p99 {stats['latency_p99_us']:.0f} us, max {stats['latency_max_us']:.0f} us")
+    if sim is not None:
+        print(f"Simulated pose: x {sim.pose[0]:.2f} m, y {sim.pose[1]:.2f} m, "
+              f"heading {math.degrees(sim.pose[2]):.0f} deg")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Minimum start command per wheel
+Binary-searches the smallest command that reliably starts each wheel from
+rest (cold drivers), using encoder feedback, and stores it in the robot
+profile's performance section
+Run with robot ON GROUND (the result depends on load)
+"""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from speed_controller import EncoderFeedback
+from robot_profile import save_profile_section
+
+START_SPEED = 0.02  # RPS, encoder speed that counts as started
+START_TIMEOUT = 1.0  # seconds a wheel gets to start
+REST_TIME = 1.0  # seconds at rest before a trial, so the drivers are cold again
+REPEATS = 3  # a command must start the wheel in every repeat
+RESOLUTION = 0.005  # command units
+SEARCH_LIMIT = 0.3  # initial upper bound, doubled up to 1.0 if the wheels don't start
+
+
+class MinimumStartSearch:
+    """
+    Per-wheel binary search of the minimum start command
+
+    Both wheels are searched at once: each trial sends each wheel the
+    midpoint of its own bracket. A wheel that fails one repeat gets 0 for
+    the rest of that probe, so a failing command costs one trial, not
+    REPEATS.
+
+    Example:
+        search = MinimumStartSearch(mc, reader)
+        right, left = search.run()
+    """
+
+    def __init__(self, mc, reader, repeats=REPEATS, resolution=RESOLUTION,
+                 timeout=START_TIMEOUT, rest_time=REST_TIME, verbose=True):
+        self.mc = mc
+        self.feedback = EncoderFeedback().attach(reader)
+        self.reader = reader
+        self.repeats = repeats
+        self.resolution = resolution
+        self.timeout = timeout
+        self.rest_time = rest_time
+        self.verbose = verbose
+        self.trials = 0
+
+    def _wait_for_rest(self):
+        """Wait until both wheels are still, then rest_time more"""
+        deadline = time.monotonic() + 5.0
+        while time.monotonic() < deadline:
+            if abs(self.feedback.right_rps) < START_SPEED and abs(self.feedback.left_rps) < START_SPEED:
+                break
+            time.sleep(0.02)
+        time.sleep(self.rest_time)
+
+    def trial(self, right_command, left_command):
+        """
+        Command both wheels from rest
+
+        Returns:
+            tuple: (right started, left started) within the timeout
+        """
+        self._wait_for_rest()
+        self.trials += 1
+        started = [right_command == 0, left_command == 0]
+        self.mc.set_wheel_speeds(right_command, left_command)
+        deadline = time.monotonic() + self.timeout
+        while not all(started) and time.monotonic() < deadline:
+            time.sleep(0.01)
+            started[0] = started[0] or abs(self.feedback.right_rps) > START_SPEED
+            started[1] = started[1] or abs(self.feedback.left_rps) > START_SPEED
+        self.mc.stop()
+        return (right_command != 0 and started[0], left_command != 0 and started[1])
+
+    def probe(self, commands):
+        """
+        Whether each wheel starts reliably at its command (None = not probed)
+
+        Returns:
+            list: [right, left] True/False/None
+        """
+        reliable = [None if c is None else True for c in commands]
+        for _ in range(self.repeats):
+            active = [c if ok else 0.0 for c, ok in zip(commands, reliable)]
+            if not any(active):
+                break
+            result = self.trial(*active)
+            for wheel in (0, 1):
+                if active[wheel] and not result[wheel]:
+                    reliable[wheel] = False
+        return reliable
+
+    def run(self, limit=SEARCH_LIMIT):
+        """
+        Search both wheels
+
+        Returns:
+            tuple: (right, left) minimum reliable start commands
+        """
+        if self.feedback.reports == 0:
+            time.sleep(0.3)
+            if self.feedback.reports == 0:
+                raise RuntimeError("No encoder reports from the board - the search needs encoder feedback")
+
+        # Find an upper bound that starts both wheels
+        high = [limit, limit]
+        reliable = self.probe(high)
+        while not all(reliable):
+            if limit >= 1.0:
+                raise RuntimeError("Wheels did not start at full command - check battery and motor wiring")
+            limit = min(1.0, limit * 2)
+            high = [h if ok else limit for h, ok in zip(high, reliable)]
+            retry = self.probe([None if ok else limit for ok in reliable])
+            reliable = [ok or bool(r) for ok, r in zip(reliable, retry)]
+
+        low = [0.0, 0.0]
+        while any(h - l > self.resolution for l, h in zip(low, high)):
+            mid = [(l + h) / 2.0 if h - l > self.resolution else None for l, h in zip(low, high)]
+            reliable = self.probe(mid)
+            for wheel in (0, 1):
+                if reliable[wheel] is None:
+                    continue
+                if reliable[wheel]:
+                    high[wheel] = mid[wheel]
+                else:
+                    low[wheel] = mid[wheel]
+            if self.verbose:
+                print(f"  right [{low[0]:.4f}, {high[0]:.4f}]  left [{low[1]:.4f}, {high[1]:.4f}]  "
+                      f"({self.trials} trials)")
+        return high[0], high[1]
+
+    def close(self):
+        self.feedback.detach(self.reader)
+
+
+# Find the minimum start commands and store them in the robot profile
+if __name__ == '__main__':
+    import argparse
+    from motor_controller import MotorController
+    from telemetry_reader import TelemetryReader
+
+    parser = argparse.ArgumentParser(description="Binary-search the minimum start command of each wheel")
+    parser.add_argument("--port", default="/dev/ttyACM0")
+    parser.add_argument("--simulate", action="store_true", help="Run against board_simulator.py")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--resolution", type=float, default=RESOLUTION)
+    parser.add_argument("--rest", type=float, default=REST_TIME, help="Seconds at rest before each trial")
+    parser.add_argument("--profile", help="Robot profile path (default: $JETACKER_PROFILE or ~/.config/jetacker)")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    sim = None
+    if args.simulate:
+        from board_simulator import BoardSimulator, COLD_TIMEOUT, MIN_START_COMMAND
+        sim = BoardSimulator().start()
+        args.port = sim.port
+        args.rest = min(args.rest, COLD_TIMEOUT + 0.15)
+        print(f"Simulated minimum start command: {MIN_START_COMMAND}")
+
+    start = time.monotonic()
+    try:
+        # Raw commands: no calibration and no start boost from an earlier run
+        with MotorController(port=args.port) as mc, TelemetryReader(mc.ser) as reader:
+            search = MinimumStartSearch(mc, reader, args.repeats, args.resolution, rest_time=args.rest)
+            print("Searching minimum start commands...")
+            right, left = search.run()
+            search.close()
+    finally:
+        if sim is not None:
+            sim.close()
+
+    print(f"\nMinimum reliable start command: right {right:.4f}, left {left:.4f} "
+          f"({search.trials} trials, {args.repeats} repeats, {time.monotonic() - start:.1f} s)")
+
+    if not args.no_save:
+        path = save_profile_section("performance", {
+            "min_start_command": {"right": right, "left": left, "repeats": args.repeats,
+                                  "resolution": args.resolution},
+        }, args.profile, merge=True)
+        print(f"Saved to {path}; use MotorController(performance=load_performance())")
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Battery voltage sag under step loads
+Records every FUNC_SYS battery report while stepping the motors through
+idle, half, full and reversing loads, stores the samples in a compressed
+NumPy array file and the sag summary in the robot profile
+Run with robot ON GROUND (or wheels blocked) for a realistic load
+"""
+
+import sys
+import os
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hiwonder_protocol import HiwonderProtocol
+from robot_profile import save_profile_section
+
+# (name, command, seconds); "idle" first sets the no-load baseline
+LOAD_STEPS = (
+    ("idle", 0.0, 2.0),
+    ("half", 0.5, 3.0),
+    ("rest", 0.0, 2.0),
+    ("full", 1.0, 3.0),
+    ("reverse", -1.0, 2.0),  # Direction change at full command: peak current
+    ("recovery", 0.0, 3.0),
+)
+MAX_SAG_PERCENT = 10.0  # More than this under full load points at the battery or wiring
+RECOVERY_BAND = 0.01  # Recovered when back within 1% of the idle voltage
+
+
+class BatteryLog:
+    """
+    Battery reports in growable NumPy arrays
+
+    Every FUNC_SYS battery frame is appended as (int64 timestamp_ns,
+    uint16 millivolts, uint8 step index); the arrays double when full.
+    At ten bytes per sample an hour at the board's rate stays well under
+    a megabyte.
+    """
+
+    def __init__(self, capacity=1024):
+        self._t_ns = np.zeros(capacity, dtype=np.int64)
+        self._millivolts = np.zeros(capacity, dtype=np.uint16)
+        self._step = np.zeros(capacity, dtype=np.uint8)
+        self.count = 0
+        self.step = 0  # Index of the active load step, stored with each sample
+        self._reader = None
+
+    def attach(self, reader):
+        self._reader = reader
+        reader.subscribe(HiwonderProtocol.FUNC_SYS, self.on_frame)
+        return self
+
+    def detach(self):
+        if self._reader is not None:
+            self._reader.unsubscribe(HiwonderProtocol.FUNC_SYS, self.on_frame)
+            self._reader = None
+
+    def on_frame(self, payload, timestamp_ns):
+        millivolts = HiwonderProtocol.parse_battery(payload)
+        if millivolts is None:
+            return
+        if self.count == len(self._t_ns):
+            self._t_ns = np.concatenate([self._t_ns, np.zeros_like(self._t_ns)])
+            self._millivolts = np.concatenate([self._millivolts, np.zeros_like(self._millivolts)])
+            self._step = np.concatenate([self._step, np.zeros_like(self._step)])
+        i = self.count
+        self._t_ns[i] = timestamp_ns
+        self._millivolts[i] = millivolts
+        self._step[i] = self.step
+        self.count += 1
+
+    def arrays(self):
+        """
+        Recorded samples (views, valid until the next append)
+
+        Returns:
+            tuple: (t_ns, millivolts, step) arrays
+        """
+        n = self.count
+        return self._t_ns[:n], self._millivolts[:n], self._step[:n]
+
+    def save(self, path, steps=LOAD_STEPS):
+        """Write the samples and the step table to a compressed .npz"""
+        t_ns, millivolts, step = self.arrays()
+        np.savez_compressed(path, t_ns=t_ns, millivolts=millivolts, step=step,
+                            step_names=np.array([s[0] for s in steps]),
+                            step_commands=np.array([s[1] for s in steps], dtype=np.float32))
+        return path
+
+
+def load_battery_log(path):
+    """
+    Load a log written by BatteryLog.save()
+
+    Returns:
+        dict: array name -> ndarray
+    """
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def run_load_steps(mc, log, steps=LOAD_STEPS, verbose=True):
+    """Drive both wheels through the load steps, tagging log samples with the step index"""
+    try:
+        for index, (name, command, seconds) in enumerate(steps):
+            log.step = index
+            if verbose:
+                print(f"  {name:<9} command {command:+.2f} for {seconds:.1f} s")
+            if command:
+                mc.set_wheel_speeds(command, command)
+            else:
+                mc.stop()
+            time.sleep(seconds)
+    finally:
+        mc.stop()
+
+
+def sag_summary(t_ns, millivolts, step, steps=LOAD_STEPS):
+    """
+    Per-step voltage statistics relative to the idle baseline
+
+    Returns:
+        dict: idle_voltage, per-step mean/min voltage and sag percent,
+              full_load_voltage, min_voltage, max_sag_percent and
+              recovery_s (time after the last load to return within
+              RECOVERY_BAND of idle)
+    """
+    volts = millivolts.astype(np.float64) / 1000.0
+    idle = volts[step == 0]
+    if len(idle) == 0:
+        raise RuntimeError("No battery reports during the idle step")
+    idle_voltage = float(np.median(idle))
+
+    per_step = {}
+    for index, (name, command, _) in enumerate(steps):
+        v = volts[step == index]
+        if len(v) == 0:
+            continue
+        per_step[name] = {
+            "command": command,
+            "samples": int(len(v)),
+            "mean_voltage": round(float(v.mean()), 3),
+            "min_voltage": round(float(v.min()), 3),
+            "sag_percent": round(100.0 * (idle_voltage - float(v.min())) / idle_voltage, 2),
+        }
+
+    full = [index for index, (_, command, _) in enumerate(steps) if abs(command) >= 1.0]
+    full_v = volts[np.isin(step, full)] if full else volts
+    # Steady state: second half of the full-load samples, past the start transient
+    full_load_voltage = float(np.median(full_v[len(full_v) // 2:])) if len(full_v) else None
+
+    recovery_s = None
+    last_load = max((i for i, s in enumerate(steps) if s[1]), default=None)
+    if last_load is not None and last_load + 1 < len(steps):
+        after = step == last_load + 1
+        t_after = t_ns[after]
+        recovered = np.flatnonzero(np.abs(volts[after] - idle_voltage) <= RECOVERY_BAND * idle_voltage)
+        if len(recovered) and len(t_after):
+            recovery_s = round(float(t_after[recovered[0]] - t_after[0]) * 1e-9, 3)
+
+    return {
+        "idle_voltage": round(idle_voltage, 3),
+        "full_load_voltage": None if full_load_voltage is None else round(full_load_voltage, 3),
+        "min_voltage": round(float(volts.min()), 3),
+        "max_sag_percent": round(max(s["sag_percent"] for s in per_step.values()), 2),
+        "recovery_s": recovery_s,
+        "steps": per_step,
+    }
+
+
+# Measure voltage sag and store it in the robot profile
+if __name__ == '__main__':
+    import argparse
+    from motor_controller import MotorController
+    from telemetry_reader import TelemetryReader
+
+    parser = argparse.ArgumentParser(description="Log battery voltage under step loads")
+    parser.add_argument("--port", default="/dev/ttyACM0")
+    parser.add_argument("--simulate", action="store_true", help="Run against board_simulator.py")
+    parser.add_argument("--output", default="voltage_sag.npz", help="Battery sample file")
+    parser.add_argument("--profile", help="Robot profile path (default: $JETACKER_PROFILE or ~/.config/jetacker)")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    sim = None
+    if args.simulate:
+        from board_simulator import BoardSimulator
+        sim = BoardSimulator().start()
+        args.port = sim.port
+
+    log = BatteryLog()
+    try:
+        with MotorController(port=args.port) as mc, TelemetryReader(mc.ser) as reader:
+            log.attach(reader)
+            print("Running load steps...")
+            run_load_steps(mc, log)
+            log.detach()
+    finally:
+        if sim is not None:
+            sim.close()
+
+    t_ns, millivolts, step = log.arrays()
+    duration = (t_ns[-1] - t_ns[0]) * 1e-9 if log.count > 1 else 0.0
+    log.save(args.output)
+    print(f"\n{log.count} battery reports ({log.count / duration if duration else 0:.1f}/s) -> {args.output}")
+
+    summary = sag_summary(t_ns, millivolts, step)
+    print(f"\nIdle: {summary['idle_voltage']:.2f} V")
+    for name, values in summary["steps"].items():
+        print(f"  {name:<9} mean {values['mean_voltage']:.2f} V, min {values['min_voltage']:.2f} V, "
+              f"sag {values['sag_percent']:.1f}%")
+    print(f"Full load: {summary['full_load_voltage']:.2f} V, worst sag {summary['max_sag_percent']:.1f}%"
+          + (f", recovered in {summary['recovery_s']:.2f} s" if summary["recovery_s"] is not None else ""))
+    if summary["max_sag_percent"] > MAX_SAG_PERCENT:
+        print(f"⚠ Sag above {MAX_SAG_PERCENT:.0f}% - check battery charge, age and wiring")
+
+    if not args.no_save:
+        path = save_profile_section("performance", {
+            "voltage_sag": dict(summary, log=os.path.abspath(args.output)),
+        }, args.profile, merge=True)
+        print(f"Saved to {path}")
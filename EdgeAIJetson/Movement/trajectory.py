@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Precomputed velocity trajectories for MotorController
+Acceleration- and jerk-limited (trapezoidal / S-curve) wheel speed
+profiles as NumPy arrays, streamed to the motors at a fixed rate
+"""
+
+import sys
+import os
+import time
+from collections import namedtuple
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from motor_controller import TRACK_WIDTH, WHEEL_DIAMETER, velocity_to_wheel_speeds
+
+# Default limits for the 3 kg JetAcker
+MAX_LINEAR_ACCEL = 0.3  # m/s^2
+MAX_LINEAR_JERK = 1.5  # m/s^3
+MAX_ANGULAR_ACCEL = 3.0  # rad/s^2
+MAX_ANGULAR_JERK = 15.0  # rad/s^3
+DEFAULT_RATE_HZ = 50
+
+WheelTrajectory = namedtuple("WheelTrajectory", ["t", "linear", "angular", "right_rps", "left_rps"])
+
+
+def ramp_duration(v0, v1, max_accel, max_jerk=None):
+    """
+    Time needed to change velocity from v0 to v1
+
+    Args:
+        max_accel: Acceleration limit (> 0)
+        max_jerk: Jerk limit (> 0), or None for a trapezoidal ramp
+    """
+    dv = abs(v1 - v0)
+    if dv == 0:
+        return 0.0
+    if max_jerk is None:
+        return dv / max_accel
+    peak = min(max_accel, np.sqrt(dv * max_jerk))
+    return dv / peak + peak / max_jerk
+
+
+def velocity_ramp(t, v0, v1, max_accel, max_jerk=None):
+    """
+    Velocity of a limited ramp from v0 to v1 evaluated at times t
+
+    With max_jerk=None the ramp is trapezoidal (constant acceleration);
+    otherwise it is an S-curve: jerk up, constant acceleration (if the
+    change is large enough to reach max_accel), jerk down. Times past the
+    end of the ramp hold v1.
+
+    Args:
+        t: Array of times since the start of the ramp (seconds)
+
+    Returns:
+        ndarray: Velocities, same shape as t
+    """
+    t = np.asarray(t, dtype=np.float64)
+    dv = v1 - v0
+    if dv == 0:
+        return np.full_like(t, v0)
+    sign = np.sign(dv)
+    dv = abs(dv)
+
+    if max_jerk is None:
+        return v0 + sign * np.minimum(max_accel * np.maximum(t, 0.0), dv)
+
+    peak = min(max_accel, np.sqrt(dv * max_jerk))  # Peak acceleration reached
+    tj = peak / max_jerk  # Duration of each jerk phase
+    ta = dv / peak - tj  # Duration of the constant-acceleration phase
+    total = 2 * tj + ta
+    tc = np.clip(t, 0.0, total)
+
+    v_jerk_up = 0.5 * max_jerk * tc**2
+    v_end_jerk_up = 0.5 * peak * tj
+    v_const = v_end_jerk_up + peak * (tc - tj)
+    remaining = total - tc
+    v_jerk_down = dv - 0.5 * max_jerk * remaining**2
+
+    dv_t = np.where(tc < tj, v_jerk_up, np.where(tc < tj + ta, v_const, v_jerk_down))
+    return v0 + sign * dv_t
+
+
+def plan_velocity_trajectory(segments, rate_hz=DEFAULT_RATE_HZ, initial=(0.0, 0.0),
+                             max_linear_accel=MAX_LINEAR_ACCEL, max_linear_jerk=MAX_LINEAR_JERK,
+                             max_angular_accel=MAX_ANGULAR_ACCEL, max_angular_jerk=MAX_ANGULAR_JERK,
+                             track_width=TRACK_WIDTH, wheel_diameter=WHEEL_DIAMETER):
+    """
+    Plan a time-parameterized wheel speed trajectory
+
+    Each segment ramps linear and angular velocity from the previous values
+    to the new targets within the limits, then holds them.
+
+    Args:
+        segments: List of (linear_mps, angular_radps, hold_seconds)
+        rate_hz: Sample rate of the output arrays
+        initial: (linear_mps, angular_radps) at t = 0
+        max_*_jerk: Jerk limits; pass None for trapezoidal ramps
+
+    Returns:
+        WheelTrajectory: arrays t, linear, angular, right_rps, left_rps
+    """
+    dt = 1.0 / rate_hz
+    linear_parts, angular_parts = [], []
+    v, w = initial
+    for linear, angular, hold in segments:
+        duration = max(ramp_duration(v, linear, max_linear_accel, max_linear_jerk),
+                       ramp_duration(w, angular, max_angular_accel, max_angular_jerk))
+        n = int(np.ceil((duration + hold) / dt))
+        t = np.arange(1, n + 1) * dt
+        linear_parts.append(velocity_ramp(t, v, linear, max_linear_accel, max_linear_jerk))
+        angular_parts.append(velocity_ramp(t, w, angular, max_angular_accel, max_angular_jerk))
+        v, w = linear, angular
+
+    linear = np.concatenate([[initial[0]]] + linear_parts)
+    angular = np.concatenate([[initial[1]]] + angular_parts)
+    t = np.arange(len(linear)) * dt
+    right_rps, left_rps = velocity_to_wheel_speeds(linear, angular, track_width, wheel_diameter)
+    return WheelTrajectory(t, linear, angular, right_rps, left_rps)
+
+
+class TrajectoryExecutor:
+    """
+    Streams a WheelTrajectory to a MotorController at its sample times
+
+    Samples are sent against absolute deadlines (start + t[k]) rather than
+    sleeping a period after each write, so write time doesn't accumulate
+    as drift. The executor wakes early by a running estimate of the
+    serial write time, and if it falls behind it jumps to the sample for
+    the current time instead of replaying stale ones.
+
+    Ramps from rest pass through small speeds first, so the motors wake
+    the same way pre-activation wakes them.
+    """
+
+    def __init__(self, mc, spin_threshold=0.0005):
+        self.mc = mc
+        self.spin_threshold = spin_threshold  # Busy-wait the last part of each wait
+        self.write_estimate = 0.0002  # seconds, EWMA of set_wheel_speeds() time
+        self.samples_sent = 0
+        self.samples_skipped = 0
+        self.lateness = []  # Per sent sample, seconds after its deadline
+
+    def _wait_until(self, deadline):
+        remaining = deadline - time.perf_counter()
+        if remaining > self.spin_threshold:
+            time.sleep(remaining - self.spin_threshold)
+        while time.perf_counter() < deadline:
+            pass
+
+    def run(self, trajectory, stop_at_end=True):
+        """
+        Execute a trajectory (blocks for its duration)
+
+        Returns:
+            dict: samples sent/skipped and lateness statistics (microseconds)
+        """
+        t = trajectory.t
+        right, left = trajectory.right_rps, trajectory.left_rps
+        self.lateness = []
+        self.samples_sent = 0
+        self.samples_skipped = 0
+        start = time.perf_counter()
+        k = 0
+        try:
+            while k < len(t):
+                self._wait_until(start + t[k] - self.write_estimate)
+
+                # Behind schedule: skip to the sample for the current time
+                elapsed = time.perf_counter() - start
+                latest = int(np.searchsorted(t, elapsed + self.write_estimate, side="right")) - 1
+                if latest > k:
+                    self.samples_skipped += latest - k
+                    k = latest
+
+                before = time.perf_counter()
+                self.mc.set_wheel_speeds(float(right[k]), float(left[k]))
+                after = time.perf_counter()
+                self.write_estimate += 0.2 * ((after - before) - self.write_estimate)
+                self.lateness.append(after - (start + t[k]))
+                self.samples_sent += 1
+                k += 1
+        finally:
+            if stop_at_end:
+                self.mc.stop()
+        return self.stats()
+
+    def stats(self):
+        """Lateness statistics of the last run (microseconds)"""
+        lateness = np.abs(np.asarray(self.lateness)) * 1e6
+        return {
+            "samples_sent": self.samples_sent,
+            "samples_skipped": self.samples_skipped,
+            "mean_abs_lateness_us": float(lateness.mean()) if len(lateness) else 0.0,
+            "p99_abs_lateness_us": float(np.percentile(lateness, 99)) if len(lateness) else 0.0,
+            "max_abs_lateness_us": float(lateness.max()) if len(lateness) else 0.0,
+            "write_estimate_us": self.write_estimate * 1e6,
+        }
+
+
+# Simple test: smooth forward / turn / stop
+if __name__ == '__main__':
+    import argparse
+    from motor_controller import MotorController
+
+    parser = argparse.ArgumentParser(description="Stream an S-curve trajectory to the motors")
+    parser.add_argument("--port", default="/dev/ttyACM0")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE_HZ)
+    parser.add_argument("--trapezoid", action="store_true", help="No jerk limit")
+    args = parser.parse_args()
+
+    jerk = {} if not args.trapezoid else {"max_linear_jerk": None, "max_angular_jerk": None}
+    trajectory = plan_velocity_trajectory([
+        (0.2, 0.0, 1.0),  # Forward
+        (0.1, 0.5, 1.0),  # Arc left
+        (0.0, 0.0, 0.2),  # Stop
+    ], rate_hz=args.rate, **jerk)
+    print(f"Planned {len(trajectory.t)} samples over {trajectory.t[-1]:.2f} s, "
+          f"peak wheel speed {max(np.abs(trajectory.right_rps).max(), np.abs(trajectory.left_rps).max()):.2f} RPS")
+
+    with MotorController(port=args.port, non_blocking_preactivate=True) as mc:
+        stats = TrajectoryExecutor(mc).run(trajectory)
+
+    print(f"Sent {stats['samples_sent']} samples, skipped {stats['samples_skipped']}, "
+          f"lateness mean {stats['mean_abs_lateness_us']:.0f} us, max {stats['max_abs_lateness_us']:.0f} us")